@@ -0,0 +1,7 @@
+"""
+    benchmarks
+    ~~~~~~~~~~
+
+    Contains performance benchmarks for the `scatter` package. Each module is runnable
+    as a script, ex: `python -m benchmarks.bench_zygote`.
+"""
@@ -0,0 +1,55 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_churn
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the live object count and full garbage collection pause of a service tree of
+    growing size while children are attached and disposed of.
+"""
+
+import gc
+import time
+
+from scatter.service import Service
+
+
+def churn(root, count):
+    """
+    Attach and dispose of the given number of children, each with a child of its own.
+    """
+    for _ in xrange(count):
+        child = root.child(Service)
+        child.child(Service)
+        root.detach(child, dispose=True)
+
+
+def bench(size, count):
+    """
+    Return the growth in live objects and the seconds taken by a full collection after
+    churning the given number of children through a tree of the given size.
+    """
+    root = Service.new(config=dict(LOG_LEVEL=40))
+    for _ in xrange(size):
+        root.child(Service)
+    # Warm up so the index of the tree and other lazily created state isn't counted.
+    churn(root, 1)
+
+    gc.collect()
+    objects = len(gc.get_objects())
+    churn(root, count)
+    growth = len(gc.get_objects()) - objects
+
+    start = time.time()
+    gc.collect()
+    return growth, time.time() - start
+
+
+def main(count=2000):
+    for size in (10, 100, 1000):
+        growth, pause = bench(size, count)
+        print '{0:>5} services: {1:>6} objects retained after {2} churns, {3:>8.2f} ms full collection'.format(
+            size, growth, count, pause * 1e3)
+
+
+if __name__ == '__main__':
+    main()
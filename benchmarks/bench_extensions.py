@@ -0,0 +1,91 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_extensions
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the time taken to discover extension packages among many installed distributions
+    with a cold and a warm entry point index, and with a `pkg_resources` working set.
+"""
+
+import logging
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+from scatter.importer import PackageImporter
+
+
+class Host(object):
+    """
+    Stand-in for the service which owns a package importer.
+    """
+
+    log = logging.getLogger('benchmarks.bench_extensions')
+
+
+def install(site, name, entry_points=''):
+    """
+    Create the metadata of a distribution with the given name and entry points in the given directory.
+    """
+    dist = os.path.join(site, '{0}-1.0.dist-info'.format(name.replace('-', '_')))
+    os.mkdir(dist)
+    with open(os.path.join(dist, 'METADATA'), 'w') as f:
+        f.write('Metadata-Version: 2.1\nName: {0}\nVersion: 1.0\n'.format(name))
+    with open(os.path.join(dist, 'entry_points.txt'), 'w') as f:
+        f.write(entry_points)
+
+
+def best(func, repeat=5):
+    """
+    Return the least number of seconds taken by a call of the given function.
+    """
+    times = []
+    for _ in xrange(repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    return min(times)
+
+
+def main(dists=500, extensions=5):
+    logging.disable(logging.CRITICAL)
+    root = tempfile.mkdtemp()
+    site = os.path.join(root, 'site')
+    os.mkdir(site)
+    try:
+        for i in xrange(dists):
+            install(site, 'dist-{0}'.format(i), '[console_scripts]\ndist-{0} = dist_{0}:main\n'.format(i))
+        for i in xrange(extensions):
+            install(site, 'scatter-ext{0}'.format(i), '[scatter]\next = scatter_ext{0}\n'.format(i))
+        sys.path.insert(0, site)
+
+        index_path = os.path.join(root, 'index.json')
+
+        def cold():
+            if os.path.exists(index_path):
+                os.remove(index_path)
+            return PackageImporter(Host(), index_path=index_path).entry_points
+
+        def warm():
+            return PackageImporter(Host(), index_path=index_path).entry_points
+
+        def working_set():
+            import pkg_resources
+            ws = pkg_resources.WorkingSet(sys.path)
+            return [d.get_entry_map(None) for d in ws if d.project_name.startswith('scatter')]
+
+        start = time.time()
+        import pkg_resources
+        print '{0:>20}: {1:>8.1f} ms (once per process)'.format('import pkg_resources', (time.time() - start) * 1000)
+
+        assert len(cold()) == len(warm()) == extensions
+        for label, func in (('pkg_resources scan', working_set), ('cold index', cold), ('warm index', warm)):
+            print '{0:>20}: {1:>8.1f} ms for {2} distributions'.format(label, best(func) * 1000, dists + extensions)
+    finally:
+        shutil.rmtree(root)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_import
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the time taken to import scatter modules in a fresh interpreter, along with an
+    `-X importtime` style breakdown of the self and cumulative time of every module imported.
+"""
+
+import json
+import subprocess
+import sys
+
+
+#: Run in the child interpreter to time every import made while importing the target module.
+CHILD = r'''
+import __builtin__, json, sys, time
+
+real_import = __builtin__.__import__
+stack, records = [], []
+
+def timed_import(name, *args, **kwargs):
+    count = len(sys.modules)
+    stack.append(0.0)
+    start = time.time()
+    try:
+        return real_import(name, *args, **kwargs)
+    finally:
+        elapsed = time.time() - start
+        children = stack.pop()
+        if stack:
+            stack[-1] += elapsed
+        if len(sys.modules) > count:
+            records.append((name, elapsed - children, elapsed, len(stack)))
+
+__builtin__.__import__ = timed_import
+start = time.time()
+__import__(sys.argv[1])
+total = time.time() - start
+__builtin__.__import__ = real_import
+sys.stdout.write(json.dumps(dict(total=total, records=records)))
+'''
+
+
+def profile(module):
+    """
+    Return the total seconds taken to import the given module and the timing records of
+    every import it made.
+    """
+    output = subprocess.check_output([sys.executable, '-c', CHILD, module])
+    result = json.loads(output)
+    return result['total'], result['records']
+
+
+def main(repeat=5, top=8):
+    modules = ('scatter', 'scatter.cli', 'scatter.service', 'scatter.process', 'scatter.rpc')
+    for module in modules:
+        runs = sorted(profile(module) for _ in xrange(repeat))
+        total, records = runs[len(runs) // 2]
+        print '{0:<18} {1:>8.1f} ms (median of {2})'.format(module, total * 1000, repeat)
+        print '    {0:>10} | {1:>10} | imported'.format('self [us]', 'cumul [us]')
+        for name, own, cumulative, depth in sorted(records, key=lambda r: -r[1])[:top]:
+            print '    {0:>10.0f} | {1:>10.0f} | {2}{3}'.format(own * 1e6, cumulative * 1e6, '  ' * depth, name)
+
+
+if __name__ == '__main__':
+    main()
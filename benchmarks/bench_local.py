@@ -0,0 +1,70 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_local
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the cost of attribute reads and method calls through context local proxies against
+    direct access and the generic :class: `~scatter.proxy.Proxy`.
+"""
+
+import time
+
+from scatter.local import LocalProxy, LocalStack
+from scatter.proxy import Proxy
+
+
+class Target(object):
+    """
+    Object with an attribute and a method to use through proxies.
+    """
+
+    def __init__(self):
+        self.name = 'homer'
+
+    def ping(self):
+        return self.name
+
+
+def read_attr(subject, count):
+    for _ in xrange(count):
+        subject.name
+
+
+def call_method(subject, count):
+    for _ in xrange(count):
+        subject.ping()
+
+
+def bench(func, subject, count, repeat=3):
+    """
+    Return the least number of nanoseconds per operation made by the given loop.
+    """
+    times = []
+    for _ in xrange(repeat):
+        start = time.time()
+        func(subject, count)
+        times.append(time.time() - start)
+    return min(times) / count * 1e9
+
+
+def main(count=1000000):
+    target = Target()
+    stack = LocalStack()
+    stack.push(target)
+    subjects = (
+        ('direct', target),
+        ('Proxy', Proxy(target)),
+        ('LocalProxy(stack)', stack()),
+        ('LocalProxy(func)', LocalProxy(lambda: stack.top)),
+    )
+
+    baseline = None
+    for label, subject in subjects:
+        attr, call = bench(read_attr, subject, count), bench(call_method, subject, count)
+        baseline = baseline or (attr, call)
+        print '{0:<18} attr {1:>6.0f} ns ({2:>4.1f}x)  call {3:>6.0f} ns ({4:>4.1f}x)'.format(
+            label, attr, attr / baseline[0], call, call / baseline[1])
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_proxy
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the per-call overhead of proxies specialized for their target type against the
+    generic :class: `~scatter.proxy.Proxy` and direct access.
+"""
+
+import time
+
+from scatter.proxy import Proxy, proxy_for
+
+
+class Target(object):
+    """
+    Object with an instance attribute, a property and methods to use through proxies.
+    """
+
+    def __init__(self):
+        self.name = 'homer'
+
+    @property
+    def upper(self):
+        return 'HOMER'
+
+    def ping(self):
+        return None
+
+    def add(self, a, b=1):
+        return a + b
+
+
+class SlottedTarget(object):
+    """
+    Object which stores its attributes in slots.
+    """
+
+    __slots__ = ('name',)
+
+    def __init__(self):
+        self.name = 'homer'
+
+
+OPERATIONS = (
+    ('call ping()', lambda subject, count: [subject.ping() for _ in xrange(count)]),
+    ('call add(1, 2)', lambda subject, count: [subject.add(1, 2) for _ in xrange(count)]),
+    ('read property', lambda subject, count: [subject.upper for _ in xrange(count)]),
+    ('read attribute', lambda subject, count: [subject.name for _ in xrange(count)]),
+)
+
+
+def bench(func, subject, count, repeat=3):
+    """
+    Return the least number of nanoseconds per operation made by the given loop.
+    """
+    times = []
+    for _ in xrange(repeat):
+        start = time.time()
+        func(subject, count)
+        times.append(time.time() - start)
+    return min(times) / count * 1e9
+
+
+def main(count=500000):
+    target, slotted = Target(), SlottedTarget()
+    subjects = (('direct', target), ('Proxy', Proxy(target)), ('proxy_for', proxy_for(target)))
+
+    print '{0:<16} {1}'.format('', ' '.join('{0:>16}'.format(label) for label, _ in subjects))
+    for name, func in OPERATIONS:
+        timings = [bench(func, subject, count) for _, subject in subjects]
+        print '{0:<16} {1}'.format(name, ' '.join('{0:>13.0f} ns'.format(t) for t in timings))
+
+    timings = [bench(OPERATIONS[-1][1], subject, count)
+               for subject in (slotted, Proxy(slotted), proxy_for(slotted))]
+    print '{0:<16} {1}'.format('read slot', ' '.join('{0:>13.0f} ns'.format(t) for t in timings))
+
+
+if __name__ == '__main__':
+    main()
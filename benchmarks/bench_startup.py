@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_startup
+    ~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the time taken to construct large trees of services, and to resolve the class
+    strings each one imports, with and without the :func: `~scatter.importer.import_from` cache.
+"""
+
+import logging
+import time
+
+from scatter import importer
+from scatter.service import Service
+
+
+class UncachedImports(dict):
+    """
+    Import cache which never keeps anything, so every import is resolved again.
+    """
+
+    def __setitem__(self, key, value):
+        pass
+
+
+def build(fanout, depth):
+    """
+    Return a service with the given number of children per level, down to the given depth.
+    """
+    root = Service.new()
+    level = [root]
+    for _ in xrange(depth):
+        level = [parent.child(Service) for parent in level for _ in xrange(fanout)]
+    return root
+
+
+def bench_tree(fanout, depth, repeat=3):
+    """
+    Return the best number of seconds taken to construct a service tree.
+    """
+    best = None
+    for _ in xrange(repeat):
+        start = time.time()
+        build(fanout, depth)
+        elapsed = time.time() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def bench_imports(names, count):
+    """
+    Return the number of seconds taken to resolve every name the given number of times.
+    """
+    start = time.time()
+    for _ in xrange(count):
+        for name in names:
+            importer.import_from(name, silent=True)
+    return time.time() - start
+
+
+def main():
+    logging.disable(logging.CRITICAL)
+    names = (Service.attribute_collection_class.default, Service.service_collection_class.default,
+             Service.state_machine_class.default, 'scatter.codec.JsonCodec', 'scatter.reactor.Reactor', 'scatter.ext.missing.Extension')
+    cache = importer.IMPORT_CACHE
+
+    for label, imports in (('uncached', UncachedImports()), ('cached', cache)):
+        importer.IMPORT_CACHE = imports
+        try:
+            print '{0:>8} imports: {1:>10.0f} lookups/s'.format(label, len(names) * 20000 / bench_imports(names, 20000))
+            for fanout, depth in ((10, 2), (10, 3), (32, 2)):
+                elapsed = bench_tree(fanout, depth)
+                services = sum(fanout ** level for level in xrange(depth + 1))
+                print '{0:>8} tree {1:>2}x{2}: {3:>5} services {4:>8.3f}s {5:>8.0f} services/s'.format(
+                    label, fanout, depth, services, elapsed, services / elapsed)
+        finally:
+            importer.IMPORT_CACHE = cache
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_store_contention
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure how the throughput of a mixed read/write workload shared by many threads scales
+    with the number of threads, for a :class: `~scatter.store.DictStore` behind a single global
+    lock and the lock striped :class: `~scatter.store.ShardedStore`.
+"""
+
+import random
+import threading
+import time
+
+from scatter.store import DictStore, ShardedStore
+
+
+class LockedStore(object):
+    """
+    :class: `~scatter.store.DictStore` serialized by a single lock, as services share one today.
+    """
+
+    def __init__(self):
+        self.store = DictStore()
+        self.lock = threading.Lock()
+
+    def get(self, key, default=None):
+        with self.lock:
+            return self.store.get(key, default)
+
+    def put(self, key, value):
+        with self.lock:
+            self.store.put(key, value)
+
+
+def worker(store, keys, ops, write_ratio, seed):
+    rand = random.Random(seed)
+    for _ in xrange(ops):
+        key = keys[rand.randrange(len(keys))]
+        if rand.random() < write_ratio:
+            store.put(key, key)
+        else:
+            store.get(key)
+
+
+def bench(store, threads, ops, write_ratio, keys):
+    """
+    Return the number of operations per second made by the given number of threads.
+    """
+    workers = [threading.Thread(target=worker, args=(store, keys, ops, write_ratio, i)) for i in xrange(threads)]
+    start = time.time()
+    for thread in workers:
+        thread.start()
+    for thread in workers:
+        thread.join()
+    return threads * ops / (time.time() - start)
+
+
+def main(ops=100000, key_count=10000):
+    keys = range(key_count)
+    stores = (
+        ('global lock', LockedStore),
+        ('sharded', lambda: ShardedStore(shards=16)),
+        ('sharded read-mostly', lambda: ShardedStore(shards=16, read_mostly=True)),
+    )
+
+    for write_ratio in (0.01, 0.2):
+        print 'write ratio {0:.0%}'.format(write_ratio)
+        for name, factory in stores:
+            results = []
+            for threads in (1, 2, 4, 8):
+                store = factory()
+                for key in keys:
+                    store.put(key, key)
+                results.append(bench(store, threads, ops // threads, write_ratio, keys))
+            print '  {0:<20} {1}'.format(name, ' '.join('{0:>10.0f}'.format(r) for r in results))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_timers
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure the cost of scheduling and cancelling timeouts, most of which never fire, on a
+    timing wheel against a heap of timers of growing size.
+"""
+
+import heapq
+import random
+import time
+
+from scatter.reactor import Timer
+from scatter.timers import TimerWheel
+
+
+def bench_wheel(pending, count):
+    """
+    Return the seconds taken to schedule and cancel the given number of timeouts on a wheel
+    which already holds the given number of pending timers.
+    """
+    wheel = TimerWheel()
+    now = time.time()
+    for _ in xrange(pending):
+        wheel.schedule(now + random.uniform(1, 60), None)
+
+    start = time.time()
+    for _ in xrange(count):
+        wheel.schedule(now + random.uniform(1, 60), None).cancel()
+    return time.time() - start
+
+
+def bench_heap(pending, count):
+    """
+    Return the seconds taken to schedule and remove the given number of timeouts from a heap
+    which already holds the given number of pending timers.
+    """
+    now = time.time()
+    heap = [Timer(now + random.uniform(1, 60), None, (), {}) for _ in xrange(pending)]
+    heapq.heapify(heap)
+
+    start = time.time()
+    for _ in xrange(count):
+        timer = Timer(now + random.uniform(1, 60), None, (), {})
+        heapq.heappush(heap, timer)
+        heap.remove(timer)
+        heapq.heapify(heap)
+    return time.time() - start
+
+
+def main(count=2000):
+    for pending in (100, 1000, 10000):
+        wheel, heap = bench_wheel(pending, count), bench_heap(pending, count)
+        print '{0:>6} pending: wheel {1:>8.2f} us, heap {2:>8.2f} us per schedule and cancel'.format(
+            pending, wheel / count * 1e6, heap / count * 1e6)
+
+
+if __name__ == '__main__':
+    main()
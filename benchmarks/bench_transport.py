@@ -0,0 +1,68 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_transport
+    ~~~~~~~~~~~~~~~~~~~~~~~~~~
+
+    Measure loopback message throughput of the TCP and unix domain socket streams
+    driven by a single :class: `~scatter.reactor.Reactor` thread, with and without
+    send-side coalescing.
+"""
+
+import os
+import tempfile
+import threading
+import time
+
+from scatter import transport
+from scatter.reactor import Reactor
+
+
+def bench(reactor, address, count, size, **options):
+    """
+    Return the number of seconds taken to deliver the given number of messages of the given size
+    along with the write stats of the sending stream.
+    """
+    done = threading.Event()
+    received = [0]
+
+    def on_recv(stream, msg):
+        received[0] += 1
+        if received[0] == count:
+            done.set()
+
+    server = transport.bind(address, reactor)
+    server.on_accept(lambda listener, stream: stream.on_recv(on_recv))
+    client = transport.connect(server.address, reactor, **options)
+
+    msg = 'x' * size
+    start = time.time()
+    for _ in xrange(count):
+        client.send(msg)
+    done.wait(60)
+    elapsed = time.time() - start
+    stats = client.write_stats()
+
+    client.close()
+    server.close()
+    return elapsed, stats
+
+
+def main(count=200000):
+    reactor = Reactor.new(config=dict(LOG_LEVEL=40, POLL_TIMEOUT=0.1))
+    reactor.start()
+
+    addresses = ('tcp://127.0.0.1:0', 'ipc://{0}'.format(os.path.join(tempfile.mkdtemp(), 'bench.sock')))
+    try:
+        for address in addresses:
+            for delay in (None, 0.0002):
+                for size in (64, 1024, 16384):
+                    elapsed, stats = bench(reactor, address, count, size, coalesce_delay=delay)
+                    print '{0:>4} {1:>6}B {2:>9}: {3:>10.0f} msg/s {4:>8.1f} MB/s {5:>6.1f} msg/write'.format(
+                        address[:3], size, 'coalesced' if delay else 'immediate', count / elapsed,
+                        count * size / elapsed / 1e6, stats['mean_batch'])
+    finally:
+        reactor.stop()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,78 @@
+#!/usr/bin/env python
+"""
+    benchmarks.bench_zygote
+    ~~~~~~~~~~~~~~~~~~~~~~~
+
+    Compare the time to a running worker between a cold process start and a
+    :class: `~scatter.zygote.Zygote` spawn.
+"""
+
+import os
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from scatter.zygote import Zygote, spawn
+
+
+COLD_START = ('from scatter.process import Process; '
+              'p = Process.new(config=dict(LOG_LEVEL=40)); p.start(); p.stop()')
+
+
+def bench_cold(iterations):
+    """
+    Return the seconds taken for each of the given number of cold process starts.
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', COLD_START])
+        timings.append(time.time() - start)
+    return timings
+
+
+def bench_zygote(iterations, path):
+    """
+    Return the seconds taken for each of the given number of zygote spawns.
+    """
+    timings = []
+    for _ in range(iterations):
+        start = time.time()
+        worker = spawn(path, services=['scatter.service.Service'], timeout=10)
+        timings.append(time.time() - start)
+        os.kill(worker['pid'], signal.SIGTERM)
+    return timings
+
+
+def report(name, timings):
+    timings = sorted(timings)
+    print '{0:>8}: min {1:8.2f}ms  median {2:8.2f}ms  max {3:8.2f}ms'.format(name,
+                                                                           timings[0] * 1000,
+                                                                           timings[len(timings) // 2] * 1000,
+                                                                           timings[-1] * 1000)
+
+
+def main(iterations=20):
+    path = os.path.join(tempfile.mkdtemp(), 'bench.zygote')
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            Zygote.run(config=dict(CONTROL_SOCKET=path, POLL_INTERVAL=0.05, LOG_LEVEL=40))
+        finally:
+            os._exit(0)
+
+    try:
+        while not os.path.exists(path):
+            time.sleep(0.01)
+        report('cold', bench_cold(iterations))
+        report('zygote', bench_zygote(iterations, path))
+    finally:
+        os.kill(pid, signal.SIGTERM)
+        os.waitpid(pid, 0)
+
+
+if __name__ == '__main__':
+    main()
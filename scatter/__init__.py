@@ -12,8 +12,6 @@ __name__ = 'scatter'
 __license__ = '???'
 
 
-import itertools
-
 try:
     from __version__ import __version__
 except ImportError:
@@ -22,34 +20,20 @@ else:
     __version__ = __version__
 
 
-from . import app
-from .app import *
-from . import codec
-from .codec import *
-from . import config
-from .config import *
-from . import descriptors
-from .descriptors import *
-from . import exceptions
-from .exceptions import *
-from . import protocol
-from .protocol import *
-from . import proxy
-from .proxy import *
-from . import service
-from .service import *
-from . import state
-from .state import *
-from . import structures
-from .structures import *
-
-__all__ = list(itertools.chain(app.__all__,
-                               codec.__all__,
-                               config.__all__,
-                               descriptors.__all__,
-                               exceptions.__all__,
-                               protocol.__all__,
-                               proxy.__all__,
-                               service.__all__,
-                               state.__all__,
-                               structures.__all__))
+from scatter.lazy import lazy_package
+
+# Public names are imported from the submodule which defines them on first use, so importing
+# the package, ex: by the command-line tools, only pays for what is actually used.
+lazy_package(__name__, {
+    'app': ('Scatter',),
+    'codec': (),
+    'config': ('Config', 'ConfigAttribute'),
+    'descriptors': ('cached', 'invalidate', 'MetaDescriptor', 'WeakAttribute'),
+    'exceptions': ('ScatterExit', 'ScatterCancel', 'ScatterTimeout', 'ServiceDependencyError'),
+    'protocol': (),
+    'proxy': ('Proxy', 'proxy_type', 'proxy_for'),
+    'service': ('Service',),
+    'state': ('InvalidTransition', 'transition', 'guard', 'StateMachine'),
+    'structures': ('Tree', 'Enum', 'ScatterDict', 'ScatterMapping', 'TopicTrie', 'AcyclicOrderedDict',
+                   'WeakValueOrderedDict'),
+})
@@ -0,0 +1,284 @@
+"""
+    scatter.bus
+    ~~~~~~~~~~~
+
+    Implements a service which delivers events to subscribers within a process.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('EventBus',)
+
+
+import collections
+import inspect
+import threading
+
+from scatter import events
+from scatter.config import ConfigAttribute
+from scatter.descriptors import cached
+from scatter.service import Service
+
+
+class EventBus(Service):
+    """
+    Service which passes events to the callbacks subscribed to their type and source.
+
+    Subscribers to an event type receive events of that type and its subclasses. They may
+    narrow that down to events about a single service, by instance or id, or about any
+    service of a class, ex: every :class: `~scatter.events.ServiceStarted` of a `Db` child.
+
+    Events are delivered synchronously by `publish` or queued by `post` and delivered in
+    batches by the bus thread. Lifecycle events of every service in the tree of the bus are
+    posted while anything subscribes to them, until the bus stops.
+
+    Subscription changes swap in a new table at once, so events being delivered see either
+    all or none of a change.
+    """
+
+    #: Set the maximum number of queued events delivered at once. Defaults to `256`.
+    batch_size = ConfigAttribute(256)
+
+    #: Set the maximum number of event type and source combinations whose subscribers are
+    #: cached, evicting others beyond that. Defaults to `1024`.
+    subscriber_cache_size = ConfigAttribute(1024)
+
+    #: Set the maximum number of queued events. Once full, posting an event drops the oldest
+    #: queued one. Defaults to `65536`.
+    queue_size = ConfigAttribute(65536)
+
+    #: Set the maximum number of seconds the bus thread waits for events before checking
+    #: the service state. Defaults to `1` second.
+    poll_timeout = ConfigAttribute(1.0)
+
+    #: Toggle delivering queued events on a dedicated thread when the service starts. Set this
+    #: to `False` to deliver them by calling :meth: `~scatter.bus.EventBus.flush` instead.
+    #: Defaults to `True`.
+    threaded = ConfigAttribute(True)
+
+    #: Thread which delivers queued events when `threaded` is set.
+    thread = None
+
+    #: Set while the bus hasn't stopped, so lifecycle events are watched if anything subscribes to them.
+    watching = True
+
+    #: Number of queued events dropped because the queue was full.
+    dropped = 0
+
+    @cached
+    def subscriptions(self):
+        """
+        Dict of subscribed callbacks keyed by event type and source, a cache of callbacks by
+        event type and source matched against it and the set of source ids subscribed to. All
+        are replaced together whenever subscriptions change.
+        """
+        return {}, {}, frozenset()
+
+    @cached
+    def lock(self):
+        """
+        Lock which serializes subscription changes.
+        """
+        return threading.Lock()
+
+    @cached
+    def queue(self):
+        """
+        Queue of posted events waiting to be delivered, holding at most `queue_size` events.
+        """
+        return collections.deque(maxlen=self.queue_size)
+
+    @cached
+    def pending(self):
+        """
+        Event set when events are posted to wake up the bus thread.
+        """
+        return threading.Event()
+
+    def subscribe(self, event_type, func, source=None):
+        """
+        Call the given function with every event of the given type, or a subclass of it,
+        about the given source.
+
+        :param event_type: Subclass of :class: `~scatter.events.Event`.
+        :param func: Callable which takes the event as its only argument.
+        :param source: (Optional) Service instance, service id or service class whose events are
+            passed. Defaults to `None` which passes events about any source.
+        """
+        key = (event_type, self._source_key(source))
+        with self.lock:
+            table = dict(self.subscriptions[0])
+            table[key] = table.get(key, ()) + (func,)
+            self._swap(table)
+
+    def unsubscribe(self, event_type, func, source=None):
+        """
+        Stop calling the given function with events of the given type and source.
+
+        :param event_type: Event type the function was subscribed with.
+        :param func: Callable previously subscribed with the event type.
+        :param source: (Optional) Source the function was subscribed with.
+        """
+        key = (event_type, self._source_key(source))
+        with self.lock:
+            table = dict(self.subscriptions[0])
+            funcs = list(table.get(key, ()))
+            funcs.remove(func)
+            if funcs:
+                table[key] = tuple(funcs)
+            else:
+                del table[key]
+            self._swap(table)
+
+    def subscribers(self, event):
+        """
+        Return a tuple of callbacks subscribed to the type and source of the given event.
+
+        :param event: :class: `~scatter.events.Event` instance.
+        """
+        source = event.source
+        table, cache, ids = self.subscriptions
+        # Sources share cache entries by class unless something subscribes to their id, so the
+        # cache doesn't grow with every service which is the source of an event.
+        source_id = getattr(source, 'id', None)
+        key = (type(event), source_id if source_id in ids else None, type(source))
+        subscribers = cache.get(key)
+        if subscribers is None:
+            subscribers = self._match(table, type(event), source)
+            if len(cache) >= self.subscriber_cache_size:
+                try:
+                    cache.popitem()
+                except KeyError:
+                    pass
+            cache[key] = subscribers
+        return subscribers
+
+    def publish(self, event):
+        """
+        Pass the given event to every subscribed callback before returning.
+
+        :param event: :class: `~scatter.events.Event` instance.
+        """
+        for func in self.subscribers(event):
+            try:
+                func(event)
+            except Exception:
+                self.log.exception('Exception raised by subscriber of {0}'.format(event))
+
+    def post(self, event):
+        """
+        Queue the given event to be delivered by the bus thread. This is safe to call from other threads.
+
+        :param event: :class: `~scatter.events.Event` instance.
+        """
+        queue = self.queue
+        if len(queue) == queue.maxlen:
+            self.dropped += 1
+        queue.append(event)
+        self.pending.set()
+
+    def flush(self):
+        """
+        Deliver every queued event in batches of up to `batch_size` events and return the number delivered.
+        """
+        queue, delivered = self.queue, 0
+        while queue:
+            batch = [queue.popleft() for _ in xrange(min(len(queue), self.batch_size))]
+            # Subscribers of consecutive events of the same type and source are only looked up once.
+            key = subscribers = None
+            for event in batch:
+                event_key = (type(event), event.source)
+                if event_key != key:
+                    key, subscribers = event_key, self.subscribers(event)
+                for func in subscribers:
+                    try:
+                        func(event)
+                    except Exception:
+                        self.log.exception('Exception raised by subscriber of {0}'.format(event))
+            delivered += len(batch)
+        return delivered
+
+    def lifecycle(self, service, event_type):
+        """
+        Post a lifecycle event of the given type if the given service is part of the tree of the bus.
+
+        :param service: Service which changed state.
+        :param event_type: Subclass of :class: `~scatter.events.ServiceEvent`.
+        """
+        # Services are initialized before being attached, so look for an indexed ancestor.
+        index, node = self.service_index, service
+        while node is not None and node.id not in index:
+            node = node.parent
+        if node is not None:
+            self.post(event_type(service))
+
+    def run(self):
+        """
+        Deliver queued events until the service is stopped.
+        """
+        while self.running() and self.thread is not False:
+            self.pending.wait(self.poll_timeout)
+            self.pending.clear()
+            self.flush()
+
+    def on_started(self, *args, **kwargs):
+        """
+        """
+        # Watch lifecycle events again if the bus is restarted.
+        if not self.watching:
+            with self.lock:
+                self.watching = True
+                self._swap(self.subscriptions[0])
+        if self.threaded:
+            self.thread = threading.Thread(target=self.run, name='{0}-events'.format(self.name))
+            self.thread.daemon = True
+            self.thread.start()
+
+    def on_stopping(self, *args, **kwargs):
+        """
+        """
+        with self.lock:
+            self.watching = False
+            events.watch_lifecycle(self, False)
+        thread, self.thread = self.thread, False
+        # Stopping an unthreaded bus a second time finds the `False` left by the first.
+        if thread:
+            self.pending.set()
+            if thread is not threading.current_thread():
+                thread.join(self.stop_timeout)
+        self.flush()
+
+    def _swap(self, table):
+        """
+        Replace the subscription table, and watch lifecycle events while anything subscribes to
+        them and the bus hasn't stopped.
+        """
+        ids = frozenset(source for _, source in table if isinstance(source, basestring))
+        self.subscriptions = (table, {}, ids)
+        watching = self.watching and any(events.is_lifecycle_type(event_type) for event_type, _ in table)
+        events.watch_lifecycle(self, watching)
+
+    @staticmethod
+    def _source_key(source):
+        """
+        Return the key of subscriptions to events about the given source.
+        """
+        if source is None or isinstance(source, basestring) or inspect.isclass(source):
+            return source
+        return source.id
+
+    @staticmethod
+    def _match(table, event_type, source):
+        """
+        Return a tuple of callbacks in the given table subscribed to events of the given type and source.
+        """
+        sources = [None]
+        if source is not None:
+            sources.append(getattr(source, 'id', None))
+            sources.extend(inspect.getmro(type(source)))
+
+        subscribers = []
+        for cls in inspect.getmro(event_type):
+            for key in sources:
+                subscribers.extend(table.get((cls, key), ()))
+        return tuple(subscribers)
@@ -61,7 +61,35 @@ class ConfigAttribute(MetaDescriptor):
 class Config(ScatterDict):
     """
     Collection of service configuration values.
+
+    Every key has a revision which is bumped whenever its value changes, so values computed from
+    it, ex: :func: `~scatter.descriptors.cached` attributes with `depends`, know they are stale.
+    Setting a key to an equal value, as reloading an unchanged config file does, keeps its revision.
     """
+
+    def __init__(self, *args, **kwargs):
+        self.revisions = {}
+        super(Config, self).__init__(*args, **kwargs)
+
+    def __setitem__(self, key, value):
+        key = self.transform(key)
+        if key not in self.store or self.store[key] != value:
+            self.revisions[key] = self.revisions.get(key, 0) + 1
+        self.store[key] = value
+
+    def __delitem__(self, key):
+        key = self.transform(key)
+        del self.store[key]
+        self.revisions[key] = self.revisions.get(key, 0) + 1
+
+    def revision(self, key):
+        """
+        Return the number of times the value of the given key has changed.
+
+        :param key: Config key, ex: `CODEC_CLASS` or `codec_class`.
+        """
+        return self.revisions.get(self.transform(key), 0)
+
     def filter(self, key):
         return key.isupper()
 
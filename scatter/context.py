@@ -7,21 +7,77 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ('ProcessContext',)
+__all__ = ('ProcessContext', 'AppContext')
 
 
-from scatter.globals import app_ctx_stack
+from scatter.globals import app_ctx_stack, process_ctx_stack
 
 
 class Context(object):
     """
+    Object which is pushed onto a context local stack while it is entered, making it current
+    in the thread, greenlet or asyncio task which entered it.
     """
-    pass
 
+    #: :class: `~scatter.local.LocalStack` this context is pushed onto.
+    stack = None
 
-class ProcessContext(object):
+    def push(self):
+        """
+        Make this context current until it is popped.
+        """
+        self.stack.push(self)
+
+    def pop(self):
+        """
+        Restore the context which was current before this one was pushed.
+        """
+        popped = self.stack.pop()
+        if popped is not self:
+            raise RuntimeError('Popped wrong context {0} instead of {1}'.format(popped, self))
+
+    def __enter__(self):
+        self.push()
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.pop()
+
+
+class ProcessContext(Context):
     """
+    Context which makes the given process available as :data: `~scatter.globals.process`.
     """
 
+    stack = process_ctx_stack
+
     def __init__(self, process):
-        self.process = process
\ No newline at end of file
+        self.process = process
+
+
+class AppContext(Context):
+    """
+    Context which makes the given service available as :data: `~scatter.globals.app`, and
+    its process as :data: `~scatter.globals.process` if it isn't current already.
+    """
+
+    stack = app_ctx_stack
+
+    def __init__(self, app, process=None):
+        self.app = app
+        self.process_ctx = ProcessContext(process) if process is not None else None
+        #: Whether each nested push of this context also pushed its process context.
+        self.pushed_process = []
+
+    def push(self):
+        top = self.process_ctx.stack.top if self.process_ctx is not None else None
+        pushed = self.process_ctx is not None and (top is None or top.process is not self.process_ctx.process)
+        if pushed:
+            self.process_ctx.push()
+        self.pushed_process.append(pushed)
+        super(AppContext, self).push()
+
+    def pop(self):
+        super(AppContext, self).pop()
+        if self.pushed_process.pop():
+            self.process_ctx.pop()
@@ -7,11 +7,14 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ('cached', 'MetaDescriptor')
+__all__ = ('cached', 'invalidate', 'MetaDescriptor', 'WeakAttribute')
 
 
 import abc
 import functools
+import threading
+import time
+import weakref
 
 
 class BaseDescriptor(object):
@@ -30,8 +33,49 @@ class MetaDescriptor(BaseDescriptor):
     __name__ = None
 
 
+class WeakAttribute(MetaDescriptor):
+    """
+    Data descriptor which holds its value by weak reference, so objects which refer back to
+    their owner don't form reference cycles. Reads return `None` once the value has been collected.
+
+    :param name: (Optional) Name of the attribute. Defaults to the name it is tagged with
+        by :class: `~scatter.service.ServiceMeta`.
+    """
+
+    def __init__(self, name=None):
+        self.__name__ = name
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        ref = instance.__dict__.get(self.__name__)
+        return ref() if ref is not None else None
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.__name__] = weakref.ref(value) if value is not None else None
+
+    def __delete__(self, instance):
+        instance.__dict__.pop(self.__name__, None)
+
+
+#: Name of the instance dict entry which holds the lock of a cached attribute while it is computed.
+CACHED_LOCK_NAME = '__cached_lock_{0}__'
+
+
+def cached_lock(instance, name):
+    """
+    Return the lock which serializes evaluation of the cached attribute of the given instance with
+    the given name. Every attribute has a lock of its own, so a method which reads cached attributes
+    of other objects never waits on a lock held by an unrelated evaluation, which could deadlock.
+    """
+    return instance.__dict__.setdefault(CACHED_LOCK_NAME.format(name), threading.RLock())
+
+
 class CachedProperty(BaseDescriptor):
     """
+    Non-data descriptor which calls the wrapped method on first access and stores its result in
+    the instance dict, so later accesses never reach the descriptor. Threads racing on the first
+    access wait for a single call. The value may be reassigned, or deleted to compute it again.
     """
 
     def __init__(self, func):
@@ -41,7 +85,118 @@ class CachedProperty(BaseDescriptor):
     def __get__(self, instance, owner=None):
         if instance is None:
             return self
-        result = instance.__dict__[self.func.__name__] = self.func(instance)
-        return result
+        name = self.func.__name__
+        lock = cached_lock(instance, name)
+        with lock:
+            try:
+                return instance.__dict__[name]
+            except KeyError:
+                result = instance.__dict__[name] = self.func(instance)
+                # Threads still waiting on the lock find the value once they hold it, so it's no longer needed.
+                if instance.__dict__.get(CACHED_LOCK_NAME.format(name)) is lock:
+                    del instance.__dict__[CACHED_LOCK_NAME.format(name)]
+                return result
+
+
+class CachedValue(object):
+    """
+    Value of an :class: `~scatter.descriptors.ExpiringCachedProperty` along with its expiry
+    and the revisions of the config keys it was computed from.
+    """
+
+    __slots__ = ('value', 'expires', 'revisions')
+
+    def __init__(self, value, expires, revisions):
+        self.value = value
+        self.expires = expires
+        self.revisions = revisions
+
+
+class ExpiringCachedProperty(CachedProperty):
+    """
+    Data descriptor which caches the result of the wrapped method like :class: `~scatter.descriptors.CachedProperty`
+    until `ttl` seconds have passed or any config key it `depends` on has changed, checked on access.
+    """
+
+    def __init__(self, func, ttl=None, depends=()):
+        super(ExpiringCachedProperty, self).__init__(func)
+        self.ttl = ttl
+        self.depends = tuple(depends)
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        entry = instance.__dict__.get(self.func.__name__)
+        if entry is not None and self.fresh(instance, entry):
+            return entry.value
+
+        with cached_lock(instance, self.func.__name__):
+            entry = instance.__dict__.get(self.func.__name__)
+            if entry is None or not self.fresh(instance, entry):
+                # Revisions are read ahead of the call so changes made during it aren't missed.
+                revisions = self.revisions(instance)
+                entry = CachedValue(self.func(instance), self.expiry(), revisions)
+                instance.__dict__[self.func.__name__] = entry
+            return entry.value
+
+    def __set__(self, instance, value):
+        instance.__dict__[self.func.__name__] = CachedValue(value, self.expiry(), self.revisions(instance))
+
+    def __delete__(self, instance):
+        instance.__dict__.pop(self.func.__name__, None)
+
+    def expiry(self):
+        return time.time() + self.ttl if self.ttl is not None else None
+
+    def revisions(self, instance):
+        """
+        Return a tuple of the current revisions of the config keys this value depends on.
+        """
+        if not self.depends:
+            return ()
+        config = instance.config
+        return tuple(config.revision(key) for key in self.depends)
 
-cached = CachedProperty
+    def fresh(self, instance, entry):
+        """
+        Returns `True` if the given cached value has neither expired nor been computed from stale config.
+        """
+        if entry.expires is not None and entry.expires <= time.time():
+            return False
+        return entry.revisions == self.revisions(instance)
+
+
+def cached(func=None, ttl=None, depends=()):
+    """
+    Decorate a method to compute its result once, on first access, and cache it as an attribute.
+
+    ..example::
+        class MyService(Service):
+            codec_class = ConfigAttribute('scatter.codec.JsonCodec')
+
+            @cached(depends=('codec_class',))
+            def codec(self):
+                return import_from(self.codec_class)()
+
+    :param func: Method to cache the result of.
+    :param ttl: (Optional) Number of seconds the result is cached for. Defaults to forever.
+    :param depends: (Optional) Names of the config keys the result is computed from. Changing any
+        of them, ex: by an incremental reload, computes the result again on next access.
+    """
+    if func is None:
+        return functools.partial(cached, ttl=ttl, depends=depends)
+    if ttl is None and not depends:
+        return CachedProperty(func)
+    return ExpiringCachedProperty(func, ttl, depends)
+
+
+def invalidate(instance, *names):
+    """
+    Drop the cached values of the given attribute names so they are computed again on next access.
+
+    :param instance: Object which holds the cached values.
+    :param names: Names of :func: `~scatter.descriptors.cached` attributes.
+    """
+    for name in names:
+        with cached_lock(instance, name):
+            instance.__dict__.pop(name, None)
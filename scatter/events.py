@@ -0,0 +1,109 @@
+"""
+    scatter.events
+    ~~~~~~~~~~~~~~
+
+    Implements events published through an :class: `~scatter.bus.EventBus`, including the
+    lifecycle events emitted by services as they change state.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('Event', 'ServiceEvent', 'ServiceInitialized', 'ServiceStarted', 'ServiceStopped',
+           'ServiceReloaded', 'emit')
+
+
+import threading
+import time
+import weakref
+
+
+class Event(object):
+    """
+    Base class of events. Subscribers to an event type receive events of that type and of
+    all of its subclasses.
+
+    :param source: (Optional) Service which the event is about.
+    :param attributes: (Optional) Attributes which describe the event.
+    """
+
+    def __init__(self, source=None, **attributes):
+        self.__dict__.update(attributes)
+        self.source = source
+        self.timestamp = time.time()
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.source)
+
+
+class ServiceEvent(Event):
+    """
+    Base class of events emitted by the state machine of a service once it has changed state.
+    """
+
+
+class ServiceInitialized(ServiceEvent):
+    """
+    Emitted once a service is initialized.
+    """
+
+
+class ServiceStarted(ServiceEvent):
+    """
+    Emitted once a service is started.
+    """
+
+
+class ServiceStopped(ServiceEvent):
+    """
+    Emitted once a service is stopped.
+    """
+
+
+class ServiceReloaded(ServiceEvent):
+    """
+    Emitted once a service is reloaded.
+    """
+
+
+#: Weak references to buses which have subscribers to lifecycle events. State machines only
+#: create lifecycle events while this isn't empty, so they cost nothing when nobody listens.
+LIFECYCLE_BUSES = ()
+
+#: Lock which serializes changes to `LIFECYCLE_BUSES`.
+LIFECYCLE_LOCK = threading.Lock()
+
+
+def is_lifecycle_type(event_type):
+    """
+    Returns `True` if subscribers to the given event type receive lifecycle events.
+    """
+    return issubclass(event_type, ServiceEvent) or issubclass(ServiceEvent, event_type)
+
+
+def watch_lifecycle(bus, watching=True):
+    """
+    Start or stop passing lifecycle events to the given bus.
+
+    :param bus: :class: `~scatter.bus.EventBus` instance.
+    :param watching: (Optional) Pass `False` to stop passing events. Defaults to `True`.
+    """
+    global LIFECYCLE_BUSES
+    with LIFECYCLE_LOCK:
+        buses = tuple(ref for ref in LIFECYCLE_BUSES if ref() not in (None, bus))
+        if watching:
+            buses += (weakref.ref(bus),)
+        LIFECYCLE_BUSES = buses
+
+
+def emit(service, event_type):
+    """
+    Pass a lifecycle event of the given type about the given service to every bus which
+    watches lifecycle events.
+
+    :param service: Service which changed state.
+    :param event_type: Subclass of :class: `~scatter.events.ServiceEvent`.
+    """
+    for ref in LIFECYCLE_BUSES:
+        bus = ref()
+        if bus is not None:
+            bus.lifecycle(service, event_type)
@@ -7,7 +7,20 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ()
+__all__ = ('process_ctx_stack', 'app_ctx_stack', 'process', 'app')
 
 
-process = None
\ No newline at end of file
+from scatter.local import LocalStack
+
+
+#: Stack of :class: `~scatter.context.ProcessContext` instances pushed in the current context.
+process_ctx_stack = LocalStack()
+
+#: Stack of :class: `~scatter.context.AppContext` instances pushed in the current context.
+app_ctx_stack = LocalStack()
+
+#: Proxy to the process of the current process context.
+process = process_ctx_stack('process')
+
+#: Proxy to the service of the current app context.
+app = app_ctx_stack('app')
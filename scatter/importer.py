@@ -7,23 +7,39 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ('import_from', 'PackageImporter', 'ExtensionImporter')
+__all__ = ('import_from', 'invalidate_imports', 'PackageImporter', 'ExtensionPackage', 'ExtensionImporter')
 
 
 import importlib
 import inspect
+import json
 import os
-import pkg_resources
 import sys
 
 from scatter.descriptors import cached
 
 
+#: Suffixes of the metadata directories of installed distributions.
+DIST_SUFFIXES = ('.dist-info', '.egg-info')
+
+
+#: Objects resolved by :func: `~scatter.importer.import_from` keyed by their fully qualified name.
+#: Names which failed to import silently are kept as `IMPORT_MISS`.
+IMPORT_CACHE = {}
+
+#: Marks names in the import cache which failed to import.
+IMPORT_MISS = object()
+
+
 def import_from(obj, silent=False):
     """
     Import a module/class from the given object. Expected to be a fully qualified
     string to import from or a Class object.
 
+    Resolved objects are cached for the life of the process, as are names which failed to
+    import with `silent` set. Call :func: `~scatter.importer.invalidate_imports` after reloading
+    modules or installing packages.
+
     :param obj: String which represents a fully qualified type to import.
     :param silent: Flag to indicate if we should re-raise any ImportError.
     :return:
@@ -33,26 +49,111 @@ def import_from(obj, silent=False):
 
     obj = str(obj)
 
-    try:
-        # No import hierarchy, importing a top level module.
-        if '.' not in obj:
-            return importlib.import_module(obj)
+    resolved = IMPORT_CACHE.get(obj)
+    if resolved is not None:
+        if resolved is not IMPORT_MISS:
+            return resolved
+        # Import again when not silent so the caller gets the actual error.
+        if silent:
+            return None
 
-        # Import module and return specified attribute.
-        mod, cls = obj.rsplit('.', 1)
-        module = importlib.import_module(mod)
-        try:
-            return getattr(module, cls)
-        except AttributeError:
-            raise ImportError('{0} not found'.format(obj))
+    try:
+        resolved = _import(obj)
     except ImportError:
         if not silent:
             raise
+        IMPORT_CACHE[obj] = IMPORT_MISS
+        return None
+
+    IMPORT_CACHE[obj] = resolved
+    return resolved
+
+
+def invalidate_imports(prefix=None):
+    """
+    Drop cached imports so they are resolved again on next use. Negative entries are dropped too.
+
+    :param prefix: (Optional) Module or package name whose cached imports, and those of every module
+        below it, are dropped. Defaults to `None` which drops every cached import.
+    """
+    if prefix is None:
+        IMPORT_CACHE.clear()
+        return
+    below = prefix + '.'
+    for name in [n for n in IMPORT_CACHE.keys() if n == prefix or n.startswith(below)]:
+        IMPORT_CACHE.pop(name, None)
+
+
+def _import(obj):
+    """
+    Import the object of the given fully qualified name, bypassing the import cache.
+    """
+    # No import hierarchy, importing a top level module.
+    if '.' not in obj:
+        return importlib.import_module(obj)
+
+    # Import module and return specified attribute.
+    mod, cls = obj.rsplit('.', 1)
+    module = importlib.import_module(mod)
+    try:
+        return getattr(module, cls)
+    except AttributeError:
+        raise ImportError('{0} not found'.format(obj))
+
+
+class ExtensionPackage(object):
+    """
+    Extension package advertised by the entry point of an installed distribution. The package
+    isn't imported until it is first used.
+    """
+
+    def __init__(self, project_name, value, enabled_name='ENABLED'):
+        """
+        :param project_name: Name of the distribution which provides the package.
+        :param value: Entry point value, ex: `scatter_foo` or `scatter_foo.ext:package`.
+        :param enabled_name: Name of the attribute the package must expose to be enabled.
+        """
+        self.project_name = project_name
+        self.value = value
+        self.enabled_name = enabled_name
+
+    def __repr__(self):
+        return '<{0}: {1} ({2})>'.format(self.__class__.__name__, self.value, self.project_name)
+
+    @cached
+    def package(self):
+        """
+        Imported extension package.
+        """
+        return import_from(self.value.replace(':', '.'))
+
+    @property
+    def loaded(self):
+        return 'package' in self.__dict__
+
+    @property
+    def enabled(self):
+        """
+        Import the package, if it isn't yet, and return its enabled status.
+        """
+        enabled = getattr(self.package, self.enabled_name, None)
+
+        # Extension packages must expose an attribute to inform us of enabled/disabled status.
+        if enabled is None:
+            msg = 'Extension package {0} must expose {1} attribute to be enabled.'
+            raise ImportError(msg.format(self.project_name, self.enabled_name))
+        return bool(enabled)
 
 
 class PackageImporter(object):
     """
+    Discovers extension packages of installed distributions whose names start with `ext_prefix`
+    and export an entry point named `ext`.
 
+    Distributions are found by listing the metadata directories on `sys.path` and reading their
+    entry points with `importlib.metadata`, or `pkg_resources` when it isn't installed. With an
+    `index_path` set, the result is saved to that index file, which is used as long as no `sys.path`
+    directory and no metadata directory of a discovered distribution has been modified since.
     """
 
     #:
@@ -63,55 +164,180 @@ class PackageImporter(object):
     #:
     entry_enabled_name = 'ENABLED'
 
-    def __init__(self, service, ext_prefix='scatter'):
+    #: Path of the entry point index file. Defaults to `None` which scans distributions on every start.
+    index_path = None
+
+    def __init__(self, service, ext_prefix='scatter', index_path=None):
         self.service = service
         self.ext_prefix = ext_prefix
+        if index_path is not None:
+            self.index_path = index_path
 
     @cached
     def entry_points(self):
         """
+        List of :class: `~scatter.importer.ExtensionPackage` instances of installed distributions.
         """
-        def _iter_entry_points():
-            """
-            Helper function which yields back valid scatter extension packages. A valid package matches
-            the set `ext_prefix` and exports an entry_point in its `setup.py` named `package`. The
-            `package` value should be the fully qualified type string it should be imported under.
-            Ex: `scatter.ext.my_extension`
-            """
-            for dist in (d for d in pkg_resources.working_set if d.project_name.startswith(self.ext_prefix)):
-                for entry_point in dist.get_entry_map(None).values():
-                    package = entry_point.get(self.entry_name)
-                    if package is None:
-                        msg = 'Extension package {0} is missing entry point.'.format(dist.project_name)
-                        self.service.log.warning(msg)
-                        continue
-                    yield package
+        key = self.index_key()
+        records = self.read_index(key)
+        if records is None:
+            records = self.scan()
+            self.write_index(key, records)
 
-        return list(_iter_entry_points())
+        return [ExtensionPackage(r['project_name'], r['value'], self.entry_enabled_name) for r in records]
 
-    def load(self, silent=False):
+    def extension(self, project_name):
         """
+        Return the extension package of the given distribution, importing it on first use, or
+        `None` if it isn't installed or is disabled.
+
+        :param project_name: Name of the distribution which provides the package.
         """
         for package in self.entry_points:
-            package_name = package.dist.project_name
+            if package.project_name == project_name:
+                return package.package if self._load(package) else None
+        return None
+
+    def load(self, silent=False, lazy=True):
+        """
+        Discover installed extension packages, importing them all unless `lazy` is set.
+
+        :param silent: (Optional) Log, rather than raise, packages which fail to import.
+        :param lazy: (Optional) Leave packages to be imported on first use. Defaults to `True`.
+        """
+        packages = self.entry_points
+        if lazy:
+            self.service.log.info('Found {0} extension packages'.format(len(packages)))
+            return
+
+        for package in packages:
             try:
-                # Attempt to load our extension package and check its status.
-                imported = package.load()
-                enabled = getattr(imported, self.entry_enabled_name, None)
-
-                # Extension packages must expose an attribute to inform us of enabled/disabled status.
-                if enabled is None:
-                    msg = 'Extension package {0} must expose {1} attribute to be enabled.'
-                    raise ImportError(msg.format(package_name, self.entry_enabled_name))
-
-                # Extension package successfully loaded and has valid entry point.
-                enabled = bool(enabled)
-                msg = 'Extension package {0} is {1}'.format(package_name, 'enabled' if enabled else 'disabled')
-                self.service.log.info(msg)
+                self._load(package)
             except ImportError:
                 if not silent:
                     raise
 
+    def scan(self):
+        """
+        Return a list of the entry points of installed extension distributions, as dicts of the
+        distribution name, entry point value and path and modification time of its metadata.
+        """
+        # Only needed on a cold index, so the import is deferred until then.
+        try:
+            from importlib import metadata
+        except ImportError:
+            try:
+                import importlib_metadata as metadata
+            except ImportError:
+                return self._scan_pkg_resources()
+
+        records, seen = [], set()
+        for entry in sys.path:
+            directory = entry or os.curdir
+            try:
+                names = os.listdir(directory)
+            except OSError:
+                continue
+
+            for name in sorted(names):
+                if not name.endswith(DIST_SUFFIXES) or not name.startswith(self.ext_prefix):
+                    continue
+                path = os.path.join(directory, name)
+                dist = metadata.Distribution.at(path)
+                project_name = dist.metadata['Name']
+                # Distributions earlier on the path shadow later ones, just like their packages.
+                if not project_name or project_name in seen:
+                    continue
+                seen.add(project_name)
+
+                values = [ep.value for ep in dist.entry_points if ep.name == self.entry_name]
+                if not values:
+                    self.service.log.warning('Extension package {0} is missing entry point.'.format(project_name))
+                for value in values:
+                    records.append(dict(project_name=project_name, value=value, path=path,
+                                        mtime=os.stat(path).st_mtime))
+        return records
+
+    def index_key(self):
+        """
+        Return a list of every `sys.path` entry and its modification time, which changes whenever
+        a distribution is installed into or removed from it.
+        """
+        key = []
+        for entry in sys.path:
+            try:
+                key.append([entry, os.stat(entry or os.curdir).st_mtime])
+            except OSError:
+                key.append([entry, None])
+        return key
+
+    def read_index(self, key):
+        """
+        Return the entry points saved in the index file if it was written for the given key and
+        none of the discovered distributions has changed since, otherwise `None`.
+        """
+        if self.index_path is None:
+            return None
+        try:
+            with open(self.index_path) as f:
+                index = json.load(f)
+        except (IOError, ValueError):
+            return None
+
+        if index.get('key') != key or index.get('prefix') != self.ext_prefix or index.get('entry') != self.entry_name:
+            return None
+        for record in index['records']:
+            try:
+                if os.stat(record['path']).st_mtime != record['mtime']:
+                    return None
+            except OSError:
+                return None
+        return index['records']
+
+    def write_index(self, key, records):
+        """
+        Save the given entry points to the index file, replacing it atomically.
+        """
+        if self.index_path is None:
+            return
+        index = dict(key=key, prefix=self.ext_prefix, entry=self.entry_name, records=records)
+        try:
+            directory = os.path.dirname(self.index_path)
+            if directory and not os.path.isdir(directory):
+                os.makedirs(directory)
+            path = '{0}.{1}'.format(self.index_path, os.getpid())
+            with open(path, 'w') as f:
+                json.dump(index, f)
+            os.rename(path, self.index_path)
+        except (IOError, OSError) as e:
+            self.service.log.warning('Unable to save entry point index to {0}. {1}'.format(self.index_path, e))
+
+    def _scan_pkg_resources(self):
+        import pkg_resources
+
+        records = []
+        for dist in (d for d in pkg_resources.working_set if d.project_name.startswith(self.ext_prefix)):
+            entry_points = [ep for group in dist.get_entry_map(None).values() for ep in group.values()
+                            if ep.name == self.entry_name]
+            if not entry_points:
+                self.service.log.warning('Extension package {0} is missing entry point.'.format(dist.project_name))
+            for entry_point in entry_points:
+                value = entry_point.module_name
+                if entry_point.attrs:
+                    value = '{0}:{1}'.format(value, '.'.join(entry_point.attrs))
+                path = dist.egg_info or dist.location
+                records.append(dict(project_name=dist.project_name, value=value, path=path,
+                                    mtime=os.stat(path).st_mtime))
+        return records
+
+    def _load(self, package):
+        first = not package.loaded
+        enabled = package.enabled
+        if first:
+            msg = 'Extension package {0} is {1}'.format(package.project_name, 'enabled' if enabled else 'disabled')
+            self.service.log.info(msg)
+        return enabled
+
 
 class ExtensionImporter(object):
     """
@@ -0,0 +1,153 @@
+"""
+    scatter.index
+    ~~~~~~~~~~~~~
+
+    Implements an index of every service in a service tree by id and path.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('ServiceIndex', 'PATH_SEP')
+
+
+import fnmatch
+import threading
+import weakref
+
+from scatter.descriptors import WeakAttribute
+
+
+#: Separates the names of services in a path.
+PATH_SEP = '/'
+
+#: Path segment which matches any number of segments in a glob pattern.
+GLOB_ANY = '**'
+
+
+class ServiceIndex(object):
+    """
+    Index of every service attached to the tree of a root service by `id` and by path.
+
+    The path of a service is the names of it and its ancestors separated by `/`, ex: `/process/app/db`.
+    Siblings which share a name are told apart by a `~n` suffix in the order they were indexed.
+    Services are added and removed by :meth: `~scatter.service.Service.attach` and
+    :meth: `~scatter.service.Service.detach`, so detached services are never returned.
+
+    The index is kept by the root service, whose tree owns the services, so it only holds
+    them weakly.
+    """
+
+    #: Service at the root of the indexed tree.
+    root = WeakAttribute('root')
+
+    def __init__(self, root):
+        self.root = root
+        self.services = weakref.WeakValueDictionary()
+        self.ids = {}
+        self.paths = {}
+        self.lock = threading.RLock()
+        self.add(root)
+
+    def __len__(self):
+        return len(self.services)
+
+    def __contains__(self, service):
+        return getattr(service, 'id', service) in self.services
+
+    def __iter__(self):
+        return iter(self.services.values())
+
+    def add(self, service, parent=None):
+        """
+        Index the given service and all of its children.
+
+        :param service: Service instance to index.
+        :param parent: (Optional) Indexed parent of the service. Defaults to the root of the tree.
+        """
+        with self.lock:
+            prefix = self.path(parent) if parent is not None else ''
+            path = base = '{0}{1}{2}'.format(prefix, PATH_SEP, service.name)
+            count = 1
+            while path in self.paths and self.paths[path] != service.id:
+                count += 1
+                path = '{0}~{1}'.format(base, count)
+            self.services[service.id] = service
+            self.ids[service.id] = path
+            self.paths[path] = service.id
+            for child in service.services.all():
+                self.add(child, service)
+
+    def remove(self, service):
+        """
+        Drop the given service and all of its children from the index.
+
+        :param service: Service instance to drop.
+        """
+        with self.lock:
+            path = self.ids.pop(service.id, None)
+            if path is None:
+                return
+            self.services.pop(service.id, None)
+            self.paths.pop(path, None)
+            for child in service.services.all():
+                self.remove(child)
+
+    def get(self, id, default=None):
+        """
+        Return the service with the given id.
+
+        :param id: Id of the service.
+        :param default: (Optional) Value returned when no service has the id. Defaults to `None`.
+        """
+        return self.services.get(id, default)
+
+    def lookup(self, path, default=None):
+        """
+        Return the service at the given path.
+
+        :param path: Absolute path of the service, ex: `/process/app/db`.
+        :param default: (Optional) Value returned when no service has the path. Defaults to `None`.
+        """
+        id = self.paths.get(path.rstrip(PATH_SEP) or PATH_SEP)
+        return default if id is None else self.services.get(id, default)
+
+    def path(self, service):
+        """
+        Return the path of the given service.
+
+        :param service: Service instance or id.
+        """
+        path = self.ids.get(getattr(service, 'id', service))
+        if path is None:
+            raise KeyError('{0} is not indexed'.format(service))
+        return path
+
+    def glob(self, pattern):
+        """
+        Return a list of services whose path matches the given pattern, sorted by path.
+
+        Each segment of the pattern is matched against one segment of the path with :mod: `fnmatch`
+        syntax, ex: `/process/*/db`. A `**` segment matches any number of segments.
+
+        :param pattern: Absolute path pattern.
+        """
+        if not any(c in pattern for c in '*?['):
+            service = self.lookup(pattern)
+            return [] if service is None else [service]
+
+        parts = pattern.strip(PATH_SEP).split(PATH_SEP)
+        paths = sorted(self.paths.items())
+        services = (self.services.get(id) for path, id in paths if match(path.strip(PATH_SEP).split(PATH_SEP), parts))
+        return [service for service in services if service is not None]
+
+
+def match(segments, parts):
+    """
+    Returns `True` if the given path segments match the given pattern segments.
+    """
+    if not parts:
+        return not segments
+    part = parts[0]
+    if part == GLOB_ANY:
+        return any(match(segments[i:], parts[1:]) for i in xrange(len(segments) + 1))
+    return bool(segments) and fnmatch.fnmatchcase(segments[0], part) and match(segments[1:], parts[1:])
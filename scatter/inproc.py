@@ -0,0 +1,249 @@
+"""
+    scatter.inproc
+    ~~~~~~~~~~~~~~
+
+    Implements streams between services within the same process which hand over
+    message objects by reference instead of encoding them.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('InprocStream',)
+
+
+import collections
+import copy
+import errno
+import socket
+import threading
+
+from scatter.stream import Stream
+from scatter.transport import parse_address
+
+
+class InprocStream(Stream):
+    """
+    Stream addressed as `inproc://name` which passes messages to its peer through a lock-free
+    queue without encoding them. Message objects are shared by reference unless the stream
+    is created with `copy=True`, which sends a deep copy of each one instead.
+
+    Delivery happens on the reactor thread of the receiving stream when it has one, otherwise
+    on the thread of the sender.
+    """
+
+    #: Address scheme of this stream type.
+    scheme = 'inproc'
+
+    #: Messages are passed as objects, so the protocol skips encoding/decoding them.
+    encoded = False
+
+    #: Codec used to encode/decode messages of this stream. Unused.
+    codec = None
+
+    #: Listening streams keyed by the name they are bound to.
+    endpoints = {}
+
+    #: Lock which guards binding and connecting by name.
+    endpoints_lock = threading.Lock()
+
+    def __init__(self, reactor=None, address=None, copy=False):
+        super(InprocStream, self).__init__(self)
+        self.reactor = reactor
+        self.address = address
+        self.copy = copy
+        self.peer = None
+        self.listening = False
+        self.connected = False
+        self.closed = False
+        self.reading = True
+        self.inbox = collections.deque()
+        self.draining = False
+        self.draining_lock = threading.Lock()
+        self.accept_callbacks = []
+        self.recv_callbacks = []
+        self.send_callbacks = []
+        self.close_callbacks = []
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.address)
+
+    @classmethod
+    def create(cls, reactor=None, copy=False):
+        """
+        Create a new, unconnected stream.
+
+        :param reactor: (Optional) :class: `~scatter.reactor.Reactor` whose thread receives messages.
+        :param copy: (Optional) Send deep copies of messages instead of references. Defaults to `False`.
+        """
+        return cls(reactor, copy=copy)
+
+    @property
+    def socket_type(self):
+        return self.scheme
+
+    def on_accept(self, func):
+        self.accept_callbacks.append(func)
+
+    def on_send(self, func):
+        self.send_callbacks.append(func)
+
+    def on_recv(self, func):
+        self.recv_callbacks.append(func)
+
+    def on_close(self, func):
+        self.close_callbacks.append(func)
+
+    def on_drain(self, func):
+        pass
+
+    def writable(self):
+        """
+        Always `True` since messages are handed to the peer without buffering them.
+        """
+        return True
+
+    def pause_reading(self):
+        """
+        Stop delivering received messages, leaving them queued until reading is resumed.
+        """
+        self.reading = False
+
+    def resume_reading(self):
+        """
+        Deliver queued messages again after :meth: `~scatter.inproc.InprocStream.pause_reading`.
+        """
+        if not self.reading:
+            self.reading = True
+            self.schedule()
+
+    def occupancy(self):
+        """
+        Dict of the number of messages currently queued by this stream.
+        """
+        return dict(inbox=len(self.inbox), outbox=0, outbox_bytes=0, read_buffer=0,
+                    reading=self.reading, writable=True)
+
+    def bind(self, address):
+        """
+        Start accepting connections to the given name.
+
+        :param address: Address string in `inproc://name` form.
+        """
+        _, name = parse_address(address)
+        with self.endpoints_lock:
+            if name in self.endpoints:
+                raise socket.error(errno.EADDRINUSE, 'Address {0} already in use'.format(address))
+            self.endpoints[name] = self
+        self.address = address
+        self.listening = True
+
+    def connect(self, address):
+        """
+        Connect to the stream bound to the given name.
+
+        :param address: Address string in `inproc://name` form.
+        """
+        _, name = parse_address(address)
+        with self.endpoints_lock:
+            listener = self.endpoints.get(name)
+        if listener is None:
+            raise socket.error(errno.ECONNREFUSED, 'Nothing bound to {0}'.format(address))
+
+        peer = type(self)(listener.reactor, address, listener.copy)
+        self.address = address
+        self.peer, peer.peer = peer, self
+        self.connected = peer.connected = True
+
+        for callback in listener.accept_callbacks:
+            callback(listener, peer)
+
+    def send(self, msg):
+        """
+        Hand the given message to the peer stream. This is safe to call from any thread.
+
+        :param msg: Message object.
+        """
+        peer = self.peer
+        if self.closed or peer is None or peer.closed:
+            raise socket.error(errno.EPIPE, 'Stream is closed')
+
+        if self.copy:
+            msg = copy.deepcopy(msg)
+        peer.inbox.append(msg)
+        peer.schedule()
+
+        for callback in self.send_callbacks:
+            callback(self, msg)
+
+    def flush(self):
+        """
+        Messages are handed to the peer as they are sent, so there is never anything to flush.
+        """
+        pass
+
+    def recv(self):
+        """
+        Return the next received message which was not consumed by `on_recv` callbacks,
+        or `None` if there are none.
+        """
+        try:
+            return self.inbox.popleft()
+        except IndexError:
+            return None
+
+    def close(self):
+        """
+        Close the stream, its peer and notify all `on_close` callbacks.
+        """
+        if self.closed:
+            return
+        self.closed = True
+
+        if self.listening:
+            _, name = parse_address(self.address)
+            with self.endpoints_lock:
+                if self.endpoints.get(name) is self:
+                    del self.endpoints[name]
+
+        peer, self.peer = self.peer, None
+        if peer is not None:
+            peer.close()
+
+        for callback in self.close_callbacks:
+            callback(self)
+
+    def schedule(self):
+        """
+        Deliver queued messages on the thread which owns this stream.
+        """
+        if self.reactor is None or self.reactor.in_reactor():
+            self.drain()
+        else:
+            self.reactor.call_soon(self.drain)
+
+    def drain(self):
+        """
+        Pass all queued messages to the `on_recv` callbacks. Messages stay queued for
+        :meth: `~scatter.inproc.InprocStream.recv` when there are no callbacks. This is safe
+        to call from any thread; only one thread delivers messages at a time, in order.
+        """
+        inbox = self.inbox
+        while True:
+            # Messages sent from within a callback, or by other threads, are delivered by the
+            # drain already in progress.
+            with self.draining_lock:
+                if self.draining or not self.recv_callbacks:
+                    return
+                self.draining = True
+            try:
+                while inbox and self.reading:
+                    msg = inbox.popleft()
+                    for callback in self.recv_callbacks:
+                        callback(self, msg)
+            finally:
+                with self.draining_lock:
+                    self.draining = False
+
+            # A message queued as the loop above finished saw it still draining, so deliver it now.
+            if not (inbox and self.reading):
+                return
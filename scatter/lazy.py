@@ -0,0 +1,76 @@
+"""
+    scatter.lazy
+    ~~~~~~~~~~~~
+
+    Implements packages which import the submodules defining their public names on first use.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('LazyModule', 'lazy_package')
+
+
+import importlib
+import sys
+import types
+
+
+class LazyModule(types.ModuleType):
+    """
+    Module which imports the submodule defining one of its public names the first time the name
+    is used, then keeps it as a regular attribute so later uses cost a plain attribute lookup.
+
+    Submodules named in `exports` are imported on first use as well, ex: `scatter.service`.
+    """
+
+    def __init__(self, name, exports, attrs=None):
+        """
+        :param name: Fully qualified name of the package.
+        :param exports: Dict of the public names defined by each submodule keyed by its name.
+        :param attrs: (Optional) Dict of attributes of the package, ex: its `__file__` and `__path__`.
+        """
+        super(LazyModule, self).__init__(name)
+        self.__dict__.update(attrs or {})
+
+        origins = {}
+        for module, names in exports.iteritems():
+            for export in names:
+                origins[export] = module
+        self.__dict__['__lazy_modules__'] = tuple(exports)
+        self.__dict__['__lazy_origins__'] = origins
+        self.__dict__['__all__'] = sorted(origins)
+
+    def __getattr__(self, name):
+        module = self.__lazy_origins__.get(name)
+        if module is not None:
+            value = getattr(self._import(module), name)
+        elif name in self.__lazy_modules__:
+            value = self._import(name)
+        else:
+            raise AttributeError("'module' object has no attribute '{0}'".format(name))
+
+        self.__dict__[name] = value
+        return value
+
+    def __dir__(self):
+        return sorted(set(self.__dict__) | set(self.__lazy_origins__) | set(self.__lazy_modules__))
+
+    def _import(self, module):
+        return importlib.import_module('{0}.{1}'.format(self.__name__, module))
+
+
+def lazy_package(name, exports):
+    """
+    Replace the package of the given name in `sys.modules` with a :class: `~scatter.lazy.LazyModule`
+    which carries every attribute the package has defined so far. Call it at the end of the
+    package `__init__` module.
+
+    :param name: Fully qualified name of the package.
+    :param exports: Dict of the public names defined by each submodule keyed by its name.
+    """
+    package = sys.modules[name]
+    module = sys.modules[name] = LazyModule(name, exports, package.__dict__)
+    # Python 2 clears the globals of a module once it is garbage collected, which would break
+    # anything defined by the package module itself.
+    module.__dict__['__lazy_package__'] = package
+    return module
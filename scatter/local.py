@@ -0,0 +1,226 @@
+"""
+    scatter.local
+    ~~~~~~~~~~~~~
+
+    Implements objects whose values are local to the current context of execution, which is the
+    current asyncio task, greenlet or thread, whichever is most specific.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('Local', 'LocalStack', 'LocalProxy', 'ContextError', 'get_ident')
+
+
+import thread
+
+try:
+    from greenlet import getcurrent as get_greenlet
+except ImportError:
+    get_greenlet = None
+
+try:
+    import asyncio
+except ImportError:
+    asyncio = None
+
+from scatter.exceptions import ScatterException
+from scatter.proxy import Proxy
+
+
+class ContextError(ScatterException):
+    """
+    Raised when a context local proxy is used outside of the context it refers to.
+    """
+
+
+def get_task_ident():
+    """
+    Return the running asyncio task, or the current greenlet or thread id outside of tasks.
+    """
+    try:
+        task = asyncio.current_task()
+    except RuntimeError:
+        task = None
+    if task is not None:
+        return task
+    if get_greenlet is not None:
+        return get_greenlet()
+    return thread.get_ident()
+
+
+#: Return a hashable identifier of the current context of execution. Picks the cheapest function
+#: which tells apart every kind of context available, since it runs on every context local access.
+if asyncio is not None:
+    get_ident = get_task_ident
+elif get_greenlet is not None:
+    get_ident = get_greenlet
+else:
+    get_ident = thread.get_ident
+
+
+class Local(object):
+    """
+    Object whose attributes hold a separate value in every context of execution.
+    Values are kept until :meth: `~scatter.local.Local.release` is called by their context.
+    """
+
+    __slots__ = ('__storage__', '__ident_func__')
+
+    def __init__(self, ident_func=get_ident):
+        object.__setattr__(self, '__storage__', {})
+        object.__setattr__(self, '__ident_func__', ident_func)
+
+    def __iter__(self):
+        return iter(self.__storage__.get(self.__ident_func__(), {}).items())
+
+    def __getattr__(self, name):
+        try:
+            return self.__storage__[self.__ident_func__()][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def __setattr__(self, name, value):
+        ident = self.__ident_func__()
+        storage = self.__storage__
+        try:
+            storage[ident][name] = value
+        except KeyError:
+            storage[ident] = {name: value}
+
+    def __delattr__(self, name):
+        try:
+            del self.__storage__[self.__ident_func__()][name]
+        except KeyError:
+            raise AttributeError(name)
+
+    def release(self):
+        """
+        Drop every value of the current context.
+        """
+        self.__storage__.pop(self.__ident_func__(), None)
+
+
+class LocalStack(object):
+    """
+    Stack of objects which is separate in every context of execution. Contexts which pop
+    every object they pushed leave nothing behind.
+    """
+
+    def __init__(self, ident_func=get_ident):
+        self.storage = {}
+        self.ident_func = ident_func
+
+    def __len__(self):
+        return len(self.storage.get(self.ident_func(), ()))
+
+    def __call__(self, attr=None):
+        """
+        Return a :class: `~scatter.local.LocalProxy` to the top of this stack, or the given attribute of it.
+        """
+        return LocalProxy(self, attr)
+
+    @property
+    def top(self):
+        """
+        Object on top of the stack of the current context, or `None` if it is empty.
+        """
+        stack = self.storage.get(self.ident_func())
+        return stack[-1] if stack else None
+
+    def push(self, obj):
+        """
+        Push the given object onto the stack of the current context.
+        """
+        ident = self.ident_func()
+        stack = self.storage.get(ident)
+        if stack is None:
+            stack = self.storage[ident] = []
+        stack.append(obj)
+        return obj
+
+    def pop(self):
+        """
+        Remove and return the object on top of the stack of the current context, or `None`
+        if it is empty.
+        """
+        ident = self.ident_func()
+        stack = self.storage.get(ident)
+        if not stack:
+            return None
+        obj = stack.pop()
+        if not stack:
+            self.storage.pop(ident, None)
+        return obj
+
+
+class LocalProxy(Proxy):
+    """
+    :class: `~scatter.proxy.Proxy` to the object which is current in the calling context, either
+    the top of a :class: `~scatter.local.LocalStack`, or an attribute of it, or the result of a function.
+
+    Attribute reads resolve the current object inline in `__getattribute__`, so they pay neither
+    the failed instance lookup which precedes `__getattr__` nor the `__real__` indirection every
+    other proxied operation uses.
+    """
+
+    __slots__ = ('__local',)
+
+    def __init__(self, target, attr=None):
+        """
+        :param target: :class: `~scatter.local.LocalStack` or callable which returns the current object.
+        :param attr: (Optional) Name of the attribute of the current object to proxy instead.
+        """
+        if isinstance(target, LocalStack):
+            local = (target.storage, target.ident_func, attr, target)
+        else:
+            local = (None, None, attr, target)
+        object.__setattr__(self, '_LocalProxy__local', local)
+
+    @property
+    def __real__(self):
+        return self._get_current_object()
+
+    def _get_current_object(self):
+        """
+        Return the object this proxy currently refers to, or raise a :class: `~scatter.local.ContextError`.
+        """
+        storage, ident_func, attr, target = local_state(self)
+        if storage is None:
+            obj = target()
+        else:
+            stack = storage.get(ident_func())
+            if not stack:
+                raise ContextError('Working outside of context of {0}'.format(target))
+            obj = stack[-1]
+        return obj if attr is None else getattr(obj, attr)
+
+    def __getattribute__(self, name):
+        if name in LOCAL_PROXY_ATTRS:
+            return object.__getattribute__(self, name)
+
+        storage, ident_func, attr, _ = local_state(self)
+        if storage is not None:
+            stack = storage.get(ident_func())
+            if stack:
+                obj = stack[-1]
+                return getattr(obj if attr is None else getattr(obj, attr), name)
+        return getattr(self._get_current_object(), name)
+
+    def __nonzero__(self):
+        try:
+            return bool(self._get_current_object())
+        except ContextError:
+            return False
+
+    def __repr__(self):
+        try:
+            return repr(self._get_current_object())
+        except ContextError:
+            return '<{0} unbound>'.format(type(self).__name__)
+
+
+#: Attributes of :class: `~scatter.local.LocalProxy` which belong to the proxy itself.
+LOCAL_PROXY_ATTRS = frozenset(['_get_current_object', '__real__', '_LocalProxy__local'])
+
+#: Read the state tuple of a :class: `~scatter.local.LocalProxy` straight from its slot.
+local_state = LocalProxy.__dict__['_LocalProxy__local'].__get__
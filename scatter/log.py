@@ -7,90 +7,97 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ('create_logger',)
+__all__ = ('create_logger', 'release_logger')
 
 
 import logging
+import weakref
 
 from scatter.meta import resolve_class
 
 DEFAULT_LOG_LEVEL = logging.INFO
 
 
-def create_logger(service):
+class ScatterLogger(logging.getLoggerClass()):
     """
-    Create a logger which extends the :class: `~logging.Logger` to support service context.
+    ScatterLogger is an extension of the :class: `~logging.Logger` stdlib logger which
+    automatically exposes service context into the :class: `~logging.LogRecord` so it can
+    be optionally consumed by the :class: `~logging.Formatter` or :class: `~logging.Handler`.
     """
-    class ScatterLogger(logging.getLoggerClass()):
+
+    #: Service the logger describes. Loggers are kept by the logging module, so the service
+    #: is only referred to weakly.
+    service = None
+
+    @classmethod
+    def file_descriptors(cls):
+        """
+        Helper function which returns all file descriptors currently opened by the logging
+        subsystem.
+
+        ..note:: Usage
+        This is used by :class: `~scatter.process.Daemon` to know which file descriptors it should
+        leave open when forking the process.
+        """
+        file_handlers = (h for h in logging._handlerList if isinstance(h, logging.FileHandler))
+        return [handler.stream.fileno() for handler in file_handlers]
+
+    def getEffectiveLevel(self):
+        """
+        Modify the logging level based on standard logging rules or custom service toggles.
+        """
+        if self.level == 0 and self.service.debug:
+            return logging.DEBUG
+
+        if self.service.log_level is not None and self.level != self.service.log_level:
+            self.setLevel(self.service.log_level)
+
+        return super(ScatterLogger, self).getEffectiveLevel()
+
+    def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None):
+        """
+        Modify the standard :class: `~logging.LogRecord` creation to automatically inject
+        service specific context into the `extras` field.
         """
-        ScatterLogger is an extension of the :class: `~logging.Logger` stdlib logger which
-        automatically exposes service context into the :class: `~logging.LogRecord` so it can
-        be optionally consumed by the :class: `~logging.Formatter` or :class: `~logging.Handler`.
+        if extra is None:
+            extra = {}
+
+        extra['service_name'] = self.service.name
+        extra['service_id'] = self.service.id
+        extra['service_type'] = self.service.type
+
+        return super(ScatterLogger, self).makeRecord(name, level, fn, lno, msg, args, exc_info, func, extra)
+
+    def child(self, service):
+        """
+        Return a :class: `~scatter.log.ScatterLogger` instance attached as a child
+        to this logger keyed by class name.
+        """
+        #suffix = resolve_class(obj)
+        print 'CHILD SUFFIX {0}'.format('.'.join((self.name, service.id)))
+        child = super(ScatterLogger, self).getChild(service.id)
+        child.__class__ = ScatterLogger
+        child.service = weakref.proxy(service)
+        child.propagate = True
+        return child
+
+    @staticmethod
+    def shutdown():
+        """
+        Helper function which exposes the ability to shutdown the logging subsystem from
+        every instance of the logger.
+
+        ..note:: Usage
+        The "root" service should be the only service calling this. If you're calling this
+        directory from a custom app or service, you're going to have a bad time.
         """
+        logging.shutdown()
 
-        @classmethod
-        def file_descriptors(cls):
-            """
-            Helper function which returns all file descriptors currently opened by the logging
-            subsystem.
-
-            ..note:: Usage
-            This is used by :class: `~scatter.process.Daemon` to know which file descriptors it should
-            leave open when forking the process.
-            """
-            file_handlers = (h for h in logging._handlerList if isinstance(h, logging.FileHandler))
-            return [handler.stream.fileno() for handler in file_handlers]
-
-        def getEffectiveLevel(self):
-            """
-            Modify the logging level based on standard logging rules or custom service toggles.
-            """
-            if self.level == 0 and service.debug:
-                return logging.DEBUG
-
-            if service.log_level is not None and self.level != service.log_level:
-                self.setLevel(service.log_level)
-
-            return super(ScatterLogger, self).getEffectiveLevel()
-
-        def makeRecord(self, name, level, fn, lno, msg, args, exc_info, func=None, extra=None):
-            """
-            Modify the standard :class: `~logging.LogRecord` creation to automatically inject
-            service specific context into the `extras` field.
-            """
-            if extra is None:
-                extra = {}
-
-            extra['service_name'] = service.name
-            extra['service_id'] = service.id
-            extra['service_type'] = service.type
-
-            return super(ScatterLogger, self).makeRecord(name, level, fn, lno, msg, args, exc_info, func, extra)
-
-        def child(self, service):
-            """
-            Return a :class: `~scatter.log.ScatterLogger` instance attached as a child
-            to this logger keyed by class name.
-            """
-            #suffix = resolve_class(obj)
-            print 'CHILD SUFFIX {0}'.format('.'.join((self.name, service.id)))
-            child = super(ScatterLogger, self).getChild(service.id)
-            child.__class__ = ScatterLogger
-            child.propagate = True
-            return child
-
-        @staticmethod
-        def shutdown():
-            """
-            Helper function which exposes the ability to shutdown the logging subsystem from
-            every instance of the logger.
-
-            ..note:: Usage
-            The "root" service should be the only service calling this. If you're calling this
-            directory from a custom app or service, you're going to have a bad time.
-            """
-            logging.shutdown()
 
+def create_logger(service):
+    """
+    Create a logger which extends the :class: `~logging.Logger` to support service context.
+    """
     # Only configure logger when its a "root" logger, otherwise just attach it as a child logger.
     # A child logger should inherit its ancestors formatter and handler configuration.
     #if service.is_root() or service.is_app():
@@ -103,6 +110,7 @@ def create_logger(service):
     # Configure Scatter logger.
     logger = logging.getLogger(service.id)
     logger.__class__ = ScatterLogger
+    logger.service = weakref.proxy(service)
     logger.addHandler(handler)
     logger.setLevel(service.log_level)
     logger.propagate = False
@@ -112,4 +120,14 @@ def create_logger(service):
     return logger
 
 
-
+def release_logger(logger):
+    """
+    Close the handlers of the given service logger and drop it from the logging module so it
+    is reclaimed along with its service.
+    """
+    if logger is None:
+        return
+    for handler in list(logger.handlers):
+        logger.removeHandler(handler)
+        handler.close()
+    logging.Logger.manager.loggerDict.pop(logger.name, None)
@@ -0,0 +1,552 @@
+"""
+    scatter.logstore
+    ~~~~~~~~~~~~~~~~
+
+    Implements a persistent store of append-only segment files.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('LogStore', 'FSYNC_ALWAYS', 'FSYNC_INTERVAL', 'FSYNC_NEVER')
+
+
+import functools
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+
+try:
+    import cPickle as pickle
+except ImportError:
+    import pickle
+
+from scatter.store import Store, iter_pairs
+
+
+#: Sync segment files to disk after every write.
+FSYNC_ALWAYS = 'always'
+
+#: Sync segment files to disk at most once every `fsync_interval` seconds, and within that
+#: long of the last write.
+FSYNC_INTERVAL = 'interval'
+
+#: Leave syncing segment files to disk to the operating system.
+FSYNC_NEVER = 'never'
+
+#: Every record starts with the crc32 of the rest of the record, its sequence number, the
+#: length of its key and value and its type.
+RECORD_HEADER = struct.Struct('!IQIIB')
+
+#: Record types.
+RECORD_PUT = 0
+RECORD_DELETE = 1
+
+#: File name suffixes of segment and saved index files.
+SEGMENT_SUFFIX = '.log'
+INDEX_FILE = 'index'
+
+
+class Location(object):
+    """
+    Position of the latest record of a key within the segment files.
+    """
+
+    __slots__ = ('segment', 'offset', 'size', 'value_offset', 'value_size', 'seq')
+
+    def __init__(self, segment, offset, size, value_offset, value_size, seq):
+        self.segment = segment
+        self.offset = offset
+        self.size = size
+        self.value_offset = value_offset
+        self.value_size = value_size
+        self.seq = seq
+
+    def __getstate__(self):
+        return tuple(getattr(self, name) for name in self.__slots__)
+
+    def __setstate__(self, state):
+        for name, value in zip(self.__slots__, state):
+            setattr(self, name, value)
+
+
+class Segment(object):
+    """
+    Single append-only segment file and a read-only memory map of it.
+    """
+
+    def __init__(self, path, id):
+        self.path = path
+        self.id = id
+        self.file = open(path, 'a+b')
+        self.file.seek(0, os.SEEK_END)
+        self.size = self.file.tell()
+        self.dead = 0
+        self.map = None
+        self.mapped = 0
+
+    def append(self, data):
+        offset = self.size
+        self.file.write(data)
+        self.size += len(data)
+        return offset
+
+    def flush(self):
+        self.file.flush()
+
+    def sync(self):
+        self.file.flush()
+        os.fsync(self.file.fileno())
+
+    def view(self, offset, size):
+        """
+        Return a read-only buffer of the given range of the file without copying it.
+        """
+        if offset + size > self.mapped:
+            self.file.flush()
+            # Readers may still hold buffers of the previous map, so it is left to be
+            # unmapped once they are garbage collected.
+            self.map = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+            self.mapped = len(self.map)
+        return buffer(self.map, offset, size)
+
+    def truncate(self, size):
+        self.file.flush()
+        self.file.truncate(size)
+        self.size, self.mapped = size, 0
+        self.map = None
+
+    def close(self):
+        self.file.close()
+
+
+class LogStore(Store):
+    """
+    Persistent store which appends every write as a record to the active segment file and keeps
+    the location of the latest record of every key in memory. Reads are served from memory maps
+    of the segment files.
+
+    Segments are sealed once they reach `segment_size` bytes. Records superseded by later writes
+    are reclaimed by compaction, which copies the live records of sealed segments into a new
+    segment and removes the old ones. Compaction runs in the background every `compact_interval`
+    seconds when set, or on demand through :meth: `~scatter.logstore.LogStore.compact`.
+
+    On open, the store loads the index saved by :meth: `~scatter.logstore.LogStore.close` and scans
+    only the records written after it was saved, or scans every segment if there is no usable index.
+    A record torn by a crash at the end of a segment is truncated.
+
+    Keys and values are serialized with `dumps` and `loads`, pickle by default. Keys must be hashable.
+    """
+
+    def __init__(self, path, segment_size=64 * 1024 * 1024, fsync=FSYNC_INTERVAL, fsync_interval=1.0,
+                 compact_threshold=0.5, compact_interval=None, dumps=None, loads=pickle.loads):
+        """
+        :param path: Directory which holds the segment files. Created if it doesn't exist.
+        :param segment_size: (Optional) Number of bytes at which the active segment is sealed.
+        :param fsync: (Optional) Sync policy, one of `always`, `interval` or `never`. Defaults to `interval`.
+        :param fsync_interval: (Optional) Number of seconds between syncs of the `interval` policy.
+        :param compact_threshold: (Optional) Fraction of superseded bytes in sealed segments at which
+            background compaction rewrites them. Defaults to `0.5`.
+        :param compact_interval: (Optional) Number of seconds between background compaction checks.
+            Defaults to `None` which never compacts in the background.
+        :param dumps: (Optional) Callable which serializes keys and values to bytes.
+        :param loads: (Optional) Callable which deserializes bytes to keys and values.
+        """
+        if fsync not in (FSYNC_ALWAYS, FSYNC_INTERVAL, FSYNC_NEVER):
+            raise ValueError('Unknown fsync policy {0}'.format(fsync))
+
+        self.path = path
+        self.segment_size = segment_size
+        self.fsync = fsync
+        self.fsync_interval = fsync_interval
+        self.compact_threshold = compact_threshold
+        self.dumps = dumps or functools.partial(pickle.dumps, protocol=pickle.HIGHEST_PROTOCOL)
+        self.loads = loads
+        self.index = {}
+        self.segments = {}
+        self.active = None
+        self.seq = 0
+        self.synced = time.time()
+        self.dirty = False
+        self.lock = threading.RLock()
+        self.compact_lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = None
+        self.sync_thread = None
+
+        if not os.path.isdir(path):
+            os.makedirs(path)
+        self._recover()
+
+        if compact_interval is not None:
+            self.thread = threading.Thread(target=self._compact_forever, args=(compact_interval,),
+                                           name='log-store-compaction')
+            self.thread.daemon = True
+            self.thread.start()
+
+        if fsync == FSYNC_INTERVAL:
+            self.sync_thread = threading.Thread(target=self._sync_forever, name='log-store-sync')
+            self.sync_thread.daemon = True
+            self.sync_thread.start()
+
+    def __len__(self):
+        return len(self.index)
+
+    def __contains__(self, key):
+        return key in self.index
+
+    def get(self, key, default=None):
+        with self.lock:
+            location = self.index.get(key)
+            if location is None:
+                return default
+            view = self.segments[location.segment].view(location.value_offset, location.value_size)
+        return self.loads(str(view))
+
+    def get_buffer(self, key, default=None):
+        """
+        Return a read-only buffer of the serialized value of the given key, straight from the
+        memory map of its segment without copying it.
+
+        :param key: Key to read.
+        :param default: (Optional) Value returned if the key doesn't exist.
+        """
+        with self.lock:
+            location = self.index.get(key)
+            if location is None:
+                return default
+            return self.segments[location.segment].view(location.value_offset, location.value_size)
+
+    def put(self, key, value):
+        key_data, value_data = self.dumps(key), self.dumps(value)
+        with self.lock:
+            self.index[key] = self._append(RECORD_PUT, key, key_data, value_data)
+
+    def keys(self):
+        with self.lock:
+            return self.index.keys()
+
+    def get_many(self, keys):
+        views = []
+        with self.lock:
+            for key in keys:
+                location = self.index.get(key)
+                if location is not None:
+                    views.append((key, self.segments[location.segment].view(location.value_offset,
+                                                                            location.value_size)))
+        # Deserialize outside of the lock, the views stay valid even if the segment is compacted.
+        values = {}
+        for key, view in views:
+            values[key] = self.loads(str(view))
+        return values
+
+    def put_many(self, items):
+        """
+        Append a record for every given key and value, syncing to disk at most once for the
+        whole batch.
+
+        :param items: Dict or iterable of `(key, value)` tuples to store.
+        """
+        records = [(key, self.dumps(key), self.dumps(value)) for key, value in iter_pairs(items)]
+        with self.lock:
+            for key, key_data, value_data in records:
+                self.index[key] = self._append(RECORD_PUT, key, key_data, value_data, sync=False)
+            if records:
+                self._sync_policy()
+
+    def delete_many(self, keys):
+        """
+        Append a delete record for every given key which exists, syncing to disk at most once
+        for the whole batch. Returns the number of keys removed.
+
+        :param keys: Iterable of keys to remove.
+        """
+        removed = 0
+        with self.lock:
+            for key in keys:
+                if key in self.index:
+                    self._delete(key, sync=False)
+                    removed += 1
+            if removed:
+                self._sync_policy()
+        return removed
+
+    def pop(self, key, default=None):
+        with self.lock:
+            if key not in self.index:
+                return default
+            value = self.get(key)
+            self._delete(key)
+            return value
+
+    def delete(self, key):
+        with self.lock:
+            if key not in self.index:
+                raise KeyError(key)
+            self._delete(key)
+
+    def sync(self):
+        """
+        Flush and sync the active segment to disk.
+        """
+        with self.lock:
+            self.active.sync()
+            self.synced = time.time()
+            self.dirty = False
+
+    def stats(self):
+        """
+        Dict of the number of keys, segments and live and superseded bytes of this store.
+        """
+        with self.lock:
+            size = sum(s.size for s in self.segments.itervalues())
+            dead = sum(s.dead for s in self.segments.itervalues())
+            return dict(keys=len(self.index), segments=len(self.segments), bytes=size, dead_bytes=dead)
+
+    def compact(self, threshold=0.0):
+        """
+        Copy the live records of every sealed segment into a new segment and remove the old ones,
+        if their fraction of superseded bytes is at least the given threshold. Writes continue while
+        records are copied, to a new active segment after the compacted one. Returns the number of
+        bytes reclaimed.
+
+        :param threshold: (Optional) Fraction of superseded bytes which triggers compaction.
+            Defaults to `0` which always compacts.
+        """
+        with self.compact_lock:
+            with self.lock:
+                sealed = [s for s in self.segments.itervalues() if s is not self.active]
+                size = sum(s.size for s in sealed)
+                dead = sum(s.dead for s in sealed)
+                if not sealed or not dead or float(dead) / size < threshold:
+                    return 0
+                ids = set(s.id for s in sealed)
+                live = [(key, location) for key, location in self.index.iteritems() if location.segment in ids]
+                compacted = self._create_segment()
+                # Compaction drops delete records, which is only safe while older records of their
+                # keys can't be left behind in a segment which isn't compacted. Moving writes to a
+                # segment after the compacted one keeps the active segment the newest, both now and
+                # once recovered, so it only ever holds records newer than every sealed segment.
+                previous, self.active = self.active, self._create_segment()
+                if previous.size:
+                    previous.sync()
+                else:
+                    self._drop(previous)
+
+            # Records keep their sequence number so recovery still orders them correctly.
+            moved = []
+            for key, location in live:
+                record = str(self.segments[location.segment].view(location.offset, location.size))
+                offset = compacted.append(record)
+                moved.append((key, location, Location(compacted.id, offset, location.size,
+                                                      offset + location.value_offset - location.offset,
+                                                      location.value_size, location.seq)))
+            compacted.sync()
+
+            with self.lock:
+                for key, old, new in moved:
+                    if self.index.get(key) is old:
+                        self.index[key] = new
+                    else:
+                        compacted.dead += new.size
+                if not compacted.size:
+                    sealed.append(compacted)
+                # Oldest first, so a crash part way through never leaves a segment behind whose
+                # records a newer, already removed segment superseded, ex: by deleting their key.
+                for segment in sorted(sealed, key=lambda s: s.id):
+                    self._drop(segment)
+                self._remove_saved_index()
+
+        return size - compacted.size
+
+    def close(self):
+        """
+        Stop background compaction and syncing, sync every segment and save the index so the next open
+        doesn't need to scan the segments.
+        """
+        self.stopped.set()
+        for thread in (self.thread, self.sync_thread):
+            if thread is not None and thread is not threading.current_thread():
+                thread.join()
+
+        with self.lock:
+            for segment in self.segments.itervalues():
+                segment.sync()
+            self._save_index()
+            for segment in self.segments.itervalues():
+                segment.close()
+            self.segments.clear()
+            self.index.clear()
+            self.active = None
+
+    def _append(self, kind, key, key_data, value_data, sync=True):
+        """
+        Append a record to the active segment and return its location, leaving the sync policy
+        to the caller unless `sync` is set. Must be called holding the lock.
+        """
+        self.seq += 1
+        body = RECORD_HEADER.pack(0, self.seq, len(key_data), len(value_data), kind)[4:] + key_data + value_data
+        record = struct.pack('!I', zlib.crc32(body) & 0xffffffff) + body
+
+        if self.active.size + len(record) > self.segment_size and self.active.size:
+            self.active.sync()
+            self.active = self._create_segment()
+
+        segment = self.active
+        offset = segment.append(record)
+
+        old = self.index.get(key)
+        if old is not None:
+            self.segments[old.segment].dead += old.size
+        if kind == RECORD_DELETE:
+            segment.dead += len(record)
+        if sync:
+            self._sync_policy()
+
+        value_offset = offset + RECORD_HEADER.size + len(key_data)
+        return Location(segment.id, offset, len(record), value_offset, len(value_data), self.seq)
+
+    def _delete(self, key, sync=True):
+        self._append(RECORD_DELETE, key, self.dumps(key), '', sync)
+        del self.index[key]
+
+    def _sync_policy(self):
+        """
+        Sync the active segment if the fsync policy calls for it. Must be called holding the lock.
+        """
+        if self.fsync == FSYNC_ALWAYS:
+            self.active.sync()
+        elif self.fsync == FSYNC_INTERVAL:
+            if time.time() - self.synced >= self.fsync_interval:
+                self.sync()
+            else:
+                # Synced by the sync thread if no later write does it first.
+                self.dirty = True
+
+    def _create_segment(self):
+        """
+        Create a new, empty segment with the next id.
+        """
+        id = max(self.segments) + 1 if self.segments else 0
+        segment = self.segments[id] = Segment(os.path.join(self.path, '{0:08d}{1}'.format(id, SEGMENT_SUFFIX)), id)
+        return segment
+
+    def _drop(self, segment):
+        """
+        Close and remove the given segment. Must be called holding the lock.
+        """
+        del self.segments[segment.id]
+        segment.close()
+        os.remove(segment.path)
+
+    def _recover(self):
+        """
+        Open every segment file and rebuild the index from the saved index and the records
+        written after it was saved.
+        """
+        for name in sorted(os.listdir(self.path)):
+            if name.endswith(SEGMENT_SUFFIX):
+                id = int(name[:-len(SEGMENT_SUFFIX)])
+                self.segments[id] = Segment(os.path.join(self.path, name), id)
+
+        scanned = self._load_index()
+        tombstones = {}
+        for id in sorted(self.segments):
+            self._scan(self.segments[id], scanned.get(id, 0), tombstones)
+        self._remove_saved_index()
+
+        last = self.segments[max(self.segments)] if self.segments else None
+        self.active = last if last is not None and last.size < self.segment_size else self._create_segment()
+
+    def _scan(self, segment, offset, tombstones):
+        """
+        Apply every record of the given segment from the given offset to the index, keeping
+        whichever record of a key has the highest sequence number. Truncates torn records.
+        """
+        view = segment.view(0, segment.size) if segment.size else ''
+        while offset + RECORD_HEADER.size <= segment.size:
+            crc, seq, key_size, value_size, kind = RECORD_HEADER.unpack_from(view, offset)
+            size = RECORD_HEADER.size + key_size + value_size
+            if offset + size > segment.size or zlib.crc32(view[offset + 4:offset + size]) & 0xffffffff != crc:
+                break
+
+            key_offset = offset + RECORD_HEADER.size
+            key = self.loads(view[key_offset:key_offset + key_size])
+            self.seq = max(self.seq, seq)
+
+            current = self.index.get(key)
+            latest = max(current.seq if current is not None else -1, tombstones.get(key, -1))
+            if seq < latest:
+                segment.dead += size
+            else:
+                if current is not None:
+                    self.segments[current.segment].dead += current.size
+                if kind == RECORD_DELETE:
+                    self.index.pop(key, None)
+                    tombstones[key] = seq
+                    segment.dead += size
+                else:
+                    self.index[key] = Location(segment.id, offset, size, key_offset + key_size, value_size, seq)
+            offset += size
+
+        if offset < segment.size:
+            segment.truncate(offset)
+
+    def _load_index(self):
+        """
+        Load the saved index if it still matches the segment files and return the size of
+        each segment covered by it, or an empty dict if there is no usable index.
+        """
+        path = os.path.join(self.path, INDEX_FILE)
+        try:
+            with open(path, 'rb') as f:
+                saved = pickle.load(f)
+            sizes, index, seq, dead = saved['sizes'], saved['index'], saved['seq'], saved['dead']
+        except (IOError, EOFError, pickle.UnpicklingError, ValueError, TypeError, KeyError):
+            return {}
+
+        for id, size in sizes.iteritems():
+            segment = self.segments.get(id)
+            if segment is None or segment.size < size:
+                return {}
+
+        self.index = index
+        self.seq = seq
+        for id, size in dead.iteritems():
+            if id in self.segments:
+                self.segments[id].dead = size
+        return sizes
+
+    def _save_index(self):
+        """
+        Atomically write the index along with the segment sizes it covers.
+        """
+        saved = dict(index=self.index, seq=self.seq,
+                     sizes=dict((id, s.size) for id, s in self.segments.iteritems()),
+                     dead=dict((id, s.dead) for id, s in self.segments.iteritems()))
+        path = os.path.join(self.path, INDEX_FILE)
+        with open(path + '.tmp', 'wb') as f:
+            pickle.dump(saved, f, pickle.HIGHEST_PROTOCOL)
+            f.flush()
+            os.fsync(f.fileno())
+        os.rename(path + '.tmp', path)
+
+    def _remove_saved_index(self):
+        """
+        Remove the saved index once the segments move on from it.
+        """
+        path = os.path.join(self.path, INDEX_FILE)
+        if os.path.exists(path):
+            os.remove(path)
+
+    def _compact_forever(self, interval):
+        while not self.stopped.wait(interval):
+            self.compact(self.compact_threshold)
+
+    def _sync_forever(self):
+        while not self.stopped.wait(self.fsync_interval):
+            with self.lock:
+                if self.dirty and self.active is not None:
+                    self.sync()
@@ -9,15 +9,12 @@
 """
 __all__ = ('main',)
 
-from gevent import monkey
-monkey.patch_all()
-
 
 import sys
 
+# Only argparse is imported here, so gevent can still patch threading ahead of every scatter
+# module which creates locks.
 from scatter.cli import create_scatter_parser
-from scatter.importer import import_from
-from scatter.process import Process, Daemon
 
 
 def func(service):
@@ -35,6 +32,14 @@ def main(argv):
     parser = create_scatter_parser()
     args = parser.parse_args(argv)
 
+    # Patch in cooperative sockets and threads only once there is a process to run, rather than on
+    # import, and ahead of importing any scatter module which uses them.
+    from gevent import monkey
+    monkey.patch_all()
+
+    from scatter.importer import import_from
+    from scatter.process import Process, Daemon
+
     # Configure which process class to use, taking into account custom user defined process types.
     process_factory = Daemon if args.daemonize else Process
     if args.process:
@@ -0,0 +1,380 @@
+"""
+    scatter.pool
+    ~~~~~~~~~~~~
+
+    Implements a service which pools outbound streams by address so they can be
+    reused by every service within a process.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('ConnectionPool', 'AddressPool', 'get_pool')
+
+
+import collections
+import contextlib
+import threading
+import time
+
+from scatter.config import ConfigAttribute
+from scatter.descriptors import cached
+from scatter.exceptions import ScatterTimeout
+from scatter.importer import import_from
+from scatter.service import Service
+
+
+def get_pool(service):
+    """
+    Return the :class: `~scatter.pool.ConnectionPool` shared by every service within the
+    tree of the given service, creating it as a child of the root service if needed.
+
+    :param service: Any service instance of the tree.
+    """
+    return ConnectionPool.shared(service)
+
+
+class AddressPool(object):
+    """
+    Idle and leased streams connected to a single address along with their usage counters.
+    """
+
+    def __init__(self, address, min_size, max_size):
+        self.address = address
+        self.min_size = min_size
+        self.max_size = max_size
+        self.idle = collections.deque()
+        self.leased = set()
+        self.pending = 0
+        self.condition = threading.Condition(threading.Lock())
+        self.hits = 0
+        self.misses = 0
+        self.waits = 0
+        self.wait_time = 0.0
+        self.created = 0
+        self.evicted = 0
+        self.closed = False
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.address)
+
+    @property
+    def size(self):
+        return len(self.idle) + len(self.leased) + self.pending
+
+    def stats(self):
+        """
+        Dict of the current sizes and usage counters of this pool.
+        """
+        with self.condition:
+            return dict(idle=len(self.idle), leased=len(self.leased), hits=self.hits, misses=self.misses,
+                        waits=self.waits, wait_time=self.wait_time, created=self.created, evicted=self.evicted)
+
+
+class ConnectionPool(Service):
+    """
+    Service which leases out streams connected to remote addresses and takes them back once
+    the caller is done, so services calling the same node share a handful of connections
+    instead of connecting for every call.
+
+    Streams are created on demand up to `max_connections` per address. Callers wait for one
+    to be returned once the limit is reached. A background thread closes streams which have
+    been idle for too long, discards ones which fail their health check and keeps at least
+    `min_connections` open to every known address.
+    """
+
+    #: Callable used to create streams connected to an address.
+    #: Defaults to :func: `~scatter.transport.connect`.
+    connect_func = ConfigAttribute('scatter.transport.connect')
+
+    #: The class used to drive the streams created by this pool.
+    #: Defaults to :class: `~scatter.reactor.Reactor`.
+    reactor_class = ConfigAttribute('scatter.reactor.Reactor')
+
+    #: Set the number of streams kept open to every address the pool has seen. Defaults to `0`.
+    min_connections = ConfigAttribute(0)
+
+    #: Set the maximum number of streams, idle or leased, open to a single address. Defaults to `8`.
+    max_connections = ConfigAttribute(8)
+
+    #: Set the number of seconds a stream may sit idle before it is closed. Defaults to `60` seconds.
+    idle_timeout = ConfigAttribute(60)
+
+    #: Set the number of seconds between background health checks. Defaults to `10` seconds.
+    health_check_interval = ConfigAttribute(10)
+
+    #: Set the number of seconds to wait for a stream when an address is at its limit.
+    #: Defaults to `5` seconds.
+    lease_timeout = ConfigAttribute(5)
+
+    #: Thread which runs the health checks while the pool is running.
+    thread = None
+
+    @classmethod
+    def shared(cls, service):
+        """
+        Return the pool attached to the root of the given service, creating it if needed.
+
+        :param service: Any service instance of the tree.
+        """
+        root = service
+        while not root.is_root():
+            root = root.parent
+        if isinstance(root, cls):
+            return root
+
+        pool = root.services.by_type(cls).first()
+        if pool is None:
+            pool = root.child(cls)
+            if root.running():
+                pool.start()
+        return pool
+
+    @cached
+    def reactor(self):
+        cls = import_from(self.reactor_class)
+        return self.services.by_type(cls).first() or self.child(cls)
+
+    @cached
+    def pools(self):
+        """
+        Dict of :class: `~scatter.pool.AddressPool` instances keyed by address.
+        """
+        return {}
+
+    @cached
+    def pools_lock(self):
+        return threading.Lock()
+
+    @cached
+    def leases(self):
+        """
+        Dict of the :class: `~scatter.pool.AddressPool` each leased stream was leased from, so
+        streams are returned to it even after the pool was closed.
+        """
+        return {}
+
+    @cached
+    def wakeup(self):
+        """
+        Event which interrupts the health check thread.
+        """
+        return threading.Event()
+
+    def pool(self, address):
+        """
+        Return the :class: `~scatter.pool.AddressPool` of the given address, creating it if needed.
+
+        :param address: Address string in `scheme://location` form.
+        """
+        pool = self.pools.get(address)
+        if pool is None:
+            with self.pools_lock:
+                pool = self.pools.get(address)
+                if pool is None:
+                    pool = self.pools[address] = AddressPool(address, self.min_connections, self.max_connections)
+        return pool
+
+    def lease(self, address, timeout=None):
+        """
+        Return an open stream connected to the given address for the exclusive use of the caller
+        until it is passed to :meth: `~scatter.pool.ConnectionPool.release`.
+
+        :param address: Address string in `scheme://location` form.
+        :param timeout: (Optional) Number of seconds to wait when the address is at its limit.
+            Defaults to `lease_timeout`.
+        """
+        pool = self.pool(address)
+        timeout = self.lease_timeout if timeout is None else timeout
+        deadline = None
+
+        with pool.condition:
+            while True:
+                while pool.idle:
+                    stream, _ = pool.idle.pop()
+                    if self.check(stream):
+                        pool.hits += 1
+                        pool.leased.add(stream)
+                        self.leases[stream] = pool
+                        return stream
+                    pool.evicted += 1
+                    self._close(stream)
+
+                if pool.size < pool.max_size:
+                    pool.misses += 1
+                    # Reserve the slot so waiters don't overshoot the limit while we connect.
+                    pool.pending += 1
+                    break
+
+                now = time.time()
+                if deadline is None:
+                    deadline = now + timeout
+                    pool.waits += 1
+                remaining = deadline - now
+                if remaining <= 0:
+                    raise ScatterTimeout('Timed out waiting for a stream to {0}'.format(address))
+                pool.condition.wait(remaining)
+                pool.wait_time += time.time() - now
+
+        try:
+            stream = self.connect(address)
+        except Exception:
+            with pool.condition:
+                pool.pending -= 1
+                pool.condition.notify()
+            raise
+
+        with pool.condition:
+            pool.pending -= 1
+            pool.leased.add(stream)
+            pool.created += 1
+            self.leases[stream] = pool
+        return stream
+
+    def release(self, stream, discard=False):
+        """
+        Return a leased stream to the pool so it can be reused.
+
+        :param stream: Stream previously returned by :meth: `~scatter.pool.ConnectionPool.lease`.
+        :param discard: (Optional) Close the stream instead of reusing it. Defaults to `False`.
+        """
+        pool = self.leases.pop(stream, None)
+        if pool is None:
+            return
+        with pool.condition:
+            pool.leased.discard(stream)
+            if discard or stream.closed or pool.closed or not self.running():
+                pool.evicted += 1
+                self._close(stream)
+            else:
+                pool.idle.append((stream, time.time()))
+            pool.condition.notify()
+
+    @contextlib.contextmanager
+    def connection(self, address, timeout=None):
+        """
+        Context manager which leases a stream connected to the given address and returns
+        it to the pool on exit. Streams are discarded if the block raises.
+
+        :param address: Address string in `scheme://location` form.
+        :param timeout: (Optional) Number of seconds to wait when the address is at its limit.
+        """
+        stream = self.lease(address, timeout)
+        try:
+            yield stream
+        except Exception:
+            self.release(stream, discard=True)
+            raise
+        else:
+            self.release(stream)
+
+    def connect(self, address):
+        """
+        Create a new stream connected to the given address.
+
+        :param address: Address string in `scheme://location` form.
+        """
+        return import_from(self.connect_func)(address, self.reactor)
+
+    def check(self, stream):
+        """
+        Returns `True` if the given idle stream is still fit to be leased.
+
+        :param stream: Idle stream of this pool.
+        """
+        return not stream.closed
+
+    def evict(self, now=None):
+        """
+        Close idle streams which have expired or failed their health check and open new ones
+        to keep every address at its minimum size.
+
+        :param now: (Optional) Current timestamp. Defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        for pool in self.pools.values():
+            with pool.condition:
+                keep, size = collections.deque(), pool.size
+                for stream, last_used in pool.idle:
+                    expired = now - last_used >= self.idle_timeout and size > pool.min_size
+                    if expired or not self.check(stream):
+                        pool.evicted += 1
+                        size -= 1
+                        self._close(stream)
+                    else:
+                        keep.append((stream, last_used))
+                pool.idle = keep
+                missing = pool.min_size - pool.size
+
+            for _ in xrange(max(missing, 0)):
+                try:
+                    stream = self.connect(pool.address)
+                except Exception as e:
+                    self.log.error('Unable to connect to {0}. {1}'.format(pool.address, e))
+                    break
+                with pool.condition:
+                    pool.created += 1
+                    pool.idle.append((stream, now))
+                    pool.condition.notify()
+
+    def stats(self):
+        """
+        Dict of :meth: `~scatter.pool.AddressPool.stats` keyed by address.
+        """
+        return dict((address, pool.stats()) for address, pool in self.pools.items())
+
+    def close(self):
+        """
+        Close every idle stream and forget all addresses. Leased streams are closed once released.
+        """
+        with self.pools_lock:
+            pools, self.pools = self.pools, {}
+        for pool in pools.values():
+            with pool.condition:
+                pool.closed = True
+                for stream, _ in pool.idle:
+                    self._close(stream)
+                pool.idle.clear()
+                pool.condition.notify_all()
+
+    def run(self):
+        """
+        Run health checks every `health_check_interval` seconds until the pool is stopped.
+        """
+        while True:
+            self.wakeup.wait(self.health_check_interval)
+            if self.thread is False or not self.running():
+                break
+            try:
+                self.evict()
+            except Exception:
+                self.log.exception('Exception raised during pool health check')
+
+    def on_initialized(self, *args, **kwargs):
+        """
+        """
+        # Attach the reactor now so it is started and stopped along with the pool.
+        self.reactor
+
+    def on_started(self, *args, **kwargs):
+        """
+        """
+        self.wakeup.clear()
+        self.thread = threading.Thread(target=self.run, name='{0}-health'.format(self.name))
+        self.thread.daemon = True
+        self.thread.start()
+
+    def on_stopping(self, *args, **kwargs):
+        """
+        """
+        thread, self.thread = self.thread, False
+        if thread is not None:
+            self.wakeup.set()
+            if thread is not threading.current_thread():
+                thread.join(self.stop_timeout)
+        self.close()
+
+    def _close(self, stream):
+        try:
+            stream.close()
+        except Exception:
+            self.log.exception('Exception raised closing {0}'.format(stream))
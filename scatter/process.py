@@ -11,17 +11,15 @@
 __all__ = ('Process', 'Daemon')
 
 
-import daemon
-import fcntl
-import grp
+import gc
 import os
-import pwd
 import signal
 
 from scatter.config import ConfigAttribute
 from scatter.descriptors import cached
-from scatter.importer import PackageImporter, import_from
+from scatter.importer import PackageImporter, import_from, invalidate_imports
 from scatter.service import Service, ServiceAttribute
+from scatter.utils import get_memory_usage
 
 
 class Pidfile(object):
@@ -38,6 +36,8 @@ class Pidfile(object):
         self.pidfile = None
 
     def __enter__(self):
+        import fcntl
+
         self.pidfile = open(self.path, 'a+')
         try:
             fcntl.flock(self.pidfile.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
@@ -69,6 +69,13 @@ class Process(Service):
     #:
     package_importer_class = ConfigAttribute(PackageImporter)
 
+    #: Set to import extension packages on first use rather than at startup. Defaults to `True`.
+    lazy_extensions = ConfigAttribute(True)
+
+    #: Set the path of the file which saves the installed extension packages between starts,
+    #: ex: `~/.cache/scatter/entry_points.json`. Defaults to `None` which scans on every start.
+    entry_point_index = ConfigAttribute(None)
+
     #: Set the process group by name or its id.
     group = ConfigAttribute()
 
@@ -81,6 +88,15 @@ class Process(Service):
     #: Set the process user by name or its id.
     user = ConfigAttribute()
 
+    #: Toggle the pre-fork freeze phase. Set this to `True` to collect and freeze all objects
+    #: tracked by the garbage collector once the process is initialized, so workers forked
+    #: from it keep sharing those pages copy-on-write. Defaults to `False`.
+    gc_freeze = ConfigAttribute(False)
+
+    #: Set the garbage collector thresholds, as a `(gen0, gen1, gen2)` tuple, used within
+    #: forked workers. Defaults to `None` which keeps the interpreter defaults.
+    worker_gc_threshold = ConfigAttribute()
+
     #: Get the process working directory. Configurable
     # by config key `RUNDIR` or `self.rundir`.
     cwd = ServiceAttribute()
@@ -109,7 +125,124 @@ class Process(Service):
         """
         """
         cls = import_from(self.package_importer_class)
-        return cls(self)
+        index_path = self.entry_point_index
+        return cls(self, index_path=os.path.expanduser(index_path) if index_path else None)
+
+    @cached
+    def workers(self):
+        """
+        Collection of process ids of the workers forked from this process.
+        """
+        return []
+
+    def freeze(self):
+        """
+        Collect all garbage and move every surviving object into the permanent generation
+        of the garbage collector. Frozen objects are never scanned by future collections,
+        which keeps their headers untouched and their pages shared with forked workers.
+
+        Returns the number of frozen objects or `None` if `gc.freeze` is not available.
+        """
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            gc.collect()
+            freeze = getattr(gc, 'freeze', None)
+            if freeze is None:
+                self.log.info('Garbage collector freeze unavailable; collected only')
+                return None
+            freeze()
+            count = gc.get_freeze_count()
+            self.log.info('Froze {0} objects ahead of fork'.format(count))
+            return count
+        finally:
+            if enabled:
+                gc.enable()
+
+    def fork(self, func=None, *args, **kwargs):
+        """
+        Fork a new worker process from this one. The worker shares all memory with this process
+        copy-on-write, so callers should :meth: `~scatter.process.Process.freeze` beforehand.
+
+        :param func: (Optional) Callable to run within the worker, passed this process as its first
+        argument. The worker exits once it returns. When omitted, :func: `~os.fork` semantics apply
+        and the call returns `0` within the worker.
+        :param args: (Optional) Arguments passed to `func`.
+        :param kwargs: (Optional) Keyword arguments passed to `func`.
+        :return: Process id of the new worker when called from the parent.
+        """
+        # Keep the collector from touching shared pages between the fork and the worker adjusting
+        # its thresholds.
+        enabled = gc.isenabled()
+        gc.disable()
+        try:
+            pid = os.fork()
+        except OSError:
+            if enabled:
+                gc.enable()
+            raise
+
+        if pid:
+            if enabled:
+                gc.enable()
+            self.workers.append(pid)
+            self.log.info('Forked worker {0}'.format(pid))
+            return pid
+
+        if func is None:
+            self.forked()
+            return 0
+
+        # Nothing may raise out of the worker past this point, or it would carry on running
+        # the code of the parent.
+        status = 0
+        try:
+            self.forked()
+            func(self, *args, **kwargs)
+        except Exception:
+            self.log.exception('Worker encountered an unhandled exception')
+            status = 1
+        finally:
+            os._exit(status)
+
+    def forked(self):
+        """
+        Action called within a worker process immediately after it has been forked.
+        """
+        self.pid = os.getpid()
+        del self.workers[:]
+        if self.worker_gc_threshold is not None:
+            gc.set_threshold(*self.worker_gc_threshold)
+        gc.enable()
+        self.on_forked()
+
+    def reap(self):
+        """
+        Reap workers which have exited without blocking. Returns a list of `(pid, status)` tuples.
+        """
+        reaped = []
+        for pid in list(self.workers):
+            try:
+                wpid, status = os.waitpid(pid, os.WNOHANG)
+            except OSError:
+                wpid, status = pid, None
+            if wpid:
+                self.workers.remove(pid)
+                reaped.append((pid, status))
+        return reaped
+
+    def memory_usage(self):
+        """
+        Return a dict of `rss`, `pss`, `shared` and `private` memory usage in bytes for this process.
+        """
+        return get_memory_usage(self.pid)
+
+    def worker_memory_usage(self):
+        """
+        Return a dict keyed by worker process id which contains the `rss`, `pss`, `shared` and `private`
+        memory usage in bytes of every worker forked from this process.
+        """
+        return dict((pid, get_memory_usage(pid)) for pid in self.workers)
 
     def on_initializing(self, *args, **kwargs):
         """
@@ -123,12 +256,14 @@ class Process(Service):
 
         # Change process group.
         if self.group is not None:
+            import grp
             group = grp.getgrnam(self.group)
             self.gid = group.gr_gid
             os.setgid(self.gid)
 
         # Change process user, which implicitly changes to its group.
         if self.user is not None:
+            import pwd
             user = pwd.getpwnam(self.user)
             self.uid = user.pw_uid
             self.gid = user.pw_gid
@@ -136,7 +271,21 @@ class Process(Service):
             os.setuid(self.uid)
 
         # ...
-        self.package_importer.load()
+        self.package_importer.load(lazy=self.lazy_extensions)
+
+    def on_initialized(self, *args, **kwargs):
+        """
+        """
+        # Registry, extension imports and configuration are loaded, so everything allocated up to
+        # this point can be shared with workers.
+        if self.gc_freeze:
+            self.freeze()
+
+    def on_forked(self):
+        """
+        Callback raised within a worker process after it has been forked.
+        """
+        pass
 
     def on_stopped(self, *args, **kwargs):
         """
@@ -146,6 +295,8 @@ class Process(Service):
     def on_reloading(self, *args, **kwargs):
         """
         """
+        # Reloaded config may name packages installed since they were last imported.
+        invalidate_imports()
         self.config.from_file(self.config_file)
 
     @classmethod
@@ -170,6 +321,9 @@ class Daemon(Process):
 
     def __init__(self):
         super(Daemon, self).__init__()
+        # python-daemon is slow to import and only needed by daemons, so it isn't imported
+        # along with this module.
+        import daemon
         self.daemon = daemon.DaemonContext()
 
     def __enter__(self):
@@ -190,6 +344,9 @@ class Daemon(Process):
     def on_initialized(self, *args, **kwargs):
         """
         """
+        import daemon
+
+        super(Daemon, self).on_initialized(*args, **kwargs)
         self.daemon = daemon.DaemonContext(uid=self.uid,
                                            gid=self.gid,
                                            umask=self.msk,
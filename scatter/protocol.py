@@ -7,19 +7,27 @@
 """
 __all__ = []
 
-import uid
+import collections
+import threading
 
-from scatter.codec import Codec, CodecError, DecodingError, EncodingError
+from scatter.codec import CodecError, DecodingError, EncodingError
 from scatter.config import ConfigAttribute
 from scatter.descriptors import cached
+from scatter.exceptions import ScatterException
+from scatter.importer import import_from
 from scatter.service import Service
+from scatter.uid import uid
+
+
+#: Topic of messages which grant the peer credit to send more messages.
+CREDIT_TOPIC = 'flow.credit'
 
 
 class Message(object):
     """
 
     """
-    required_fields = 'sender_id msg_id, topic func args kwargs'.split()
+    required_fields = 'sender_id msg_id topic func args kwargs'.split()
 
     def __init__(self, **kwargs):
         self.__dict__.update(kwargs)
@@ -34,7 +42,7 @@ class Message(object):
         obj.setdefault('args', ())
         obj.setdefault('kwargs', {})
 
-        msg = dict((k, v) for (k, v) in obj if k in cls.required_fields)
+        msg = dict((k, v) for (k, v) in obj.iteritems() if k in cls.required_fields)
         if len(msg) < len(cls.required_fields):
             raise EncodingError('Packed message is missing required fields!')
         return msg
@@ -44,12 +52,15 @@ class Message(object):
         """
 
         """
-        msg = dict((k, v) for (k, v) in msg if k in cls.required_fields)
+        msg = dict((k, v) for (k, v) in msg.iteritems() if k in cls.required_fields)
         if len(msg) < len(cls.required_fields):
             raise DecodingError('Unpacked message is missing required fields!')
         return Message(**msg)
 
     def __getattr__(self, item):
+        # Special names must stay missing so copy/pickle fall back to their defaults.
+        if item.startswith('__'):
+            raise AttributeError(item)
         return self.__dict__.get(item, None)
 
     def __setattr__(self, key, value):
@@ -66,43 +77,59 @@ class Protocol(Service):
 
     """
 
-    #:
-    #:
-    message_class = ConfigAttribute()
+    #: The class used to pack and unpack messages.
+    #: Defaults to :class: `~scatter.protocol.Message`.
+    message_class = ConfigAttribute('scatter.protocol.Message')
 
-    #:
-    #:
-    use_compression = ConfigAttribute()
+    #: Toggle compressing encoded messages. Peers of a stream must both enable it.
+    #: Defaults to `False`.
+    use_compression = ConfigAttribute(False)
 
-    #:
-    #:
-    compression_class = ConfigAttribute()
+    #: The module, or class, whose `compress` and `decompress` functions are applied to encoded
+    #: messages when `use_compression` is set. Defaults to :mod: `zlib`.
+    compression_class = ConfigAttribute('zlib')
 
-    @cached
+    #: The class used to encode and decode messages to and from the wire.
+    #: Defaults to :class: `~scatter.codec.JsonCodec`.
+    codec_class = ConfigAttribute('scatter.codec.JsonCodec')
+
+    @cached(depends=('codec_class',))
     def codec(self):
-        return self.services.by_type(self.codec_class).first()
+        return import_from(self.codec_class)()
+
+    @cached(depends=('compression_class',))
+    def compression(self):
+        return import_from(self.compression_class)
 
     def encode(self, obj, codec=None):
         """
         """
         codec = codec or self.codec
-        msg = self.message_class.pack(**obj)
-        return codec.encode(msg)
+        msg = import_from(self.message_class).pack(**obj)
+        data = codec.encode(msg)
+        if self.use_compression:
+            data = self.compression.compress(data)
+        return data
 
     def decode(self, msg, codec=None):
         """
         """
         codec = codec or self.codec
+        if self.use_compression:
+            try:
+                msg = self.compression.decompress(msg)
+            except Exception as e:
+                raise DecodingError('Unable to decompress message. {0}'.format(e))
         msg = codec.decode(msg)
-        return self.message_class.unpack(**msg)
+        return import_from(self.message_class).unpack(**msg)
 
-    def on_initializing(self, *args, **kwargs):
+    def pack(self, obj):
         """
+        Create a message from the given fields without encoding it, for streams which
+        hand over message objects as-is.
         """
-        self.config.setdefault('MESSAGE_CLASS', Message)
-        self.config.setdefault('USE_COMPRESSION', False)
-        self.config.setdefault('COMPRESSION_CLASS', None) #TODO
-        self.config.setdefault('CODEC_CLASS', Codec)
+        cls = import_from(self.message_class)
+        return cls.unpack(**cls.pack(**obj))
 
     def on_starting(self, *args, **kwargs):
         pass
@@ -111,31 +138,207 @@ class Protocol(Service):
         pass
 
 
+class FlowControlError(ScatterException):
+    """
+    Raised when sending to a stream whose outbound backlog is at its high water mark.
+    """
+
+
+class FlowState(object):
+    """
+    Flow control state and buffered messages of a single stream handled by a
+    :class: `~scatter.protocol.MessageHandler`.
+    """
+
+    def __init__(self, credits=None):
+        #: Number of messages the peer allows us to send, `None` when flow control is disabled.
+        self.credits = credits
+        #: Outbound messages waiting for credit.
+        self.backlog = collections.deque()
+        #: Inbound messages waiting to be delivered while paused.
+        self.inbox = collections.deque()
+        #: Number of inbound messages delivered since credit was last granted to the peer.
+        self.consumed = 0
+        #: Delivery of inbound messages is paused.
+        self.paused = False
+        #: Parent was asked to pause sending to this stream.
+        self.throttled = False
+        #: Delivery of inbound messages is in progress.
+        self.draining = False
+
+    def occupancy(self):
+        return dict(credits=self.credits, backlog=len(self.backlog), pending=len(self.inbox),
+                    consumed=self.consumed, paused=self.paused, throttled=self.throttled)
+
+
 class MessageHandler(Service):
     """
 
+    ..Flow Control::
+        With `flow_control` enabled, a peer may send at most `credit_window` messages before it
+        must wait for more credit. Credit is granted with `flow.credit` messages once half of the
+        window has been delivered to the parent, so a slow `on_msg_recv` holds back the sender
+        rather than buffering without bound. Sends beyond the window are held in a backlog; the
+        parent is asked to pause sending to the stream, through its `on_stream_pause` and
+        `on_stream_resume` callbacks, as the backlog crosses its high and low water marks.
+
+        The parent may also call :meth: `~scatter.protocol.MessageHandler.pause` to stop
+        delivery of inbound messages. Those are then queued and the stream stops reading once
+        the queue reaches its high water mark.
     """
 
-    #:
-    #:
-    protocol_class = ConfigAttribute()
+    #: The class used to encode and decode messages of handled streams.
+    #: Defaults to :class: `~scatter.protocol.Protocol`.
+    protocol_class = ConfigAttribute('scatter.protocol.Protocol')
+
+    #: Toggle credit based flow control of handled streams. Peers of a stream must both enable
+    #: it. Defaults to `False`.
+    flow_control = ConfigAttribute(False)
+
+    #: Set the number of messages a peer may send before waiting for more credit. Defaults to `256`.
+    credit_window = ConfigAttribute(256)
+
+    #: Set the number of messages waiting for credit at which the parent is asked to pause
+    #: sending to a stream. Sends raise :class: `~scatter.protocol.FlowControlError` beyond it.
+    #: Defaults to `1024`.
+    outbound_high_water = ConfigAttribute(1024)
+
+    #: Set the number of messages waiting for credit at which the parent is told it may resume
+    #: sending to a stream. Defaults to `256`.
+    outbound_low_water = ConfigAttribute(256)
+
+    #: Set the number of inbound messages queued while paused at which the stream stops
+    #: reading. Defaults to `1024`.
+    inbound_high_water = ConfigAttribute(1024)
+
+    #: Set the number of inbound messages queued while paused at which the stream starts
+    #: reading again. Defaults to `256`.
+    inbound_low_water = ConfigAttribute(256)
+
+    @cached
+    def flows(self):
+        """
+        Dict of :class: `~scatter.protocol.FlowState` instances keyed by handled stream.
+        """
+        return {}
 
     @cached
+    def flow_lock(self):
+        return threading.RLock()
+
+    @cached(depends=('protocol_class',))
     def protocol(self):
-        return self.services.by_type(self.protocol_class).first()
+        cls = import_from(self.protocol_class)
+        return self.services.by_type(cls).first() or self.child(cls)
+
+    def register(self, stream):
+        """
+        Wire the send, receive and close events of the given stream to this handler.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to handle messages of.
+        """
+        self.flows[stream] = FlowState(self.credit_window if self.flow_control else None)
+        stream.on_recv(self.on_recv_callback)
+        stream.on_send(self.on_send_callback)
+        stream.on_close(self.on_close_callback)
+        return stream
+
+    def send(self, stream, **obj):
+        """
+        Encode and send a message through the given stream.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to send the message through.
+        :param obj: Message fields.
+        """
+        obj.setdefault('sender_id', self.id)
+        if stream.encoded:
+            msg = self.protocol.encode(obj, stream.codec)
+        else:
+            msg = self.protocol.pack(obj)
+
+        flow = self.flows.get(stream)
+        if flow is None or flow.credits is None:
+            return stream.send(msg)
+
+        with self.flow_lock:
+            if flow.credits > 0 and not flow.backlog:
+                flow.credits -= 1
+                return stream.send(msg)
+            if len(flow.backlog) >= self.outbound_high_water:
+                raise FlowControlError('Outbound backlog of {0} is full'.format(stream))
+            flow.backlog.append(msg)
+            throttle = not flow.throttled and len(flow.backlog) >= self.outbound_high_water
+            if throttle:
+                flow.throttled = True
+
+        if throttle:
+            self._notify('on_stream_pause', stream)
+
+    def flush(self, stream):
+        """
+        Write messages buffered by the given stream now instead of waiting for more to
+        coalesce with. Call this after sending latency sensitive messages.
+
+        :param stream: :class: `~scatter.stream.Stream` instance handled by this handler.
+        """
+        flush = getattr(stream, 'flush', None)
+        if flush is not None:
+            flush()
+
+    def pause(self, stream):
+        """
+        Stop delivering messages received through the given stream to the parent.
+
+        :param stream: :class: `~scatter.stream.Stream` instance handled by this handler.
+        """
+        self.flows[stream].paused = True
+
+    def resume(self, stream):
+        """
+        Deliver messages received through the given stream again after
+        :meth: `~scatter.protocol.MessageHandler.pause`.
+
+        :param stream: :class: `~scatter.stream.Stream` instance handled by this handler.
+        """
+        flow = self.flows.get(stream)
+        if flow is not None and flow.paused:
+            flow.paused = False
+            self._deliver(stream, flow)
+
+    def occupancy(self, stream=None):
+        """
+        Return a dict of the messages buffered for the given stream, including those buffered by
+        the stream itself, or a dict of those of every handled stream keyed by stream.
+
+        :param stream: (Optional) :class: `~scatter.stream.Stream` instance handled by this handler.
+        """
+        if stream is None:
+            return dict((s, self.occupancy(s)) for s in self.flows.keys())
+
+        occupancy = self.flows[stream].occupancy()
+        stream_occupancy = getattr(stream, 'occupancy', None)
+        if stream_occupancy is not None:
+            occupancy['stream'] = stream_occupancy()
+        return occupancy
 
     def on_recv_callback(self, stream, msg):
         """
         """
         try:
-            msg = self.protocol.decode(msg, stream.codec)
+            if stream.encoded:
+                msg = self.protocol.decode(msg, stream.codec)
         except CodecError as e:
             self.log.error('Unable to decode message. {0}'.format(e.message))
-        else:
-            try:
-                self.parent.on_msg_recv(stream, msg)
-            except Exception as e:
-                self.log.error('Exception raised in on_msg_recv callback. {0}'.format(e.message))
+            return
+
+        flow = self.flows.get(stream)
+        if flow is None:
+            return self._dispatch(stream, msg)
+        if msg.topic == CREDIT_TOPIC and flow.credits is not None:
+            return self._credit(stream, flow, msg.args[0])
+
+        flow.inbox.append(msg)
+        self._deliver(stream, flow)
 
     def on_send_callback(self, stream, msg):
         """
@@ -145,10 +348,88 @@ class MessageHandler(Service):
         except Exception as e:
             self.log.error('Exception raised in on_msg_send callback. {0}'.format(e.message))
 
-    def on_initializing(self, *args, **kwargs):
+    def on_close_callback(self, stream):
         """
         """
-        self.config.setdefault('PROTOCOL_CLASS', Protocol)
+        self.flows.pop(stream, None)
+        self._notify('on_stream_close', stream)
+
+    def _dispatch(self, stream, msg):
+        """
+        Pass a received message to the parent.
+        """
+        try:
+            self.parent.on_msg_recv(stream, msg)
+        except Exception as e:
+            self.log.error('Exception raised in on_msg_recv callback. {0}'.format(e.message))
+
+    def _deliver(self, stream, flow):
+        """
+        Pass queued inbound messages of the given stream to the parent until paused and grant
+        the peer more credit as they are consumed.
+        """
+        # Messages received from within on_msg_recv are delivered by the outermost call.
+        if flow.draining:
+            return
+
+        flow.draining = True
+        try:
+            while flow.inbox and not flow.paused:
+                self._dispatch(stream, flow.inbox.popleft())
+                if flow.credits is not None:
+                    flow.consumed += 1
+                    if flow.consumed >= max(self.credit_window // 2, 1):
+                        self._grant(stream, flow)
+        finally:
+            flow.draining = False
+
+        pending = len(flow.inbox)
+        if pending >= self.inbound_high_water:
+            getattr(stream, 'pause_reading', lambda: None)()
+        elif pending <= self.inbound_low_water:
+            getattr(stream, 'resume_reading', lambda: None)()
+
+    def _grant(self, stream, flow):
+        """
+        Grant the peer credit for every message consumed since the last grant.
+        """
+        consumed, flow.consumed = flow.consumed, 0
+        obj = dict(sender_id=self.id, topic=CREDIT_TOPIC, func='credit', args=[consumed], kwargs={})
+        try:
+            if stream.encoded:
+                stream.send(self.protocol.encode(obj, stream.codec))
+            else:
+                stream.send(self.protocol.pack(obj))
+        except Exception as e:
+            self.log.error('Unable to grant credit to {0}. {1}'.format(stream, e))
+
+    def _credit(self, stream, flow, credits):
+        """
+        Add credit granted by the peer and send as much of the backlog as it allows.
+        """
+        with self.flow_lock:
+            flow.credits += credits
+            while flow.backlog and flow.credits > 0:
+                flow.credits -= 1
+                stream.send(flow.backlog.popleft())
+            resume = flow.throttled and len(flow.backlog) <= self.outbound_low_water
+            if resume:
+                flow.throttled = False
+
+        if resume:
+            self._notify('on_stream_resume', stream)
+
+    def _notify(self, name, stream):
+        """
+        Call the optional stream callback of the given name on the parent.
+        """
+        callback = getattr(self.parent, name, None)
+        if callback is None:
+            return
+        try:
+            callback(stream)
+        except Exception as e:
+            self.log.error('Exception raised in {0} callback. {1}'.format(name, e.message))
 
 
 
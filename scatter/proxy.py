@@ -7,7 +7,13 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ('Proxy',)
+__all__ = ('Proxy', 'proxy_type', 'proxy_for')
+
+
+import inspect
+import threading
+import types
+import weakref
 
 
 class Proxy(object):
@@ -211,3 +217,129 @@ class Proxy(object):
 
     def __rdivmod__(self, other):
         return self.__real__.__rdivmod__(other)
+
+
+#: Specialized proxy classes keyed by the type they proxy.
+PROXY_TYPES = weakref.WeakKeyDictionary()
+
+#: Lock which serializes generation of proxy classes.
+PROXY_TYPES_LOCK = threading.Lock()
+
+#: Read the proxied object of a :class: `~scatter.proxy.Proxy` straight from its slot.
+proxy_real = Proxy.__dict__['__real__'].__get__
+
+#: Names used by generated forwarding methods which must not clash with their arguments.
+FORWARD_FUNC, FORWARD_REAL = '_proxy_func_', '_proxy_real_'
+
+
+def proxy_type(cls):
+    """
+    Return the :class: `~scatter.proxy.Proxy` subclass specialized for instances of the given type.
+
+    Every method, property and slot defined by the type and its bases is forwarded by a generated
+    attribute of the proxy class, which calls the function of the type directly with the proxied
+    object instead of resolving it through `__getattr__` on every use. Anything else, ex: instance
+    attributes and class or static methods, falls back to the generic `__getattr__` forwarding.
+    Proxy classes are generated once per type.
+
+    Methods are bound per type, so methods replaced on the proxied instance itself aren't seen.
+
+    :param cls: Type of the objects to proxy.
+    """
+    try:
+        return PROXY_TYPES[cls]
+    except (KeyError, TypeError):
+        pass
+    if not isinstance(cls, type):
+        # Old-style classes can't be specialized.
+        return Proxy
+
+    with PROXY_TYPES_LOCK:
+        proxy_cls = PROXY_TYPES.get(cls)
+        if proxy_cls is None:
+            proxy_cls = PROXY_TYPES[cls] = _build_proxy_type(cls)
+    return proxy_cls
+
+
+def proxy_for(obj):
+    """
+    Return a proxy of the given object specialized for its type.
+    See :func: `~scatter.proxy.proxy_type`.
+
+    :param obj: Object to proxy.
+    """
+    return proxy_type(type(obj))(obj)
+
+
+def _build_proxy_type(cls):
+    namespace = dict(__slots__=(), __module__=__name__,
+                     __doc__='Proxy specialized for instances of :class: `{0}.{1}`.'.format(cls.__module__,
+                                                                                         cls.__name__))
+    seen = set()
+    for klass in inspect.getmro(cls):
+        if klass is object:
+            continue
+        for name, value in vars(klass).iteritems():
+            if name in seen:
+                continue
+            # The nearest definition wins, even if it isn't one which can be forwarded.
+            seen.add(name)
+            if name.startswith('__') and name.endswith('__'):
+                continue
+            if isinstance(value, types.FunctionType):
+                namespace[name] = _forward_method(value)
+            elif isinstance(value, property) and value.fget is not None:
+                namespace[name] = _forward_getter(value.fget)
+            elif isinstance(value, types.MemberDescriptorType):
+                namespace[name] = _forward_getter(value.__get__)
+    return type('{0}Proxy'.format(cls.__name__), (Proxy,), namespace)
+
+
+def _forward_getter(getter):
+    """
+    Return a property which reads a value of the proxied object through the given getter.
+    Setting and deleting are forwarded by the proxy `__setattr__` and `__delattr__`.
+    """
+    return property(lambda self: getter(proxy_real(self)))
+
+
+def _forward_method(func):
+    """
+    Return a method which calls the given function with the proxied object and the same signature.
+    """
+    try:
+        args, varargs, varkw, defaults = inspect.getargspec(func)
+    except TypeError:
+        args, varargs, varkw, defaults = [], 'args', 'kwargs', None
+
+    # Methods with unusual signatures, ex: tuple arguments, are forwarded as is.
+    names = args + [varargs, varkw]
+    if not args or FORWARD_FUNC in names or FORWARD_REAL in names or not all(isinstance(a, str) for a in args):
+        args, varargs, varkw, defaults = ['self'], 'args', 'kwargs', None
+
+    namespace = {FORWARD_FUNC: func, FORWARD_REAL: proxy_real}
+    params, passed = [args[0]], ['{0}({1})'.format(FORWARD_REAL, args[0])]
+    first_default = len(args) - len(defaults or ())
+    for index, arg in enumerate(args[1:], 1):
+        if index >= first_default:
+            default = '_proxy_default_{0}_'.format(index)
+            namespace[default] = defaults[index - first_default]
+            params.append('{0}={1}'.format(arg, default))
+        else:
+            params.append(arg)
+        passed.append(arg)
+    if varargs:
+        params.append('*' + varargs)
+        passed.append('*' + varargs)
+    if varkw:
+        params.append('**' + varkw)
+        passed.append('**' + varkw)
+
+    # Compiled under a fixed name, as the function name needn't be an identifier, ex: lambdas.
+    source = 'def _proxy_method_({0}):\n    return {1}({2})\n'.format(', '.join(params), FORWARD_FUNC,
+                                                                  ', '.join(passed))
+    exec compile(source, '<proxy of {0}>'.format(func.__name__), 'exec') in namespace
+    method = namespace['_proxy_method_']
+    method.__name__ = func.__name__
+    method.__doc__ = func.__doc__
+    return method
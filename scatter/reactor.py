@@ -0,0 +1,396 @@
+"""
+    scatter.reactor
+    ~~~~~~~~~~~~~~~
+
+    Implements a service which multiplexes I/O readiness events of many streams
+    on a single thread.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('Reactor', 'Timer', 'EVENT_READ', 'EVENT_WRITE')
+
+
+import collections
+import errno
+import heapq
+import os
+import select
+import threading
+import time
+
+from scatter.config import ConfigAttribute
+from scatter.descriptors import cached, invalidate
+from scatter.importer import import_from
+from scatter.service import Service
+
+
+#: Event mask set when a file descriptor is ready to be read from.
+EVENT_READ = 1
+
+#: Event mask set when a file descriptor is ready to be written to.
+EVENT_WRITE = 2
+
+
+class EpollSelector(object):
+    """
+    Selector backed by :func: `~select.epoll` which scales with the number of ready
+    file descriptors rather than the number registered.
+    """
+
+    def __init__(self):
+        self.epoll = select.epoll()
+
+    def register(self, fd, events):
+        self.epoll.register(fd, self._to_epoll(events))
+
+    def modify(self, fd, events):
+        self.epoll.modify(fd, self._to_epoll(events))
+
+    def unregister(self, fd):
+        self.epoll.unregister(fd)
+
+    def select(self, timeout=None):
+        try:
+            ready = self.epoll.poll(-1 if timeout is None else timeout)
+        except (IOError, OSError) as e:
+            if e.errno != errno.EINTR:
+                raise
+            return []
+        return [(fd, self._from_epoll(events)) for fd, events in ready]
+
+    def close(self):
+        self.epoll.close()
+
+    @staticmethod
+    def _to_epoll(events):
+        mask = 0
+        if events & EVENT_READ:
+            mask |= select.EPOLLIN
+        if events & EVENT_WRITE:
+            mask |= select.EPOLLOUT
+        return mask
+
+    @staticmethod
+    def _from_epoll(mask):
+        events = 0
+        if mask & (select.EPOLLIN | select.EPOLLERR | select.EPOLLHUP):
+            events |= EVENT_READ
+        if mask & (select.EPOLLOUT | select.EPOLLERR | select.EPOLLHUP):
+            events |= EVENT_WRITE
+        return events
+
+
+class SelectSelector(object):
+    """
+    Selector backed by :func: `~select.select` for platforms without `epoll`.
+    """
+
+    def __init__(self):
+        self.fds = {}
+
+    def register(self, fd, events):
+        self.fds[fd] = events
+
+    def modify(self, fd, events):
+        self.fds[fd] = events
+
+    def unregister(self, fd):
+        del self.fds[fd]
+
+    def select(self, timeout=None):
+        readers = [fd for fd, events in self.fds.iteritems() if events & EVENT_READ]
+        writers = [fd for fd, events in self.fds.iteritems() if events & EVENT_WRITE]
+        try:
+            readable, writable, _ = select.select(readers, writers, [], timeout)
+        except select.error as e:
+            if e.args[0] != errno.EINTR:
+                raise
+            return []
+
+        ready = collections.defaultdict(int)
+        for fd in readable:
+            ready[fd] |= EVENT_READ
+        for fd in writable:
+            ready[fd] |= EVENT_WRITE
+        return ready.items()
+
+    def close(self):
+        self.fds.clear()
+
+
+DefaultSelector = EpollSelector if hasattr(select, 'epoll') else SelectSelector
+
+
+class Timer(object):
+    """
+    Callable scheduled to run on the reactor thread once its deadline has passed.
+    """
+
+    __slots__ = ('deadline', 'func', 'args', 'kwargs', 'cancelled')
+
+    def __init__(self, deadline, func, args, kwargs):
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.cancelled = False
+
+    def __lt__(self, other):
+        return self.deadline < other.deadline
+
+    def cancel(self):
+        """
+        Prevent the timer from running if it hasn't already.
+        """
+        self.cancelled = True
+
+
+class Reactor(Service):
+    """
+    Service which waits on readiness events for all registered streams and dispatches them
+    from a single thread.
+
+    Registered objects must expose `fileno()` and `handle_events(events)`.
+    """
+
+    #: The class used to wait on readiness events.
+    #: Defaults to :class: `~scatter.reactor.EpollSelector` where available.
+    selector_class = ConfigAttribute(DefaultSelector)
+
+    #: Set the maximum number of seconds to block waiting on events before checking
+    #: the service state. Defaults to `1` second.
+    poll_timeout = ConfigAttribute(1.0)
+
+    #: Toggle running the event loop on a dedicated thread when the service starts. Set this
+    #: to `False` to drive the loop by calling :meth: `~scatter.reactor.Reactor.run` instead.
+    #: Defaults to `True`.
+    threaded = ConfigAttribute(True)
+
+    #: Thread which runs the event loop when `threaded` is set.
+    thread = None
+
+    @cached
+    def selector(self):
+        """
+        Selector used to wait on readiness events of registered file descriptors.
+        """
+        return import_from(self.selector_class)()
+
+    @cached
+    def handlers(self):
+        """
+        Dict of registered objects keyed by file descriptor.
+        """
+        return {}
+
+    @cached
+    def callbacks(self):
+        """
+        Queue of callables to run on the reactor thread.
+        """
+        return collections.deque()
+
+    @cached
+    def timers(self):
+        """
+        Heap of :class: `~scatter.reactor.Timer` instances ordered by deadline.
+        """
+        return []
+
+    @cached
+    def timers_lock(self):
+        return threading.Lock()
+
+    @cached
+    def waker(self):
+        """
+        Pipe used to wake up the event loop from other threads.
+        """
+        read, write = os.pipe()
+        for fd in (read, write):
+            _set_nonblocking(fd)
+        self.selector.register(read, EVENT_READ)
+        return read, write
+
+    def register(self, handler, events=EVENT_READ):
+        """
+        Start dispatching the given readiness events of the given handler.
+
+        :param handler: Object which exposes `fileno()` and `handle_events(events)`.
+        :param events: (Optional) Mask of events to wait for. Defaults to `EVENT_READ`.
+        """
+        fd = handler.fileno()
+        self.handlers[fd] = handler
+        self.selector.register(fd, events)
+
+    def modify(self, handler, events):
+        """
+        Change the readiness events dispatched to the given, already registered, handler.
+
+        :param handler: Object which exposes `fileno()` and `handle_events(events)`.
+        :param events: Mask of events to wait for.
+        """
+        self.selector.modify(handler.fileno(), events)
+
+    def unregister(self, handler):
+        """
+        Stop dispatching readiness events to the given handler.
+
+        :param handler: Object which exposes `fileno()` and `handle_events(events)`.
+        """
+        fd = handler.fileno()
+        if self.handlers.pop(fd, None) is not None:
+            self.selector.unregister(fd)
+
+    def in_reactor(self):
+        """
+        Returns `True` if called from the thread running the event loop or when no
+        thread is running it.
+        """
+        return not self.thread or self.thread is threading.current_thread()
+
+    def call_soon(self, func, *args, **kwargs):
+        """
+        Run the given callable on the reactor thread during its next loop iteration. This is
+        the only reactor function which is safe to call from other threads.
+
+        :param func: Callable to run.
+        """
+        self.callbacks.append((func, args, kwargs))
+        if not self.in_reactor():
+            self.wakeup()
+
+    def call_later(self, delay, func, *args, **kwargs):
+        """
+        Run the given callable on the reactor thread once the given number of seconds have passed.
+        This is safe to call from other threads.
+
+        :param delay: Number of seconds to wait before running the callable.
+        :param func: Callable to run.
+        :return: :class: `~scatter.reactor.Timer` which can be cancelled.
+        """
+        timer = Timer(time.time() + delay, func, args, kwargs)
+        with self.timers_lock:
+            heapq.heappush(self.timers, timer)
+            first = self.timers[0] is timer
+        if first and not self.in_reactor():
+            self.wakeup()
+        return timer
+
+    def wakeup(self):
+        """
+        Interrupt the event loop if it is blocked waiting on events.
+        """
+        try:
+            os.write(self.waker[1], 'x')
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+    def run_once(self, timeout=None):
+        """
+        Wait up to the given number of seconds for readiness events and dispatch them.
+
+        :param timeout: (Optional) Number of seconds to wait. Defaults to `None` which blocks.
+        """
+        if self.callbacks:
+            timeout = 0
+        elif self.timers:
+            delay = max(self.timers[0].deadline - time.time(), 0)
+            timeout = delay if timeout is None else min(timeout, delay)
+
+        waker = self.waker[0]
+        for fd, events in self.selector.select(timeout):
+            if fd == waker:
+                self._drain_waker()
+                continue
+
+            handler = self.handlers.get(fd)
+            if handler is None:
+                continue
+            try:
+                handler.handle_events(events)
+            except Exception:
+                self.log.exception('Exception raised handling events of {0}'.format(handler))
+
+        for _ in xrange(len(self.callbacks)):
+            func, args, kwargs = self.callbacks.popleft()
+            try:
+                func(*args, **kwargs)
+            except Exception:
+                self.log.exception('Exception raised in reactor callback {0}'.format(func))
+
+        if self.timers:
+            self._run_timers(time.time())
+
+    def run(self):
+        """
+        Run the event loop until the service is stopped.
+        """
+        while self.running() and self.thread is not False:
+            self.run_once(self.poll_timeout)
+
+    def on_started(self, *args, **kwargs):
+        """
+        """
+        if self.threaded:
+            self.thread = threading.Thread(target=self.run, name='{0}-reactor'.format(self.name))
+            self.thread.daemon = True
+            self.thread.start()
+
+    def on_stopping(self, *args, **kwargs):
+        """
+        """
+        thread, self.thread = self.thread, False
+        if thread is not None:
+            self.wakeup()
+            if thread is not threading.current_thread():
+                thread.join(self.stop_timeout)
+
+    def on_stopped(self, *args, **kwargs):
+        """
+        """
+        for handler in self.handlers.values():
+            close = getattr(handler, 'close', None)
+            if close is not None:
+                close()
+        for fd in self.waker:
+            os.close(fd)
+        self.selector.close()
+        # A restarted reactor needs a new selector and waker rather than the closed ones.
+        invalidate(self, 'waker', 'selector', 'handlers')
+
+    def _run_timers(self, now):
+        """
+        Run every timer whose deadline has passed.
+        """
+        timers, due = self.timers, []
+        with self.timers_lock:
+            while timers and timers[0].deadline <= now:
+                due.append(heapq.heappop(timers))
+
+        for timer in due:
+            if timer.cancelled:
+                continue
+            try:
+                timer.func(*timer.args, **timer.kwargs)
+            except Exception:
+                self.log.exception('Exception raised in reactor timer {0}'.format(timer.func))
+
+    def _drain_waker(self):
+        try:
+            while os.read(self.waker[0], 4096):
+                pass
+        except OSError as e:
+            if e.errno != errno.EAGAIN:
+                raise
+
+
+def _set_nonblocking(fd):
+    """
+    Put the given file descriptor in non-blocking mode.
+    """
+    import fcntl
+    flags = fcntl.fcntl(fd, fcntl.F_GETFL)
+    fcntl.fcntl(fd, fcntl.F_SETFL, flags | os.O_NONBLOCK)
@@ -0,0 +1,195 @@
+"""
+    scatter.remote
+    ~~~~~~~~~~~~~~
+
+    Implements proxies to services which live in other processes.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('RemoteProxy', 'RemoteMethod', 'Pipeline')
+
+
+import inspect
+
+from scatter.meta import resolve_type
+from scatter.rpc import DESCRIBE_FUNC, qualify
+
+
+class RemoteProxy(object):
+    """
+    Proxy to a service served by a :class: `~scatter.rpc.RpcServer` in another process.
+
+    Calling a method of the proxy calls the method of the same name on the remote service and
+    returns its result, so callers don't need to know which process a service lives in. Attributes
+    of a service which never change, `id`, `name`, `fully_qualified_type` and `exports()`, are
+    fetched with a single call the first time any of them, or a method, is accessed.
+    """
+
+    __slots__ = ('_client', '_stream', '_ref', '_timeout', '_description', '_methods')
+
+    def __init__(self, client, stream, ref=None, timeout=None):
+        if inspect.isclass(ref):
+            ref = resolve_type(ref)
+        object.__setattr__(self, '_client', client)
+        object.__setattr__(self, '_stream', stream)
+        object.__setattr__(self, '_ref', ref)
+        object.__setattr__(self, '_timeout', timeout)
+        object.__setattr__(self, '_description', None)
+        object.__setattr__(self, '_methods', {})
+
+    @property
+    def id(self):
+        return self._describe()['id']
+
+    @property
+    def name(self):
+        return self._describe()['name']
+
+    @property
+    def fully_qualified_type(self):
+        return self._describe()['fully_qualified_type']
+
+    def exports(self):
+        """
+        Dict of all methods exported by the remote service.
+        """
+        return dict((name, getattr(self, name)) for name in self._describe()['exports'])
+
+    def pipeline(self):
+        """
+        Return a :class: `~scatter.remote.Pipeline` which calls methods of the remote service
+        without waiting for their replies.
+        """
+        return Pipeline(self)
+
+    def __getattr__(self, item):
+        method = self._methods.get(item)
+        if method is None:
+            if item not in self._describe()['exports']:
+                raise AttributeError('{0} does not export {1}'.format(self, item))
+            method = self._methods[item] = RemoteMethod(self, item)
+        return method
+
+    def __setattr__(self, key, value):
+        raise AttributeError('Attributes of remote services cannot be set')
+
+    def __dir__(self):
+        return sorted(set(dir(type(self)) + list(self._describe()['exports'])))
+
+    def __eq__(self, other):
+        return isinstance(other, RemoteProxy) and self.id == other.id
+
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.id)
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self._ref or self._stream)
+
+    def _describe(self):
+        """
+        Return the description of the remote service, fetching it on first use.
+        """
+        description = self._description
+        if description is None:
+            future = self._client.call_async(self._stream, DESCRIBE_FUNC, [self._ref], timeout=self._timeout)
+            description = future.result()
+            object.__setattr__(self, '_description', description)
+        return description
+
+
+class RemoteMethod(object):
+    """
+    Callable which calls a method of a remote service and blocks until its result is returned.
+    """
+
+    __slots__ = ('proxy', 'name', 'func')
+
+    def __init__(self, proxy, name):
+        self.proxy = proxy
+        self.name = name
+        self.func = qualify(proxy._ref, name)
+
+    def __call__(self, *args, **kwargs):
+        return self.future(*args, **kwargs).result()
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.func)
+
+    def future(self, *args, **kwargs):
+        """
+        Call the remote method and return a :class: `~scatter.rpc.Future` of its result
+        without waiting for it.
+        """
+        proxy = self.proxy
+        return proxy._client.call_async(proxy._stream, self.func, args, kwargs, proxy._timeout)
+
+    def cast(self, *args, **kwargs):
+        """
+        Call the remote method without waiting for, or receiving, its result.
+        """
+        proxy = self.proxy
+        proxy._client.cast(proxy._stream, self.func, *args, **kwargs)
+
+
+class Pipeline(object):
+    """
+    Calls methods of a remote service without waiting for their replies.
+
+    Every call returns a :class: `~scatter.rpc.Future` right away which may be passed as an
+    argument of later calls. The server passes the result in its place, so a chain of dependent
+    calls costs a single round trip. Calls are flushed together when the pipeline exits.
+
+    ..Example::
+        with remote.pipeline() as pipe:
+            total = pipe.add(pipe.add(1, 2), 3)
+        total.result()
+    """
+
+    def __init__(self, proxy):
+        self.proxy = proxy
+        self.futures = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.flush()
+
+    def __getattr__(self, item):
+        if item.startswith('_'):
+            raise AttributeError(item)
+        getattr(self.proxy, item)
+        return lambda *args, **kwargs: self.call(item, args, kwargs)
+
+    def call(self, name, args=(), kwargs=None):
+        """
+        Send a call of the given method of the remote service and return a :class: `~scatter.rpc.Future`
+        of its result.
+
+        :param name: Name of the remote method.
+        :param args: (Optional) Positional arguments of the call.
+        :param kwargs: (Optional) Keyword arguments of the call.
+        """
+        proxy = self.proxy
+        future = proxy._client.call_async(proxy._stream, qualify(proxy._ref, name), args, kwargs,
+                                          proxy._timeout, pipeline=True)
+        self.futures.append(future)
+        return future
+
+    def flush(self):
+        """
+        Write every call sent through the pipeline which is still buffered by the stream.
+        """
+        proxy = self.proxy
+        proxy._client.handler.flush(proxy._stream)
+
+    def results(self):
+        """
+        Flush the pipeline and return a list of the results of every call in the order they were sent.
+        """
+        self.flush()
+        return [future.result() for future in self.futures]
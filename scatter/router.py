@@ -0,0 +1,124 @@
+"""
+    scatter.router
+    ~~~~~~~~~~~~~~
+
+    Implements a service which dispatches received messages to subscribers by topic.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('TopicRouter',)
+
+
+import threading
+
+from scatter.config import ConfigAttribute
+from scatter.descriptors import cached
+from scatter.protocol import MessageHandler
+from scatter.service import Service
+from scatter.structures import TopicTrie
+
+
+class TopicRouter(Service):
+    """
+    Service which passes every message received through its streams to the callbacks
+    subscribed to a pattern matching the message topic. See :class: `~scatter.structures.TopicTrie`
+    for the pattern syntax.
+
+    Every subscriber receives the same decoded :class: `~scatter.protocol.Message` instance.
+    Subscription changes swap in a new trie at once, so messages being routed see either
+    all or none of a change.
+    """
+
+    #: Set the maximum number of topics whose subscribers are cached. Defaults to `1024`.
+    route_cache_size = ConfigAttribute(1024)
+
+    @cached
+    def handler(self):
+        return self.services.by_type(MessageHandler).first() or self.child(MessageHandler)
+
+    @cached
+    def routes(self):
+        """
+        Trie of subscribed callbacks and cache of callbacks by topic matched against it.
+        Both are replaced together whenever subscriptions change.
+        """
+        return TopicTrie(), {}
+
+    @cached
+    def lock(self):
+        """
+        Lock which serializes subscription changes.
+        """
+        return threading.Lock()
+
+    def register(self, stream):
+        """
+        Start routing messages received through the given stream.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to route messages of.
+        """
+        return self.handler.register(stream)
+
+    def subscribe(self, pattern, func):
+        """
+        Call the given function with every message whose topic matches the given pattern.
+
+        :param pattern: Dot separated topic pattern, ex: `service.*.started` or `service.#`.
+        :param func: Callable which takes the stream and message as arguments.
+        """
+        with self.lock:
+            self.routes = (self.routes[0].add(pattern, func), {})
+
+    def unsubscribe(self, pattern, func):
+        """
+        Stop calling the given function with messages matching the given pattern.
+
+        :param pattern: Dot separated topic pattern the function was subscribed with.
+        :param func: Callable previously subscribed with the pattern.
+        """
+        with self.lock:
+            self.routes = (self.routes[0].remove(pattern, func), {})
+
+    def subscribers(self, topic):
+        """
+        Return a tuple of callbacks subscribed to patterns which match the given topic.
+
+        :param topic: Dot separated topic.
+        """
+        trie, cache = self.routes
+        subscribers = cache.get(topic)
+        if subscribers is None:
+            subscribers = trie.match(topic)
+            if len(cache) < self.route_cache_size:
+                cache[topic] = subscribers
+        return subscribers
+
+    def route(self, stream, msg):
+        """
+        Pass the given message to every callback subscribed to its topic.
+
+        :param stream: :class: `~scatter.stream.Stream` the message was received through.
+        :param msg: :class: `~scatter.protocol.Message` to route.
+        """
+        for func in self.subscribers(msg.topic or ''):
+            try:
+                func(stream, msg)
+            except Exception:
+                self.log.exception('Exception raised by subscriber of {0}'.format(msg.topic))
+
+    def on_initialized(self, *args, **kwargs):
+        """
+        """
+        # Attach the handler now so it is started and stopped along with the router.
+        self.handler
+
+    def on_msg_recv(self, stream, msg):
+        """
+        """
+        self.route(stream, msg)
+
+    def on_msg_send(self, stream, msg):
+        """
+        """
+        pass
@@ -0,0 +1,645 @@
+"""
+    scatter.rpc
+    ~~~~~~~~~~~
+
+    Implements request/response calls between services on top of the scatter protocol.
+
+    ..Messages::
+        Requests are sent with the `rpc.call` topic, or `rpc.cast` when no reply is wanted,
+        and name the remote method by `func`. Replies reuse the `msg_id` of their request
+        with the `rpc.reply` topic and the result as the only argument, or the `rpc.error`
+        topic with the exception type name and message as arguments.
+
+        Calls to a service other than the target of the server name it by path, id or fully
+        qualified type ahead of the method, ex: `myapp.services.Db:query` or `/app/db:query`. Calls sent with the `rpc.pipeline`
+        topic are remembered by the server so later calls through the same stream may pass their
+        result as an argument, written as `{"rpc.result": msg_id}`, without waiting for the reply.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('RpcClient', 'RpcServer', 'RpcError', 'Future', 'export', 'qualify',
+           'CALL_TOPIC', 'CAST_TOPIC', 'PIPELINE_TOPIC', 'REPLY_TOPIC', 'ERROR_TOPIC')
+
+
+import collections
+import heapq
+import inspect
+import threading
+import time
+import weakref
+
+from scatter import transport
+from scatter.config import ConfigAttribute
+from scatter.descriptors import cached
+from scatter.exceptions import ScatterException, ScatterTimeout
+from scatter.importer import import_from
+from scatter.index import PATH_SEP
+from scatter.protocol import MessageHandler
+from scatter.service import Service
+from scatter.uid import uid
+
+
+#: Topic of requests which expect a reply.
+CALL_TOPIC = 'rpc.call'
+
+#: Topic of requests which don't expect a reply.
+CAST_TOPIC = 'rpc.cast'
+
+#: Topic of requests which expect a reply and whose result may be used by later requests.
+PIPELINE_TOPIC = 'rpc.pipeline'
+
+#: Topic of replies which carry the result of a call.
+REPLY_TOPIC = 'rpc.reply'
+
+#: Topic of replies which carry the exception raised by a call.
+ERROR_TOPIC = 'rpc.error'
+
+#: Name of the call which describes a service served by a server.
+DESCRIBE_FUNC = 'rpc.describe'
+
+#: Separates the service reference from the method name of a call.
+ADDRESS_SEP = ':'
+
+#: Key of the dict which stands in for the result of an earlier pipelined call.
+PROMISE_KEY = 'rpc.result'
+
+#: Attribute which marks functions decorated with :func: `~scatter.rpc.export`.
+EXPORT_ATTR = '__rpc_export__'
+
+
+def export(func):
+    """
+    Decorator which allows the given method to be called by peers of a :class: `~scatter.rpc.RpcServer`.
+    Methods which aren't exported can't be called.
+    """
+    setattr(func, EXPORT_ATTR, True)
+    return func
+
+
+def qualify(ref, func):
+    """
+    Return the name of a call to the given method of the service with the given reference.
+
+    :param ref: Path, id or fully qualified type of the service. `None` addresses the target of the server.
+    :param func: Name of the method.
+    """
+    if not ref:
+        return func
+    return '{0}{1}{2}'.format(ref, ADDRESS_SEP, func)
+
+
+def _stream_options(service, address):
+    """
+    Return the options of streams created by the given client or server for the given address.
+    Only socket streams read length framed messages which need bounding.
+    """
+    if issubclass(transport.stream_class(address), transport.SocketStream):
+        return dict(max_frame_size=service.max_frame_size)
+    return {}
+
+
+class RpcError(ScatterException):
+    """
+    Raised for calls which failed remotely or whose stream was closed before they were answered.
+    """
+
+
+class Future(object):
+    """
+    Result of a call which will be set once its reply is received.
+    """
+
+    def __init__(self, msg_id, stream, deadline=None):
+        self.msg_id = msg_id
+        self.stream = stream
+        self.deadline = deadline
+        self.value = None
+        self.exception = None
+        self.event = threading.Event()
+        self.lock = threading.Lock()
+        self.callbacks = []
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.msg_id)
+
+    def done(self):
+        """
+        Returns `True` once the call has a result or exception.
+        """
+        return self.event.is_set()
+
+    def result(self, timeout=None):
+        """
+        Block the caller until the call has completed and return its result or raise its exception.
+
+        :param timeout: (Optional) Number of seconds to wait. Defaults to waiting until the
+            deadline of the call.
+        """
+        if timeout is None and self.deadline is not None:
+            timeout = max(self.deadline - time.time(), 0)
+        if not self.event.wait(timeout):
+            raise ScatterTimeout('Timed out waiting for reply to {0}'.format(self.msg_id))
+        if self.exception is not None:
+            raise self.exception
+        return self.value
+
+    def add_done_callback(self, func):
+        """
+        Call the given function with this future once it has completed.
+
+        :param func: Callable which takes the future as its only argument.
+        """
+        with self.lock:
+            if not self.event.is_set():
+                self.callbacks.append(func)
+                return
+        func(self)
+
+    def set_result(self, value):
+        self.value = value
+        self._complete()
+
+    def set_exception(self, exception):
+        self.exception = exception
+        self._complete()
+
+    def _complete(self):
+        with self.lock:
+            self.event.set()
+            callbacks, self.callbacks = self.callbacks, []
+        for func in callbacks:
+            func(self)
+
+
+class RpcClient(Service):
+    """
+    Service which sends calls through streams and correlates their replies by `msg_id`.
+
+    Any number of calls may be in flight on a single stream at once. Replies are matched
+    with their :class: `~scatter.rpc.Future` as they arrive, in whatever order the server
+    sends them.
+    """
+
+    #: Set the number of seconds a call waits for its reply. Defaults to `10` seconds.
+    call_timeout = ConfigAttribute(10)
+
+    #: Set the maximum number of bytes of a reply received through socket streams connected by
+    #: this client. Defaults to `64` MiB.
+    max_frame_size = ConfigAttribute(64 * 1024 * 1024)
+
+    #: The class used to drive streams connected by this client.
+    #: Defaults to :class: `~scatter.reactor.Reactor`.
+    reactor_class = ConfigAttribute('scatter.reactor.Reactor')
+
+    #: Earliest deadline of pending calls along with the reactor timer which expires them.
+    expiry = None
+
+    @cached
+    def handler(self):
+        return self.services.by_type(MessageHandler).first() or self.child(MessageHandler)
+
+    @cached
+    def reactor(self):
+        cls = import_from(self.reactor_class)
+        return self.services.by_type(cls).first() or self.child(cls)
+
+    @cached
+    def pending(self):
+        """
+        Dict of :class: `~scatter.rpc.Future` instances awaiting a reply keyed by `msg_id`.
+        """
+        return {}
+
+    @cached
+    def deadlines(self):
+        """
+        Heap of `(deadline, msg_id)` tuples of pending calls.
+        """
+        return []
+
+    @cached
+    def lock(self):
+        return threading.Lock()
+
+    def connect(self, address):
+        """
+        Create a stream connected to the given address and register it with this client.
+
+        :param address: Address string in `scheme://location` form.
+        """
+        return self.register(transport.connect(address, self.reactor, **_stream_options(self, address)))
+
+    def register(self, stream):
+        """
+        Start correlating replies received through the given stream.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to send calls through.
+        """
+        return self.handler.register(stream)
+
+    def remote(self, stream, ref=None, timeout=None):
+        """
+        Return a :class: `~scatter.remote.RemoteProxy` which calls the methods of a service
+        served through the given stream.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to send calls through.
+        :param ref: (Optional) Path, id, fully qualified type or class of the service. Defaults to
+            the target of the server.
+        :param timeout: (Optional) Number of seconds calls wait for their reply. Defaults to `call_timeout`.
+        """
+        from scatter.remote import RemoteProxy
+        return RemoteProxy(self, stream, ref, timeout)
+
+    def call_async(self, stream, func, args=(), kwargs=None, timeout=None, pipeline=False):
+        """
+        Send a call through the given stream and return a :class: `~scatter.rpc.Future` of its result.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to send the call through.
+        :param func: Name of the remote method to call.
+        :param args: (Optional) Positional arguments of the call.
+        :param kwargs: (Optional) Keyword arguments of the call.
+        :param timeout: (Optional) Number of seconds to wait for the reply. Defaults to `call_timeout`.
+        :param pipeline: (Optional) Send the call without flushing the stream and let later calls
+            through it pass the returned future as an argument. Defaults to `False`.
+        """
+        topic = CALL_TOPIC
+        if pipeline:
+            topic = PIPELINE_TOPIC
+            args = [self._promise(stream, arg) for arg in args]
+            kwargs = dict((k, self._promise(stream, v)) for k, v in (kwargs or {}).iteritems())
+
+        timeout = self.call_timeout if timeout is None else timeout
+        now = time.time()
+        future = Future(uid(), stream, now + timeout)
+
+        # Register ahead of sending since replies may arrive before send returns.
+        with self.lock:
+            self.pending[future.msg_id] = future
+            heapq.heappush(self.deadlines, (future.deadline, future.msg_id))
+            self._schedule_expiry()
+        self.expire(now)
+
+        try:
+            self.handler.send(stream, msg_id=future.msg_id, topic=topic, func=func,
+                              args=list(args), kwargs=kwargs or {})
+            # Callers are waiting on the reply, so don't hold the call back to coalesce it.
+            # Pipelined calls are flushed together by the pipeline instead.
+            if not pipeline:
+                self.handler.flush(stream)
+        except Exception as e:
+            self._resolve(future.msg_id, exception=e)
+        return future
+
+    def call(self, stream, func, *args, **kwargs):
+        """
+        Send a call through the given stream and block until its result is returned.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to send the call through.
+        :param func: Name of the remote method to call.
+        """
+        return self.call_async(stream, func, args, kwargs).result()
+
+    def cast(self, stream, func, *args, **kwargs):
+        """
+        Send a call through the given stream without waiting for, or receiving, a reply.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to send the call through.
+        :param func: Name of the remote method to call.
+        """
+        self.handler.send(stream, topic=CAST_TOPIC, func=func, args=list(args), kwargs=kwargs)
+
+    def expire(self, now=None):
+        """
+        Fail every pending call whose deadline has passed with a :class: `~scatter.exceptions.ScatterTimeout`.
+        This also runs on the reactor thread at the earliest deadline, so calls time out without
+        waiting for other traffic.
+
+        :param now: (Optional) Current timestamp. Defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][0] <= now:
+            with self.lock:
+                if not deadlines or deadlines[0][0] > now:
+                    break
+                _, msg_id = heapq.heappop(deadlines)
+            self._resolve(msg_id, exception=ScatterTimeout('Timed out waiting for reply to {0}'.format(msg_id)))
+
+    def on_initialized(self, *args, **kwargs):
+        """
+        """
+        # Attach children now so they are started and stopped along with this service.
+        self.handler, self.reactor
+
+    def on_msg_recv(self, stream, msg):
+        """
+        """
+        if msg.topic == REPLY_TOPIC:
+            self._resolve(msg.msg_id, value=msg.args[0] if msg.args else None)
+        elif msg.topic == ERROR_TOPIC:
+            self._resolve(msg.msg_id, exception=RpcError(*msg.args))
+        self.expire()
+
+    def on_msg_send(self, stream, msg):
+        """
+        """
+        pass
+
+    def on_stream_close(self, stream):
+        """
+        """
+        with self.lock:
+            lost = [msg_id for msg_id, future in self.pending.iteritems() if future.stream is stream]
+        for msg_id in lost:
+            self._resolve(msg_id, exception=RpcError('Stream closed before reply to {0}'.format(msg_id)))
+
+    def on_stopping(self, *args, **kwargs):
+        """
+        """
+        with self.lock:
+            lost = self.pending.keys()
+            expiry, self.expiry = self.expiry, None
+        if expiry is not None:
+            expiry[1].cancel()
+        for msg_id in lost:
+            self._resolve(msg_id, exception=RpcError('Client stopped before reply to {0}'.format(msg_id)))
+
+    def _schedule_expiry(self):
+        """
+        Expire calls on the reactor thread at the earliest pending deadline unless that is already
+        scheduled. Must be called holding the client lock.
+        """
+        # Replies leave their deadline in the heap, so drop those of answered calls first.
+        deadlines = self.deadlines
+        while deadlines and deadlines[0][1] not in self.pending:
+            heapq.heappop(deadlines)
+        if not deadlines:
+            return
+
+        deadline = deadlines[0][0]
+        expiry = self.expiry
+        if expiry is not None:
+            if expiry[0] <= deadline:
+                return
+            expiry[1].cancel()
+        timer = self.reactor.call_later(max(deadline - time.time(), 0), self._expired)
+        self.expiry = (deadline, timer)
+
+    def _expired(self):
+        """
+        Expire calls once the earliest deadline has passed and schedule the next expiry.
+        """
+        with self.lock:
+            self.expiry = None
+        self.expire()
+        with self.lock:
+            self._schedule_expiry()
+
+    def _promise(self, stream, value):
+        """
+        Return the stand-in for the result of the given future if it is one, otherwise the value.
+        """
+        if not isinstance(value, Future):
+            return value
+        if value.stream is not stream:
+            raise RpcError('Result of {0} can only be used by calls through the same stream'.format(value.msg_id))
+        return {PROMISE_KEY: value.msg_id}
+
+    def _resolve(self, msg_id, value=None, exception=None):
+        """
+        Complete the pending call of the given `msg_id`, ignoring replies to calls which
+        have already timed out.
+        """
+        with self.lock:
+            future = self.pending.pop(msg_id, None)
+        if future is None:
+            return
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(value)
+
+
+class RpcServer(Service):
+    """
+    Service which serves calls received through its streams by dispatching them to the
+    methods of its target service, the parent by default.
+
+    Only public methods decorated with :func: `~scatter.rpc.export` can be called. Methods run
+    on the thread which received the call.
+    """
+
+    #: The class used to drive streams bound by this server.
+    #: Defaults to :class: `~scatter.reactor.Reactor`.
+    reactor_class = ConfigAttribute('scatter.reactor.Reactor')
+
+    #: Set the number of pipelined results remembered for each stream. Defaults to `1024`.
+    pipeline_size = ConfigAttribute(1024)
+
+    #: Set the maximum number of bytes of a call received through socket streams bound by this
+    #: server. Defaults to `64` MiB.
+    max_frame_size = ConfigAttribute(64 * 1024 * 1024)
+
+    #: Service whose methods are called. Defaults to `None` which uses the parent service.
+    target = None
+
+    @cached
+    def handler(self):
+        return self.services.by_type(MessageHandler).first() or self.child(MessageHandler)
+
+    @cached
+    def reactor(self):
+        cls = import_from(self.reactor_class)
+        return self.services.by_type(cls).first() or self.child(cls)
+
+    @cached
+    def targets(self):
+        """
+        Dict of the services which serve calls keyed by call name. Services are held weakly so
+        those detached from the tree aren't kept alive.
+        """
+        return weakref.WeakValueDictionary()
+
+    @cached
+    def results(self):
+        """
+        Dict of results of recent pipelined calls keyed by stream and then `msg_id`.
+        """
+        return {}
+
+    def bind(self, address):
+        """
+        Create a stream which listens on the given address and serves calls of every
+        stream it accepts.
+
+        :param address: Address string in `scheme://location` form.
+        """
+        listener = transport.bind(address, self.reactor, **_stream_options(self, address))
+        listener.on_accept(lambda _, stream: self.register(stream))
+        return listener
+
+    def register(self, stream):
+        """
+        Start serving calls received through the given stream.
+
+        :param stream: :class: `~scatter.stream.Stream` instance to serve calls of.
+        """
+        return self.handler.register(stream)
+
+    def find(self, ref=None):
+        """
+        Return the service of the target tree with the given path, id or fully qualified type.
+        Ids and paths are looked up in the :class: `~scatter.index.ServiceIndex` of the tree,
+        while fully qualified types are searched for among the target and its children breadth first.
+
+        :param ref: (Optional) Path, id or fully qualified type of the service. Defaults to the target.
+        """
+        # Services without children are falsy, so the target is compared with `None`.
+        target = self.target if self.target is not None else self.parent
+        if not ref:
+            return target
+
+        index = target.service_index
+        service = index.lookup(ref) if ref.startswith(PATH_SEP) else index.get(ref)
+        if service is not None:
+            path, prefix = index.path(service), index.path(target)
+            if path == prefix or path.startswith(prefix + PATH_SEP):
+                return service
+
+        queue = collections.deque([target])
+        while queue:
+            service = queue.popleft()
+            if ref == service.id or ref == service.fully_qualified_type:
+                return service
+            queue.extend(service.services.all())
+        raise RpcError('No service matches {0}'.format(ref))
+
+    def describe(self, ref=None):
+        """
+        Return a dict of the attributes of the service with the given reference which never
+        change, along with the names of the methods it exports.
+
+        :param ref: (Optional) Path, id or fully qualified type of the service. Defaults to the target.
+        """
+        service = self.find(ref)
+        exports = [name for name in dir(type(service)) if self.exported(service, name)]
+        return dict(id=service.id, name=service.name, fully_qualified_type=service.fully_qualified_type,
+                    exports=exports)
+
+    def exported(self, service, name):
+        """
+        Returns `True` if the method of the given service with the given name may be called.
+
+        :param service: Service which defines the method.
+        :param name: Name of the method.
+        """
+        if name.startswith('_'):
+            return False
+        method = getattr(type(service), name, None)
+        return inspect.isroutine(method) and getattr(method, EXPORT_ATTR, False) is True
+
+    def resolve(self, func):
+        """
+        Return the method which serves calls to the given name.
+
+        :param func: Name of the method, optionally prefixed by the id or fully qualified
+            type of the service which exports it. See :func: `~scatter.rpc.qualify`.
+        """
+        ref, _, name = func.rpartition(ADDRESS_SEP)
+        target = self.targets.get(func)
+        if target is not None:
+            return getattr(target, name)
+
+        target = self.find(ref)
+        if not self.exported(target, name):
+            raise AttributeError('{0} does not export {1}'.format(target, name))
+
+        self.targets[func] = target
+        return getattr(target, name)
+
+    def dispatch(self, msg):
+        """
+        Call the method named by the given message and return its result.
+
+        :param msg: :class: `~scatter.protocol.Message` of the call.
+        """
+        if msg.func == DESCRIBE_FUNC:
+            return self.describe(*(msg.args or ()))
+        return self.resolve(msg.func)(*(msg.args or ()), **(msg.kwargs or {}))
+
+    def pipeline(self, stream, msg):
+        """
+        Call the method named by the given pipelined message, passing the results of earlier
+        calls in place of their stand-ins, and remember its result for later calls.
+
+        :param stream: :class: `~scatter.stream.Stream` the message was received through.
+        :param msg: :class: `~scatter.protocol.Message` of the call.
+        """
+        results = self.results.get(stream)
+        if results is None:
+            results = self.results[stream] = collections.OrderedDict()
+
+        msg.args = [self._fulfill(results, arg) for arg in msg.args or ()]
+        msg.kwargs = dict((k, self._fulfill(results, v)) for k, v in (msg.kwargs or {}).iteritems())
+        result = results[msg.msg_id] = self.dispatch(msg)
+        if len(results) > self.pipeline_size:
+            results.popitem(last=False)
+        return result
+
+    def on_initialized(self, *args, **kwargs):
+        """
+        """
+        # Attach children now so they are started and stopped along with this service.
+        self.handler, self.reactor
+
+    def on_msg_recv(self, stream, msg):
+        """
+        """
+        if msg.topic not in (CALL_TOPIC, CAST_TOPIC, PIPELINE_TOPIC):
+            return
+
+        try:
+            if msg.topic == PIPELINE_TOPIC:
+                result = self.pipeline(stream, msg)
+            else:
+                result = self.dispatch(msg)
+        except Exception as e:
+            if msg.topic == CAST_TOPIC:
+                return self.log.exception('Exception raised by cast to {0}'.format(msg.func))
+            reply = dict(topic=ERROR_TOPIC, args=[type(e).__name__, str(e)])
+        else:
+            if msg.topic == CAST_TOPIC:
+                return
+            reply = dict(topic=REPLY_TOPIC, args=[result])
+
+        try:
+            self.handler.send(stream, msg_id=msg.msg_id, func=msg.func, kwargs={}, **reply)
+        except Exception as e:
+            self.log.error('Unable to reply to {0}. {1}'.format(msg.msg_id, e))
+
+    def on_msg_send(self, stream, msg):
+        """
+        """
+        pass
+
+    def on_stream_close(self, stream):
+        """
+        """
+        self.results.pop(stream, None)
+
+    def on_reloaded(self, *args, **kwargs):
+        """
+        """
+        self.targets.clear()
+
+    def _fulfill(self, results, value):
+        """
+        Return the result of the earlier call the given value stands in for, if it is a stand-in.
+        """
+        if not isinstance(value, dict) or len(value) != 1 or PROMISE_KEY not in value:
+            return value
+        try:
+            return results[value[PROMISE_KEY]]
+        except KeyError:
+            raise RpcError('Result of {0} is not available'.format(value[PROMISE_KEY]))
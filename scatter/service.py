@@ -17,21 +17,32 @@ import inspect
 import itertools
 import weakref
 
+from scatter import events
 from scatter.config import Config, ConfigAttribute
-from scatter.descriptors import MetaDescriptor, cached
+from scatter.descriptors import MetaDescriptor, WeakAttribute, cached, invalidate
 from scatter.exceptions import ScatterException
 from scatter.importer import import_from
-from scatter.log import create_logger, DEFAULT_LOG_LEVEL
+from scatter.log import create_logger, release_logger, DEFAULT_LOG_LEVEL
 from scatter.meta import resolve_type, resolve_class, resolve_type_meta,get_public_attrs, get_instance_descriptors, is_abstract
 from scatter.registry import global_registry
 from scatter.state import transition, guard, StateMachine
-from scatter.structures import ScatterDict, ScatterMapping, ImmutableDict, Enum
+from scatter.structures import (ScatterDict, ScatterMapping, ImmutableDict, Enum, AcyclicOrderedDict,
+                                WeakValueOrderedDict)
 from scatter.uid import urn
 from scatter.utils import iterable
 
 
 ServiceState = Enum('ServiceState', 'New Initialized Running Stopped')
 
+#: States a service may be started from.
+STARTABLE = ServiceState.Initialized | ServiceState.Stopped
+
+#: States a service may be stopped from.
+STOPPABLE = ServiceState.Initialized | ServiceState.Running
+
+#: States of a service which has been started.
+STARTED = ServiceState.Running | ServiceState.Stopped
+
 new = guard(ServiceState.New)
 initialized = guard(ServiceState.Initialized)
 running = guard(ServiceState.Running)
@@ -232,12 +243,17 @@ class ServiceMeta(type):
 class ServiceCollection(ScatterMapping):
     """
     Collection which contains all children services of a service.
+
+    The collection of a service owns its children, so it holds them strongly. Collections
+    returned by queries, ex: `by_type`, are views which hold their services weakly and so don't
+    keep services alive once they're detached.
     """
 
-    def __init__(self, service, services=None):
-        import collections
-        #super(ServiceCollection, self).__init__(weakref.WeakValueDictionary) #should be weakvalue + ordered!! TODO
-        super(ServiceCollection, self).__init__(collections.OrderedDict)
+    #: Service which owns the collection, held weakly since it owns the collection in turn.
+    service = WeakAttribute('service')
+
+    def __init__(self, service, services=None, weak=False):
+        super(ServiceCollection, self).__init__(WeakValueOrderedDict if weak else AcyclicOrderedDict)
         self.service = service
         if services is not None:
             self.add(services)
@@ -253,28 +269,28 @@ class ServiceCollection(ScatterMapping):
             del self[service]
 
     def first(self, default=None):
-        return next(iter(self), default)
+        return next(self.itervalues(), default)
 
     def all(self):
         return self.values()
 
     def by_state(self, state):
-        return ServiceCollection(self.service, self.slice(lambda k, v: v.state_machine.state == state))
+        return self.by_func(lambda k, v: v.state_machine.state == state)
 
     def by_type(self, service_type):
-        return ServiceCollection(self.service, self.slice(lambda k, v: isinstance(v, service_type)))
+        return self.by_func(lambda k, v: isinstance(v, service_type))
 
     def by_name(self, service_name):
-        return ServiceCollection(self.service, self.slice(lambda k, v: k == service_name.lower()))
+        return self.by_func(lambda k, v: k == service_name.lower())
 
     def by_fully_qualified_type(self, fully_qualified_type):
         return self.by_attr('fully_qualified_type', fully_qualified_type)
 
-    def by_attr(self, attr, default=None):
-        return ServiceCollection(self.service, self.slice(lambda k, v: getattr(v, attr, default) == attr))
+    def by_attr(self, attr, value=None):
+        return self.by_func(lambda k, v: getattr(v, attr, None) == value)
 
     def by_func(self, predicate):
-        return ServiceCollection(self.service, self.slice(predicate))
+        return ServiceCollection(self.service, (v for k, v in self.slice(predicate)), weak=True)
 
     def slice(self, predicate=None, start=None):
         return itertools.islice(self.filter(predicate), start)
@@ -303,6 +319,9 @@ class ServiceStateMachine(StateMachine):
     """
     import threading
 
+    #: Service controlled by the state machine, held weakly since it owns the state machine.
+    service = WeakAttribute('service')
+
     def __init__(self, service):
         import threading
         super(ServiceStateMachine, self).__init__(ServiceState.New, threading.Condition)
@@ -315,7 +334,7 @@ class ServiceStateMachine(StateMachine):
         return self.state == ServiceState.Initialized
 
     def is_started(self):
-        return self.state in (ServiceState.Running, ServiceState.Stopped)
+        return self.state in STARTED
 
     def is_running(self):
         return self.state == ServiceState.Running
@@ -336,8 +355,10 @@ class ServiceStateMachine(StateMachine):
     def init(self, *args, **kwargs):
         self.service.on_initialized(*args, **kwargs)
         self.service.log.info('Service initialized')
+        if events.LIFECYCLE_BUSES and self.state is ServiceState.Initialized:
+            events.emit(self.service, events.ServiceInitialized)
 
-    @transition((ServiceState.Initialized, ServiceState.Stopped), ServiceState.Running)
+    @transition(STARTABLE, ServiceState.Running)
     def start(self, *args, **kwargs):
         self.service.starting(*args, **kwargs)
 
@@ -350,8 +371,10 @@ class ServiceStateMachine(StateMachine):
     def start(self, *args, **kwargs):
         self.service.on_started(*args, **kwargs)
         self.service.log.info('Service started')
+        if events.LIFECYCLE_BUSES and self.state is ServiceState.Running:
+            events.emit(self.service, events.ServiceStarted)
 
-    @transition((ServiceState.Initialized, ServiceState.Running), ServiceState.Stopped)
+    @transition(STOPPABLE, ServiceState.Stopped)
     def stop(self, *args, **kwargs):
         self.service.stopping(*args, **kwargs)
 
@@ -364,6 +387,8 @@ class ServiceStateMachine(StateMachine):
     def stop(self, *args, **kwargs):
         self.service.on_stopped(*args, **kwargs)
         self.service.log.info('Service stopped')
+        if events.LIFECYCLE_BUSES and self.state is ServiceState.Stopped:
+            events.emit(self.service, events.ServiceStopped)
 
     @transition(ServiceState.Running, ServiceState.Running)
     def reload(self, *args, **kwargs):
@@ -378,6 +403,8 @@ class ServiceStateMachine(StateMachine):
     def reload(self, *args, **kwargs):
         self.service.on_reloaded(*args, **kwargs)
         self.service.log.info('Service reloaded')
+        if events.LIFECYCLE_BUSES:
+            events.emit(self.service, events.ServiceReloaded)
 
 
 class Service(object):
@@ -386,17 +413,15 @@ class Service(object):
     """
     __metaclass__ = ServiceMeta
 
-    #:
-    #:
-    process = None
+    #: Process service this service runs in, held weakly since it owns the service.
+    process = WeakAttribute()
 
-    #:
-    #:
-    app = None
+    #: Application service this service is part of, held weakly since it owns the service.
+    app = WeakAttribute()
 
-    #:
-    #:
-    parent = None
+    #: Service this service is attached to, held weakly so service trees don't form
+    #: reference cycles and detached services are reclaimed without the cyclic garbage collector.
+    parent = WeakAttribute()
 
     #:
     #:
@@ -432,6 +457,10 @@ class Service(object):
     #: Defaults to :class: `~scatter.service.ServiceCollection`.
     service_collection_class = ConfigAttribute('scatter.service.ServiceCollection')
 
+    #: The class used to index every service in the tree when this service is its root.
+    #: Defaults to :class: `~scatter.index.ServiceIndex`.
+    service_index_class = ConfigAttribute('scatter.index.ServiceIndex')
+
     #: Set the threshold for the service logger. Defaults to `INFO` (20).
     log_level = ConfigAttribute(DEFAULT_LOG_LEVEL)
 
@@ -591,6 +620,25 @@ class Service(object):
         cls = import_from(self.service_collection_class)
         return cls(self)
 
+    @cached
+    def root_service_index(self):
+        """
+        Index of every service in the tree of this service while it is the root. Use
+        `service_index` to reach the index of the tree from any service in it.
+        """
+        cls = import_from(self.service_index_class)
+        return cls(self)
+
+    @property
+    def service_index(self):
+        """
+        Index of every service in the tree this service is attached to, kept by the root service.
+        """
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        return root.root_service_index
+
     @cached
     def state_machine(self):
         """
@@ -681,6 +729,13 @@ class Service(object):
         """
         self.services.add(service)
         service.attached(self, *args, **kwargs)
+        # The service is no longer a root, so its subtree moves into the index of our tree.
+        # Services attach children while they are created, before being attached themselves,
+        # in which case the subtree is indexed once we are.
+        invalidate(service, 'root_service_index')
+        index = self.service_index
+        if self in index:
+            index.add(service, self)
 
     def attached(self, parent, *args, **kwargs):
         """
@@ -699,9 +754,16 @@ class Service(object):
         Detach the given child service from the current service.
 
         :param service: Service instance which is a child of this service.
+        :param dispose: (Optional) Keyword which disposes of the service once it's detached.
+            See :meth: `~scatter.service.Service.dispose`. Defaults to `False`.
         """
+        dispose = kwargs.pop('dispose', False)
+        self.service_index.remove(service)
         self.services.remove(service)
         service.detached(self, *args, **kwargs)
+        invalidate(service, 'root_service_index')
+        if dispose:
+            service.dispose()
 
     def detached(self, parent, *args, **kwargs):
         """
@@ -713,6 +775,17 @@ class Service(object):
         self.log.info('Detatched from service {0}'.format(parent))
         self.on_detached(parent, *args, **kwargs)
 
+    def dispose(self):
+        """
+        Release everything held by this service and its children, including their loggers, so they
+        are reclaimed as soon as the last reference to them is dropped. Disposed services should not
+        be used again.
+        """
+        for service in self.services.all():
+            self.detach(service, dispose=True)
+        invalidate(self, 'root_service_index')
+        release_logger(self.log)
+
     def exports(self):
         """
         Dict of all public service attributes.
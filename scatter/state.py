@@ -14,17 +14,46 @@ import collections
 import contextlib
 import functools
 import itertools
-import time
 import weakref
 
 from scatter.descriptors import cached
-from scatter.utils import iterable
+from scatter.utils import iterable, Deadline
 from scatter.uid import urn
 
 
 NO_OP = lambda *args, **kwargs: True
 
 
+def state_mask(states):
+    """
+    Return the bit flags of the given state, or iterable of states, when they are all
+    :class: `~scatter.structures.EnumMember` instances, otherwise `None`.
+
+    :param states: State or iterable of states.
+    """
+    value = getattr(states, 'value', None)
+    if isinstance(value, (int, long)):
+        return value
+
+    mask = 0
+    for state in iterable(states):
+        value = getattr(state, 'value', None)
+        if not isinstance(value, (int, long)):
+            return None
+        mask |= value
+    return mask
+
+
+def in_states(state, states, mask):
+    """
+    Returns `True` if the given state is one of the given states. Enum states are checked with a
+    single bitwise AND against the precomputed mask of the states.
+    """
+    if mask is not None:
+        return bool(getattr(state, 'value', 0) & mask)
+    return state in iterable(states)
+
+
 class InvalidTransition(Exception):
     """
     """
@@ -64,6 +93,7 @@ class Transition(object):
 
     def __init__(self, current_state=None, next_state=None, action=None, condition=None, enter=None, exit=None):
         self.current_state = current_state
+        self.current_mask = state_mask(current_state)
         self.next_state = next_state
 
         self.action = action
@@ -156,7 +186,7 @@ class Transition(object):
             state = state_machine.state
 
             # Ignore transitions which cannot execute within the current state.
-            if not state in iterable(self.current_state):
+            if not in_states(state, self.current_state, self.current_mask):
                 return state
 
             # Ignore transitions whose guard conditions fail to return True.
@@ -188,6 +218,7 @@ class StateGuardDescriptor(object):
 
     def __init__(self, state, func=None):
         self.state = state
+        self.mask = state_mask(state)
         self.func = func
 
     def __call__(self, func):
@@ -227,7 +258,7 @@ class StateGuardDescriptor(object):
 
             state = state_machine.state
             # Raise error if current state isn't one of our valid states.
-            if not state in iterable(self.state):
+            if not in_states(state, self.state, self.mask):
                 raise InvalidTransition('{0} cannot be called in state {1}'.format(self.func.__name__, state))
 
             return self.func(instance, *args, **kwargs)
@@ -266,17 +297,11 @@ class StateMachine(object):
         Block the caller for the given number of seconds waiting for the state machine
         to enter the given state.
         """
-        end = None
-        remaining = timeout
+        deadline = Deadline(timeout)
 
         with self.event:
             while self.state != state:
-                if timeout is not None:
-                    if end is None:
-                        end = time.time() + timeout
-                    else:
-                        remaining = end - time.time()
-                        if remaining <= 0:
-                            return False
-                self.event.wait(remaining)
+                if deadline.expired():
+                    return False
+                self.event.wait(deadline.remaining())
         return True
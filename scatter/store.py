@@ -3,9 +3,44 @@
     ~~~~~~~~~~~~~
 
 """
+__all__ = ('Store', 'DictStore', 'CacheStore', 'ShardedStore', 'MISSING')
 
 
 import abc
+import collections
+import heapq
+import sys
+import threading
+import time
+
+
+#: Sentinel which stands for a missing key.
+MISSING = object()
+
+
+def iter_pairs(items):
+    """
+    Return an iterator of the `(key, value)` tuples of the given dict or iterable of tuples.
+    """
+    if hasattr(items, 'iteritems'):
+        return items.iteritems()
+    return iter(items)
+
+
+def in_range(key, prefix=None, start=None, end=None):
+    """
+    Returns `True` if the given key starts with `prefix` and falls within `[start, end)`.
+    Keys which can't be sliced never match a prefix.
+    """
+    if prefix is not None:
+        try:
+            if key[:len(prefix)] != prefix:
+                return False
+        except TypeError:
+            return False
+    if start is not None and key < start:
+        return False
+    return end is None or key < end
 
 
 class Store(object):
@@ -35,6 +70,78 @@ class Store(object):
     def delete(self, key):
         raise NotImplementedError('Abstract method must be implemented in derived class.')
 
+    def keys(self):
+        """
+        Return a list of every key. The default `items` and `scan` are built on it, so stores
+        which can't list their keys raise `NotImplementedError` from those as well.
+        """
+        raise NotImplementedError('{0} does not support listing keys.'.format(type(self).__name__))
+
+    def get_many(self, keys):
+        """
+        Return a dict of the values of the given keys which exist.
+
+        :param keys: Iterable of keys to read.
+        """
+        values = {}
+        for key in keys:
+            value = self.get(key, MISSING)
+            if value is not MISSING:
+                values[key] = value
+        return values
+
+    def put_many(self, items):
+        """
+        Store every given key and value.
+
+        :param items: Dict or iterable of `(key, value)` tuples to store.
+        """
+        for key, value in iter_pairs(items):
+            self.put(key, value)
+
+    def delete_many(self, keys):
+        """
+        Remove every given key which exists and return the number removed.
+
+        :param keys: Iterable of keys to remove.
+        """
+        removed = 0
+        for key in keys:
+            if self.pop(key, MISSING) is not MISSING:
+                removed += 1
+        return removed
+
+    def items(self, batch_size=256):
+        """
+        Iterate the `(key, value)` tuples of every key, in no particular order. Values are read
+        `batch_size` keys at a time. Keys removed while iterating are skipped.
+
+        :param batch_size: (Optional) Number of values read at once. Defaults to `256`.
+        """
+        return self._read(self.keys(), batch_size)
+
+    def scan(self, prefix=None, start=None, end=None, batch_size=256):
+        """
+        Iterate the `(key, value)` tuples of keys which start with `prefix` and fall within
+        `[start, end)`, in key order. Values are read `batch_size` keys at a time.
+
+        :param prefix: (Optional) Prefix every key must start with, ex: a string or tuple.
+        :param start: (Optional) Lowest key, inclusive.
+        :param end: (Optional) Highest key, exclusive.
+        :param batch_size: (Optional) Number of values read at once. Defaults to `256`.
+        """
+        keys = sorted(key for key in self.keys() if in_range(key, prefix, start, end))
+        return self._read(keys, batch_size)
+
+    def _read(self, keys, batch_size):
+        for i in xrange(0, len(keys), batch_size):
+            batch = keys[i:i + batch_size]
+            values = self.get_many(batch)
+            for key in batch:
+                value = values.get(key, MISSING)
+                if value is not MISSING:
+                    yield key, value
+
 
 class DictStore(Store):
     """
@@ -58,3 +165,615 @@ class DictStore(Store):
 
     def delete(self, key):
         del self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+    def get_many(self, keys):
+        data, values = self.data, {}
+        for key in keys:
+            if key in data:
+                values[key] = data[key]
+        return values
+
+    def put_many(self, items):
+        self.data.update(iter_pairs(items))
+
+    def delete_many(self, keys):
+        data, removed = self.data, 0
+        for key in keys:
+            if data.pop(key, MISSING) is not MISSING:
+                removed += 1
+        return removed
+
+    def items(self, batch_size=256):
+        return iter(self.data.items())
+
+
+class LruPolicy(object):
+    """
+    Eviction policy which evicts the least recently used key first.
+    """
+
+    def __init__(self):
+        self.order = collections.OrderedDict()
+
+    def add(self, key):
+        self.order[key] = None
+
+    def touch(self, key):
+        del self.order[key]
+        self.order[key] = None
+
+    def remove(self, key):
+        del self.order[key]
+
+    def victim(self, skip=MISSING):
+        for key in self.order:
+            if key != skip:
+                return key
+        return MISSING
+
+    def clear(self):
+        self.order.clear()
+
+
+class LfuPolicy(object):
+    """
+    Eviction policy which evicts the least frequently used key first, and the least recently
+    used of those on ties. Keys are kept in buckets by use count so every operation is O(1).
+    """
+
+    def __init__(self):
+        self.counts = {}
+        self.buckets = collections.defaultdict(collections.OrderedDict)
+        self.min_count = 0
+
+    def add(self, key):
+        self.counts[key] = 1
+        self.buckets[1][key] = None
+        self.min_count = 1
+
+    def touch(self, key):
+        count = self.counts[key]
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = count + 1
+        self.counts[key] = count + 1
+        self.buckets[count + 1][key] = None
+
+    def remove(self, key):
+        count = self.counts.pop(key)
+        bucket = self.buckets[count]
+        del bucket[key]
+        if not bucket:
+            del self.buckets[count]
+            if self.min_count == count:
+                self.min_count = min(self.buckets) if self.buckets else 0
+
+    def victim(self, skip=MISSING):
+        for key in self.buckets[self.min_count]:
+            if key != skip:
+                return key
+        # Only the skipped key has the lowest count, so look through the next lowest.
+        for count in sorted(self.buckets):
+            for key in self.buckets[count]:
+                if key != skip:
+                    return key
+        return MISSING
+
+    def clear(self):
+        self.counts.clear()
+        self.buckets.clear()
+        self.min_count = 0
+
+
+#: Eviction policies by name.
+CACHE_POLICIES = {
+    'lru': LruPolicy,
+    'lfu': LfuPolicy
+}
+
+
+def approximate_size(key, value):
+    """
+    Return the approximate number of bytes used by the given key and value. This only counts
+    the objects themselves and not those they reference.
+    """
+    return sys.getsizeof(key) + sys.getsizeof(value)
+
+
+class CacheEntry(object):
+    """
+    Value of a :class: `~scatter.store.CacheStore` key along with its expiry and size.
+    """
+
+    __slots__ = ('value', 'expires', 'size')
+
+    def __init__(self, value, expires, size):
+        self.value = value
+        self.expires = expires
+        self.size = size
+
+
+class CacheStore(Store):
+    """
+    Bounded, thread safe store which evicts keys once it holds more than `max_entries` keys or
+    `max_bytes` approximate bytes, and expires keys once their time to live has passed.
+
+    Expired keys are removed when they are read or, with `expiry_interval` set, by a background
+    thread. `on_evict` is called with the key, value and reason, `capacity` or `expired`, of
+    every key removed by the store itself, outside of the store lock.
+    """
+
+    def __init__(self, max_entries=None, max_bytes=None, ttl=None, policy='lru', on_evict=None,
+                 sizeof=approximate_size, expiry_interval=None):
+        """
+        :param max_entries: (Optional) Maximum number of keys held. Defaults to unbounded.
+        :param max_bytes: (Optional) Maximum number of approximate bytes held. Defaults to unbounded.
+        :param ttl: (Optional) Default number of seconds keys live for. Defaults to forever.
+        :param policy: (Optional) Name of the eviction policy, `lru` or `lfu`, or a policy class.
+        :param on_evict: (Optional) Callable which takes the key, value and reason of evicted keys.
+        :param sizeof: (Optional) Callable which returns the approximate bytes used by a key and value.
+        :param expiry_interval: (Optional) Number of seconds between background expiry runs.
+            Defaults to `None` which only expires keys as they are read.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.policy = CACHE_POLICIES.get(policy, policy)()
+        self.on_evict = on_evict
+        self.sizeof = sizeof
+        self.data = {}
+        self.deadlines = []
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.lock = threading.RLock()
+        self.stopped = threading.Event()
+        self.thread = None
+
+        if expiry_interval is not None:
+            self.thread = threading.Thread(target=self._expire_forever, args=(expiry_interval,),
+                                           name='cache-store-expiry')
+            self.thread.daemon = True
+            self.thread.start()
+
+    def __len__(self):
+        with self.lock:
+            if not self.deadlines:
+                return len(self.data)
+            now = time.time()
+            return sum(1 for entry in self.data.itervalues() if not self._expired(entry, now))
+
+    def __contains__(self, key):
+        with self.lock:
+            entry = self.data.get(key)
+            return entry is not None and not self._expired(entry, time.time())
+
+    def pop(self, key, default=None):
+        with self.lock:
+            entry = self.data.get(key)
+            if entry is None or self._expired(entry, time.time()):
+                return default
+            self._remove(key)
+            return entry.value
+
+    def get(self, key, default=None):
+        evicted = []
+        with self.lock:
+            entry = self._lookup(key, time.time(), evicted)
+        self._evicted(evicted)
+        return default if entry is None else entry.value
+
+    def get_many(self, keys):
+        values, evicted = {}, []
+        with self.lock:
+            now = time.time()
+            for key in keys:
+                entry = self._lookup(key, now, evicted)
+                if entry is not None:
+                    values[key] = entry.value
+        self._evicted(evicted)
+        return values
+
+    def put(self, key, value, ttl=None):
+        """
+        Store the given value under the given key, evicting others as needed to stay within bounds.
+
+        :param key: Key to store the value under.
+        :param value: Value to store.
+        :param ttl: (Optional) Number of seconds the key lives for. Defaults to the store `ttl`.
+        """
+        with self.lock:
+            evicted = self._put(key, value, ttl, time.time())
+        self._evicted(evicted)
+
+    def put_many(self, items, ttl=None):
+        """
+        Store every given key and value, evicting others as needed to stay within bounds.
+
+        :param items: Dict or iterable of `(key, value)` tuples to store.
+        :param ttl: (Optional) Number of seconds the keys live for. Defaults to the store `ttl`.
+        """
+        evicted = []
+        with self.lock:
+            now = time.time()
+            for key, value in iter_pairs(items):
+                evicted.extend(self._put(key, value, ttl, now))
+        self._evicted(evicted)
+
+    def delete(self, key):
+        with self.lock:
+            if key not in self.data:
+                raise KeyError(key)
+            self._remove(key)
+
+    def delete_many(self, keys):
+        removed = 0
+        with self.lock:
+            now = time.time()
+            for key in keys:
+                entry = self.data.get(key)
+                if entry is not None:
+                    self._remove(key)
+                    removed += not self._expired(entry, now)
+        return removed
+
+    def keys(self):
+        with self.lock:
+            now = time.time()
+            return [key for key, entry in self.data.iteritems() if not self._expired(entry, now)]
+
+    def items(self, batch_size=256):
+        """
+        Iterate the `(key, value)` tuples of every unexpired key, in no particular order, from
+        a snapshot taken under the lock. Unlike reads, iterating doesn't count as use of the keys.
+        """
+        with self.lock:
+            now = time.time()
+            return iter([(key, entry.value) for key, entry in self.data.iteritems()
+                         if not self._expired(entry, now)])
+
+    def scan(self, prefix=None, start=None, end=None, batch_size=256):
+        """
+        Iterate the `(key, value)` tuples of unexpired keys which start with `prefix` and fall
+        within `[start, end)`, in key order, from a snapshot taken under the lock. Like `items`,
+        scanning doesn't count as use of the keys.
+        """
+        with self.lock:
+            now = time.time()
+            items = [(key, entry.value) for key, entry in self.data.iteritems()
+                     if in_range(key, prefix, start, end) and not self._expired(entry, now)]
+        items.sort(key=lambda item: item[0])
+        return iter(items)
+
+    def clear(self):
+        """
+        Remove every key without calling `on_evict`.
+        """
+        with self.lock:
+            self.data.clear()
+            self.policy.clear()
+            self.deadlines = []
+            self.bytes = 0
+
+    def expire(self, now=None):
+        """
+        Remove every key whose time to live has passed.
+
+        :param now: (Optional) Current timestamp. Defaults to `time.time()`.
+        """
+        now = time.time() if now is None else now
+        evicted = []
+        with self.lock:
+            deadlines = self.deadlines
+            while deadlines and deadlines[0][0] <= now:
+                _, key = heapq.heappop(deadlines)
+                entry = self.data.get(key)
+                # Deadlines of keys which were replaced or removed since are skipped.
+                if entry is not None and self._expired(entry, now):
+                    self._remove(key)
+                    self.expirations += 1
+                    evicted.append((key, entry.value, 'expired'))
+
+        self._evicted(evicted)
+        return len(evicted)
+
+    def stats(self):
+        """
+        Dict of the size and hit, miss, eviction and expiration counters of this store.
+        """
+        with self.lock:
+            return dict(entries=len(self.data), bytes=self.bytes, hits=self.hits, misses=self.misses,
+                        evictions=self.evictions, expirations=self.expirations)
+
+    def close(self):
+        """
+        Stop the background expiry thread.
+        """
+        self.stopped.set()
+        if self.thread is not None and self.thread is not threading.current_thread():
+            self.thread.join()
+
+    def _lookup(self, key, now, evicted):
+        """
+        Return the entry of the given key counting the read as a hit or miss, or `None` if it
+        doesn't exist or has expired. Must be called holding the store lock.
+        """
+        entry = self.data.get(key)
+        if entry is not None and self._expired(entry, now):
+            self._remove(key)
+            self.expirations += 1
+            evicted.append((key, entry.value, 'expired'))
+            entry = None
+
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+            self.policy.touch(key)
+        return entry
+
+    def _put(self, key, value, ttl, now):
+        """
+        Store the given value and return the keys evicted to make room for it. Must be called
+        holding the store lock.
+        """
+        ttl = self.ttl if ttl is None else ttl
+        expires = now + ttl if ttl is not None else None
+        entry = CacheEntry(value, expires, self.sizeof(key, value) if self.max_bytes is not None else 0)
+
+        if key in self.data:
+            self._remove(key)
+        self.data[key] = entry
+        self.bytes += entry.size
+        self.policy.add(key)
+        if expires is not None:
+            heapq.heappush(self.deadlines, (expires, key))
+            # Deadlines of replaced keys stay queued until they pass, so rebuild the heap from
+            # the live entries before stale ones pile up, ex: a hot key put with a long ttl.
+            if len(self.deadlines) > 2 * len(self.data):
+                self.deadlines = [(e.expires, k) for k, e in self.data.iteritems() if e.expires is not None]
+                heapq.heapify(self.deadlines)
+        return self._evict(key)
+
+    def _expired(self, entry, now):
+        return entry.expires is not None and entry.expires <= now
+
+    def _remove(self, key):
+        entry = self.data.pop(key)
+        self.bytes -= entry.size
+        self.policy.remove(key)
+        return entry
+
+    def _evict(self, keep):
+        """
+        Evict keys, other than the given one, until the store is within its bounds.
+        Must be called holding the store lock.
+        """
+        evicted = []
+        while len(self.data) > 1 and self._overflow():
+            # The key just stored is kept regardless, even when it alone is above the bounds.
+            key = self.policy.victim(keep)
+            if key is MISSING:
+                break
+            entry = self._remove(key)
+            self.evictions += 1
+            evicted.append((key, entry.value, 'capacity'))
+        return evicted
+
+    def _overflow(self):
+        if self.max_entries is not None and len(self.data) > self.max_entries:
+            return True
+        return self.max_bytes is not None and self.bytes > self.max_bytes
+
+    def _evicted(self, evicted):
+        if self.on_evict is None:
+            return
+        for key, value, reason in evicted:
+            self.on_evict(key, value, reason)
+
+    def _expire_forever(self, interval):
+        while not self.stopped.wait(interval):
+            self.expire()
+
+
+class Shard(object):
+    """
+    Partition of a :class: `~scatter.store.ShardedStore` and the lock which guards writes to it.
+    """
+
+    __slots__ = ('data', 'lock')
+
+    def __init__(self):
+        self.data = {}
+        self.lock = threading.Lock()
+
+
+class ShardedStore(Store):
+    """
+    Thread safe store which hashes keys across a number of independently locked shards, so
+    threads working on different keys rarely wait on each other.
+
+    In `read_mostly` mode, writers replace the dict of a shard with an updated copy instead of
+    changing it in place, so reads never take a lock. Writes cost a copy of their shard, which
+    pays off when reads vastly outnumber them.
+    """
+
+    def __init__(self, shards=16, read_mostly=False):
+        """
+        :param shards: (Optional) Number of partitions. Defaults to `16`.
+        :param read_mostly: (Optional) Serve reads without locking. Defaults to `False`.
+        """
+        self.shards = tuple(Shard() for _ in xrange(shards))
+        self.read_mostly = read_mostly
+
+    def __len__(self):
+        return sum(len(shard.data) for shard in self.shards)
+
+    def __contains__(self, key):
+        return key in self.shard(key).data
+
+    def shard(self, key):
+        """
+        Return the shard which holds the given key.
+        """
+        return self.shards[hash(key) % len(self.shards)]
+
+    def get(self, key, default=None):
+        shard = self.shard(key)
+        if self.read_mostly:
+            return shard.data.get(key, default)
+        with shard.lock:
+            return shard.data.get(key, default)
+
+    def put(self, key, value):
+        shard = self.shard(key)
+        with shard.lock:
+            self._put(shard, key, value)
+
+    def pop(self, key, default=None):
+        shard = self.shard(key)
+        with shard.lock:
+            if key not in shard.data:
+                return default
+            return self._remove(shard, key)
+
+    def delete(self, key):
+        shard = self.shard(key)
+        with shard.lock:
+            if key not in shard.data:
+                raise KeyError(key)
+            self._remove(shard, key)
+
+    def keys(self):
+        keys = []
+        for shard in self.shards:
+            if self.read_mostly:
+                keys.extend(shard.data)
+            else:
+                with shard.lock:
+                    keys.extend(shard.data)
+        return keys
+
+    def get_many(self, keys):
+        values = {}
+        for shard, batch in self._group(keys):
+            if self.read_mostly:
+                data = shard.data
+                for key in batch:
+                    if key in data:
+                        values[key] = data[key]
+                continue
+            with shard.lock:
+                data = shard.data
+                for key in batch:
+                    if key in data:
+                        values[key] = data[key]
+        return values
+
+    def put_many(self, items):
+        # Each shard is locked, and in read mostly mode copied, once for the whole batch.
+        for shard, batch in self._group(iter_pairs(items), pairs=True):
+            with shard.lock:
+                data = dict(shard.data) if self.read_mostly else shard.data
+                data.update(batch)
+                shard.data = data
+
+    def delete_many(self, keys):
+        removed = 0
+        for shard, batch in self._group(keys):
+            with shard.lock:
+                data = dict(shard.data) if self.read_mostly else shard.data
+                for key in batch:
+                    if data.pop(key, MISSING) is not MISSING:
+                        removed += 1
+                shard.data = data
+        return removed
+
+    def items(self, batch_size=256):
+        """
+        Iterate the `(key, value)` tuples of every key, in no particular order, from a snapshot
+        of one shard at a time.
+        """
+        for shard in self.shards:
+            if self.read_mostly:
+                items = shard.data.items()
+            else:
+                with shard.lock:
+                    items = shard.data.items()
+            for item in items:
+                yield item
+
+    def get_or_put(self, key, value):
+        """
+        Atomically return the value of the given key, storing the given value first if the
+        key doesn't exist.
+
+        :param key: Key to read.
+        :param value: Value to store if the key doesn't exist.
+        """
+        shard = self.shard(key)
+        data = shard.data
+        if self.read_mostly and key in data:
+            return data[key]
+
+        with shard.lock:
+            if key in shard.data:
+                return shard.data[key]
+            self._put(shard, key, value)
+            return value
+
+    def compare_and_swap(self, key, expected, value):
+        """
+        Atomically replace the value of the given key with the given value if its current value
+        equals the expected one. Returns `True` if the value was replaced.
+
+        :param key: Key to replace the value of.
+        :param expected: Value the key must currently hold, or `MISSING` if it must not exist.
+        :param value: New value of the key, or `MISSING` to remove it.
+        """
+        shard = self.shard(key)
+        with shard.lock:
+            current = shard.data.get(key, MISSING)
+            if current is not expected and (current is MISSING or expected is MISSING or current != expected):
+                return False
+            if value is MISSING:
+                if current is not MISSING:
+                    self._remove(shard, key)
+            else:
+                self._put(shard, key, value)
+            return True
+
+    def _group(self, keys, pairs=False):
+        """
+        Return a list of `(shard, keys)` tuples of the given keys, or `(key, value)` tuples,
+        grouped by the shard which holds them.
+        """
+        count, groups = len(self.shards), {}
+        for item in keys:
+            key = item[0] if pairs else item
+            groups.setdefault(hash(key) % count, []).append(item)
+        return [(self.shards[index], batch) for index, batch in groups.iteritems()]
+
+    def _put(self, shard, key, value):
+        if self.read_mostly:
+            data = dict(shard.data)
+            data[key] = value
+            shard.data = data
+        else:
+            shard.data[key] = value
+
+    def _remove(self, shard, key):
+        if not self.read_mostly:
+            return shard.data.pop(key)
+        data = dict(shard.data)
+        value = data.pop(key)
+        shard.data = data
+        return value
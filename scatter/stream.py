@@ -7,7 +7,7 @@
 
 import abc
 
-from scatter.socket import Socket
+from scatter.socket1 import Socket
 
 
 class Stream(Socket):
@@ -17,6 +17,10 @@ class Stream(Socket):
 
     __metaclass__ = abc.ABCMeta
 
+    #: Streams which carry encoded bytes set this to `True`. Streams which hand over message
+    #: objects as-is, skipping the protocol codec entirely, set this to `False`.
+    encoded = True
+
     def __init__(self, stream):
         super(Stream, self).__init__(stream)
         self._stream = stream
@@ -4,13 +4,15 @@
 
     Implementations of useful, in-memory data structures.
 """
-__all__ = ('Tree', 'Enum', 'ScatterDict', 'ScatterMapping')
+__all__ = ('Tree', 'Enum', 'ScatterDict', 'ScatterMapping', 'TopicTrie', 'AcyclicOrderedDict',
+           'WeakValueOrderedDict')
 
 import abc
 import collections
 import imp
 import os
 import sys
+import weakref
 
 from scatter.importer import import_from
 
@@ -217,6 +219,96 @@ class ScatterDict(ScatterMapping):
         super(ScatterDict, self).__init__(dict, *args, **kwargs)
 
 
+class AcyclicOrderedDict(collections.MutableMapping):
+    """
+    Mapping which remembers insertion order without the self referencing links of
+    :class: `~collections.OrderedDict`, so dropping one never leaves work for the cyclic
+    garbage collector.
+
+    Keys are kept in a list in the order they were inserted, tagged with a sequence number
+    so entries of deleted keys are skipped. The list is compacted once most of it is stale.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.data = {}
+        self.order = []
+        self.seq = 0
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        return self.data[key][1]
+
+    def __setitem__(self, key, value):
+        entry = self.data.get(key)
+        if entry is not None:
+            entry[1] = value
+            return
+        self.seq += 1
+        self.data[key] = [self.seq, value]
+        self.order.append((self.seq, key))
+
+    def __delitem__(self, key):
+        del self.data[key]
+        if len(self.order) > 2 * len(self.data) + 8:
+            data = self.data
+            self.order = [(seq, k) for seq, k in self.order if k in data and data[k][0] == seq]
+
+    def __iter__(self):
+        data = self.data
+        for seq, key in self.order:
+            entry = data.get(key)
+            if entry is not None and entry[0] == seq:
+                yield key
+
+    def __len__(self):
+        return len(self.data)
+
+    def __contains__(self, key):
+        return key in self.data
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__class__.__name__, list(self.iteritems()))
+
+
+class WeakValueOrderedDict(collections.MutableMapping):
+    """
+    Mapping which remembers insertion order and holds its values by weak reference. Entries
+    are dropped once their value is collected.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.data = AcyclicOrderedDict()
+        selfref = weakref.ref(self)
+
+        def remove(ref):
+            mapping = selfref()
+            if mapping is not None and mapping.data.get(ref.key) is ref:
+                del mapping.data[ref.key]
+        self._remove = remove
+        self.update(*args, **kwargs)
+
+    def __getitem__(self, key):
+        value = self.data[key]()
+        if value is None:
+            raise KeyError(key)
+        return value
+
+    def __setitem__(self, key, value):
+        self.data[key] = weakref.KeyedRef(value, self._remove, key)
+
+    def __delitem__(self, key):
+        del self.data[key]
+
+    def __iter__(self):
+        return (key for key, ref in self.data.items() if ref() is not None)
+
+    def __len__(self):
+        return len(self.data)
+
+    def __repr__(self):
+        return '{0}({1})'.format(self.__class__.__name__, list(self.iteritems()))
+
+
 class Tree(collections.defaultdict):
     """
 
@@ -241,19 +333,174 @@ class Tree(collections.defaultdict):
 tree = Tree.tree
 
 
+class TopicTrieNode(object):
+    """
+    Node of a :class: `~scatter.structures.TopicTrie` which holds the values subscribed to the
+    pattern ending at it and its children keyed by the next word of the pattern.
+    """
+
+    __slots__ = ('values', 'children')
+
+    def __init__(self, values=(), children=None):
+        self.values = values
+        self.children = children or {}
+
+
+class TopicTrie(object):
+    """
+    Immutable trie of values subscribed to dot separated topic patterns, ex: `service.*.started`.
+
+    Within a pattern, `*` matches exactly one word and `#` matches zero or more words, so
+    `service.#` subscribes to every topic prefixed by `service`. Matching a topic walks the trie
+    word by word, which costs the same regardless of how many patterns are subscribed.
+
+    Adding or removing a subscription returns a new trie which shares every untouched node with
+    the old one, so readers holding the old trie are never affected by writers.
+    """
+
+    #: Pattern word which matches exactly one topic word.
+    ONE = '*'
+
+    #: Pattern word which matches zero or more topic words.
+    ANY = '#'
+
+    def __init__(self, root=None, size=0):
+        self.root = root or TopicTrieNode()
+        self.size = size
+
+    def __len__(self):
+        return self.size
+
+    def __iter__(self):
+        stack = [((), self.root)]
+        while stack:
+            words, node = stack.pop()
+            for value in node.values:
+                yield '.'.join(words), value
+            for word, child in node.children.iteritems():
+                stack.append((words + (word,), child))
+
+    @staticmethod
+    def split(topic):
+        """
+        Return the words of the given topic or pattern.
+        """
+        return topic.split('.') if topic else []
+
+    def add(self, pattern, value):
+        """
+        Return a new trie with the given value subscribed to the given pattern.
+
+        :param pattern: Dot separated topic pattern.
+        :param value: Value returned by matches of the pattern.
+        """
+        root = self._update(self.root, self.split(pattern), lambda values: values + (value,))
+        return TopicTrie(root, self.size + 1)
+
+    def remove(self, pattern, value):
+        """
+        Return a new trie without the given value subscribed to the given pattern.
+
+        :param pattern: Dot separated topic pattern.
+        :param value: Value previously added for the pattern.
+        """
+        words, node = self.split(pattern), self.root
+        for word in words:
+            node = node.children.get(word)
+            if node is None:
+                raise KeyError(pattern)
+        if value not in node.values:
+            raise KeyError(pattern)
+
+        def _remove(values):
+            values = list(values)
+            values.remove(value)
+            return tuple(values)
+
+        return TopicTrie(self._update(self.root, words, _remove), self.size - 1)
+
+    def match(self, topic):
+        """
+        Return a tuple of unique values subscribed to patterns which match the given topic.
+
+        :param topic: Dot separated topic.
+        """
+        matches = []
+        self._match(self.root, self.split(topic), 0, matches)
+        if len(matches) < 2:
+            return tuple(matches)
+
+        # Values are told apart by equality, so a bound method subscribed to several matching
+        # patterns is only returned once even though each access creates a new method object.
+        seen, unique = set(), []
+        for value in matches:
+            try:
+                if value in seen:
+                    continue
+                seen.add(value)
+            except TypeError:
+                if value in unique:
+                    continue
+            unique.append(value)
+        return tuple(unique)
+
+    def _match(self, node, words, index, matches):
+        if index == len(words):
+            matches.extend(node.values)
+        else:
+            for word in (words[index], self.ONE):
+                child = node.children.get(word)
+                if child is not None:
+                    self._match(child, words, index + 1, matches)
+
+        child = node.children.get(self.ANY)
+        if child is not None:
+            for i in xrange(index, len(words) + 1):
+                self._match(child, words, i, matches)
+
+    def _update(self, node, words, func):
+        """
+        Return a copy of the given node with the values at the end of the given words
+        replaced by the result of `func`, pruning nodes left empty.
+        """
+        if not words:
+            return TopicTrieNode(func(node.values), node.children)
+
+        word, children = words[0], dict(node.children)
+        child = self._update(children.get(word) or TopicTrieNode(), words[1:], func)
+        if child.values or child.children:
+            children[word] = child
+        else:
+            children.pop(word, None)
+        return TopicTrieNode(node.values, children)
+
+
 class Enum(object):
     """
+    Collection of named members whose values are distinct bit flags, so sets of members
+    compose with `|` into a single :class: `~scatter.structures.EnumMember`.
 
+    ..example::
+        State = Enum('State', 'New Running Stopped')
+        started = State.Running | State.Stopped
+        assert State.Running in started
     """
 
     def __init__(self, enum, names):
+        self.members = []
         for i, name in enumerate(names.split()):
-            setattr(self, name, EnumMember(enum, name, 2 ** i))
+            member = EnumMember(enum, name, 2 ** i)
+            self.members.append(member)
+            setattr(self, name, member)
+
+    def __iter__(self):
+        return iter(self.members)
 
 
 class EnumMember(object):
     """
-
+    Member of an :class: `~scatter.structures.Enum`, or a set of them composed with `|`.
+    Members compare and hash by value, and `in` checks for a subset with a single bitwise AND.
     """
 
     __slots__ = ('enum', 'name', 'value')
@@ -268,8 +515,36 @@ class EnumMember(object):
             return self.value == other.value
         return self.value == other
 
+    def __ne__(self, other):
+        return not self == other
+
+    def __hash__(self):
+        return hash(self.value)
+
+    def __int__(self):
+        return self.value
+
+    def __nonzero__(self):
+        return bool(self.value)
+
+    def __or__(self, other):
+        value = getattr(other, 'value', other)
+        name = '{0}|{1}'.format(self.name, getattr(other, 'name', other))
+        return EnumMember(self.enum, name, self.value | value)
+
+    __ror__ = __or__
+
+    def __and__(self, other):
+        return self.value & getattr(other, 'value', other)
+
+    __rand__ = __and__
+
+    def __contains__(self, item):
+        value = getattr(item, 'value', item)
+        return value != 0 and self.value & value == value
+
     def __repr__(self):
-        return '<{0}.{1}: {2}'.format(self.enum, self.name, self.value)
+        return '<{0}.{1}: {2}>'.format(self.enum, self.name, self.value)
 
     def __str__(self):
         return '{0}.{1}'.format(self.enum, self.name)
@@ -0,0 +1,545 @@
+"""
+    scatter.timers
+    ~~~~~~~~~~~~~~
+
+    Implements a service which runs large numbers of timeouts and periodic jobs from a
+    hierarchical timing wheel.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('TimerService', 'TimerWheel', 'Timer')
+
+
+import math
+import operator
+import threading
+import time
+
+from scatter.config import ConfigAttribute
+from scatter.descriptors import cached
+from scatter.service import Service
+
+
+class Timer(object):
+    """
+    Callable scheduled on a :class: `~scatter.timers.TimerWheel`, optionally repeating every
+    `interval` seconds.
+    """
+
+    __slots__ = ('wheel', 'deadline', 'func', 'args', 'kwargs', 'interval', 'expiry', 'slot', 'cancelled')
+
+    def __init__(self, wheel, deadline, func, args, kwargs, interval=None):
+        self.wheel = wheel
+        self.deadline = deadline
+        self.func = func
+        self.args = args
+        self.kwargs = kwargs
+        self.interval = interval
+        self.expiry = 0
+        self.slot = None
+        self.cancelled = False
+
+    def __repr__(self):
+        return '<{0}: {1} at {2}>'.format(self.__class__.__name__, getattr(self.func, '__name__', self.func),
+                                          self.deadline)
+
+    @property
+    def pending(self):
+        """
+        `True` while the timer is waiting on the wheel for its deadline.
+        """
+        return self.slot is not None
+
+    def cancel(self):
+        """
+        Prevent the timer from running again. Returns `True` if it was still pending.
+        """
+        return self.wheel.cancel(self)
+
+
+class TimerWheel(object):
+    """
+    Hierarchical hashed timing wheel which schedules and cancels timers in constant time no
+    matter how many are pending.
+
+    Time is divided into ticks of `tick` seconds since the wheel was created. The first level
+    has a slot for each of the next `slots` ticks and every following level has a slot for
+    each `slots` slots of the level below, ex: four levels of 256 slots span 2^32 ticks. Timers
+    further out wait in an overflow set. A timer is added to the slot covering its tick on the
+    lowest level which reaches it. Whenever a level wraps around, the next slot of the level
+    above is cascaded down, so a timer is moved at most once per level before it fires.
+
+    Timers fire on the first tick at or after their deadline, so they're never early and at
+    most one tick late plus however late :meth: `~scatter.timers.TimerWheel.advance` is called.
+    Advancing skips straight over ticks which have nothing to fire or cascade.
+
+    :param tick: (Optional) Number of seconds per tick. Defaults to `0.01`.
+    :param slots: (Optional) Number of slots per level, a power of two. Defaults to `256`.
+    :param levels: (Optional) Number of levels. Defaults to `4`.
+    :param now: (Optional) Time of the first tick. Defaults to the current time.
+    """
+
+    def __init__(self, tick=0.01, slots=256, levels=4, now=None):
+        bits = int(slots).bit_length() - 1
+        if slots < 2 or 1 << bits != slots:
+            raise ValueError('Number of wheel slots must be a power of two; got {0}'.format(slots))
+        if levels < 1:
+            raise ValueError('Number of wheel levels must be at least one; got {0}'.format(levels))
+
+        self.tick = float(tick)
+        self.bits = bits
+        self.mask = slots - 1
+        self.levels = [[set() for _ in xrange(slots)] for _ in xrange(levels)]
+        self.overflow = set()
+        self.origin = time.time() if now is None else now
+        self.current = 0
+        self.count = 0
+        self.lock = threading.Lock()
+
+    def __len__(self):
+        return self.count
+
+    def schedule(self, deadline, func, args=(), kwargs=None, interval=None):
+        """
+        Add a timer which runs the given callable once the given time has passed.
+
+        :param deadline: Time, in seconds since the epoch, to run the callable at.
+        :param func: Callable to run.
+        :param args: (Optional) Positional arguments for the callable.
+        :param kwargs: (Optional) Keyword arguments for the callable.
+        :param interval: (Optional) Number of seconds between runs of a periodic timer.
+        :return: :class: `~scatter.timers.Timer` which can be cancelled.
+        """
+        timer = Timer(self, deadline, func, args, kwargs or {}, interval)
+        with self.lock:
+            self._add(timer)
+        return timer
+
+    def reschedule(self, timer, deadline):
+        """
+        Move the given timer to a new deadline, adding it again if it has already fired.
+        Returns `False` if the timer was cancelled.
+
+        :param timer: :class: `~scatter.timers.Timer` of this wheel.
+        :param deadline: Time, in seconds since the epoch, to run the timer at.
+        """
+        with self.lock:
+            if timer.cancelled:
+                return False
+            self._remove(timer)
+            timer.deadline = deadline
+            self._add(timer)
+            return True
+
+    def cancel(self, timer):
+        """
+        Remove the given timer from the wheel. Returns `True` if it was still pending.
+
+        :param timer: :class: `~scatter.timers.Timer` of this wheel.
+        """
+        with self.lock:
+            timer.cancelled = True
+            return self._remove(timer)
+
+    def advance(self, now=None):
+        """
+        Move the wheel forward to the given time and return a list of the timers whose deadline
+        has passed, ordered by deadline. The returned timers are no longer pending.
+
+        :param now: (Optional) Time to move to. Defaults to the current time.
+        """
+        now = time.time() if now is None else now
+        target = int((now - self.origin) / self.tick)
+        due = []
+
+        with self.lock:
+            while self.current < target:
+                # Nothing happens on the ticks before the next one to fire or cascade, so skip them.
+                tick = self._next_tick()
+                if tick is None or tick > target:
+                    self.current = target
+                    break
+                self.current = tick
+                self._cascade()
+                slot = self.levels[0][self.current & self.mask]
+                if slot:
+                    for timer in slot:
+                        timer.slot = None
+                    self.count -= len(slot)
+                    due.extend(slot)
+                    slot.clear()
+
+        due.sort(key=operator.attrgetter('deadline'))
+        return due
+
+    def timeout(self, now=None):
+        """
+        Return the number of seconds until the next tick which has timers to fire or cascade,
+        or `None` while no timers are pending.
+
+        :param now: (Optional) Current time. Defaults to the current time.
+        """
+        now = time.time() if now is None else now
+        with self.lock:
+            tick = self._next_tick()
+        if tick is None:
+            return None
+        return max(self.origin + tick * self.tick - now, 0.0)
+
+    def clear(self):
+        """
+        Remove every pending timer from the wheel.
+        """
+        with self.lock:
+            for slot in self._slots():
+                for timer in slot:
+                    timer.slot = None
+                slot.clear()
+            self.count = 0
+
+    def _next_tick(self):
+        """
+        Return the first tick after the current one which fires or cascades a timer, or `None`
+        if no timers are pending. Must be called holding the wheel lock.
+        """
+        if not self.count:
+            return None
+
+        # Every level is checked over one turn of its slots, which visits each of them once.
+        current, found = self.current, None
+        for level, slots in enumerate(self.levels):
+            shift = self.bits * level
+            step = 1 << shift
+            tick = ((current >> shift) + 1) << shift
+            end = tick + (step << self.bits)
+            if found is not None:
+                end = min(end, found)
+            while tick < end:
+                if slots[(tick >> shift) & self.mask]:
+                    found = tick
+                    break
+                tick += step
+
+        if self.overflow:
+            shift = self.bits * len(self.levels)
+            tick = ((current >> shift) + 1) << shift
+            found = tick if found is None else min(found, tick)
+        return found
+
+    def _slots(self):
+        """
+        Generator of every slot of the wheel, including overflow.
+        """
+        for level in self.levels:
+            for slot in level:
+                yield slot
+        yield self.overflow
+
+    def _add(self, timer):
+        """
+        Add the given timer to the slot covering its deadline. Must be called holding the wheel lock.
+        """
+        expiry = int(math.ceil((timer.deadline - self.origin) / self.tick))
+        timer.expiry = max(expiry, self.current + 1)
+        self._place(timer)
+        self.count += 1
+
+    def _remove(self, timer):
+        """
+        Remove the given timer from its slot. Must be called holding the wheel lock.
+        """
+        slot = timer.slot
+        if slot is None:
+            return False
+        slot.discard(timer)
+        timer.slot = None
+        self.count -= 1
+        return True
+
+    def _place(self, timer):
+        """
+        Put the given timer in the slot of the lowest level which reaches its tick.
+        """
+        delta = timer.expiry - self.current
+        for level, slots in enumerate(self.levels):
+            shift = self.bits * level
+            if delta >> (shift + self.bits) == 0:
+                slot = slots[(timer.expiry >> shift) & self.mask]
+                break
+        else:
+            slot = self.overflow
+        slot.add(timer)
+        timer.slot = slot
+
+    def _cascade(self):
+        """
+        Move timers of the slots of higher levels which start at the current tick down the wheel.
+        """
+        current = self.current
+        for level in xrange(1, len(self.levels)):
+            shift = self.bits * level
+            if current & ((1 << shift) - 1):
+                return
+            self._replace(self.levels[level][(current >> shift) & self.mask])
+
+        if not current & ((1 << self.bits * len(self.levels)) - 1):
+            self._replace(self.overflow)
+
+    def _replace(self, slot):
+        """
+        Empty the given slot and place its timers again relative to the current tick.
+        """
+        timers = list(slot)
+        slot.clear()
+        for timer in timers:
+            self._place(timer)
+
+
+class TimerService(Service):
+    """
+    Service which runs callables once a timeout passes or periodically, ex: RPC deadlines, idle
+    stream eviction, expiring entries or retry backoff.
+
+    Timers are kept on a :class: `~scatter.timers.TimerWheel`, so scheduling and cancelling them
+    costs the same with thousands pending, which suits timeouts which are mostly cancelled
+    before they fire. Deadlines are rounded up to `tick` seconds.
+
+    The wheel is advanced by a dedicated thread by default. Set `threaded` to `False` and either
+    call :meth: `~scatter.timers.TimerService.drive` to advance it from the event loop of a
+    :class: `~scatter.reactor.Reactor`, or call :meth: `~scatter.timers.TimerService.advance`
+    from another loop, waiting no longer than :meth: `~scatter.timers.TimerService.timeout` between calls.
+    """
+
+    #: Set the number of seconds per tick of the wheel. Defaults to `0.01` seconds.
+    tick = ConfigAttribute(0.01)
+
+    #: Set the number of slots per level of the wheel, a power of two. Defaults to `256`.
+    wheel_slots = ConfigAttribute(256)
+
+    #: Set the number of levels of the wheel. Defaults to `4`, which spans 497 days of `0.01` second ticks.
+    wheel_levels = ConfigAttribute(4)
+
+    #: Set the maximum number of seconds the timer thread waits while no timers are pending
+    #: before checking the service state. Defaults to `1` second.
+    poll_timeout = ConfigAttribute(1.0)
+
+    #: Toggle advancing the wheel on a dedicated thread when the service starts. Defaults to `True`.
+    threaded = ConfigAttribute(True)
+
+    #: Thread which advances the wheel when `threaded` is set.
+    thread = None
+
+    #: Reactor whose event loop advances the wheel, set by :meth: `~scatter.timers.TimerService.drive`.
+    reactor = None
+
+    #: Reactor timer of the next tick with timers to fire while a reactor advances the wheel.
+    driver = None
+
+    #: Time whatever advances the wheel next wakes up at, or infinity while it is awake or idle,
+    #: so timers scheduled before then wake it up early.
+    wakeup = float('inf')
+
+    #: Number of timers run, periodic runs skipped because the wheel fell behind and the
+    #: total and maximum number of seconds timers ran after their deadline.
+    fired = 0
+    skipped = 0
+    late_total = 0.0
+    late_max = 0.0
+
+    @cached
+    def wheel(self):
+        """
+        Wheel of pending timers.
+        """
+        return TimerWheel(self.tick, self.wheel_slots, self.wheel_levels)
+
+    @cached
+    def pending(self):
+        """
+        Event set when the first timer is scheduled to wake up the timer thread.
+        """
+        return threading.Event()
+
+    def call_later(self, delay, func, *args, **kwargs):
+        """
+        Run the given callable once the given number of seconds have passed. This is safe to
+        call from other threads.
+
+        :param delay: Number of seconds to wait before running the callable.
+        :param func: Callable to run.
+        :return: :class: `~scatter.timers.Timer` which can be cancelled.
+        """
+        return self._schedule(time.time() + delay, func, args, kwargs)
+
+    def call_at(self, deadline, func, *args, **kwargs):
+        """
+        Run the given callable once the given time has passed. This is safe to call from other threads.
+
+        :param deadline: Time, in seconds since the epoch, to run the callable at.
+        :param func: Callable to run.
+        :return: :class: `~scatter.timers.Timer` which can be cancelled.
+        """
+        return self._schedule(deadline, func, args, kwargs)
+
+    def call_every(self, interval, func, *args, **kwargs):
+        """
+        Run the given callable every given number of seconds, starting one interval from now,
+        until its timer is cancelled. This is safe to call from other threads.
+
+        Each run is scheduled one interval after the deadline of the previous run rather than
+        after it finished, so the job doesn't drift. Runs missed while the wheel was behind
+        are skipped rather than run back to back.
+
+        :param interval: Number of seconds between runs.
+        :param func: Callable to run.
+        :return: :class: `~scatter.timers.Timer` which can be cancelled.
+        """
+        if interval <= 0:
+            raise ValueError('Timer interval must be positive; got {0}'.format(interval))
+        return self._schedule(time.time() + interval, func, args, kwargs, interval)
+
+    def cancel(self, timer):
+        """
+        Prevent the given timer from running again. Returns `True` if it was still pending.
+
+        :param timer: :class: `~scatter.timers.Timer` returned when it was scheduled.
+        """
+        return self.wheel.cancel(timer)
+
+    def timeout(self):
+        """
+        Return the maximum number of seconds an event loop should wait before calling
+        :meth: `~scatter.timers.TimerService.advance`, or `None` while no timers are pending.
+        Timers scheduled while waiting may be due sooner.
+        """
+        return self.wheel.timeout()
+
+    def advance(self, now=None):
+        """
+        Run every timer whose deadline has passed and return the number run.
+
+        :param now: (Optional) Current time. Defaults to :func: `~time.time`, which is also read
+            again as each timer runs to measure how late it is.
+        """
+        clock = time.time if now is None else lambda: now
+        now = clock()
+        due = self.wheel.advance(now)
+        for timer in due:
+            # Cancelled by a timer which ran before it within this call.
+            if timer.cancelled:
+                continue
+
+            late = clock() - timer.deadline
+            self.fired += 1
+            self.late_total += late
+            self.late_max = max(self.late_max, late)
+
+            try:
+                timer.func(*timer.args, **timer.kwargs)
+            except Exception:
+                self.log.exception('Exception raised in timer {0}'.format(timer.func))
+
+            if timer.interval is not None:
+                self._repeat(timer, now)
+        return len(due)
+
+    def drive(self, reactor):
+        """
+        Advance the wheel from the event loop of the given reactor, for services which set
+        `threaded` to `False`. Timers then run on the reactor thread.
+
+        :param reactor: :class: `~scatter.reactor.Reactor` instance.
+        """
+        self.reactor = reactor
+        reactor.call_soon(self._drive)
+
+    def stats(self):
+        """
+        Dict of the number of pending timers, counters of timers run and skipped and the mean
+        and maximum number of seconds timers ran after their deadline.
+        """
+        fired = self.fired
+        return dict(timers=len(self.wheel), fired=fired, skipped=self.skipped,
+                    late_mean=self.late_total / fired if fired else 0.0, late_max=self.late_max)
+
+    def run(self):
+        """
+        Advance the wheel whenever it has timers to fire until the service is stopped.
+        """
+        while self.running() and self.thread is not False:
+            timeout = self.wheel.timeout()
+            timeout = self.poll_timeout if timeout is None else min(timeout, self.poll_timeout)
+            self.wakeup = time.time() + timeout
+            self.pending.wait(timeout)
+            self.pending.clear()
+            self.wakeup = float('inf')
+            self.advance()
+
+    def on_started(self, *args, **kwargs):
+        """
+        """
+        if self.threaded:
+            self.thread = threading.Thread(target=self.run, name='{0}-timers'.format(self.name))
+            self.thread.daemon = True
+            self.thread.start()
+
+    def on_stopping(self, *args, **kwargs):
+        """
+        """
+        reactor, self.reactor = self.reactor, None
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            driver.cancel()
+
+        thread, self.thread = self.thread, False
+        if thread:
+            self.pending.set()
+            if thread is not threading.current_thread():
+                thread.join(self.stop_timeout)
+
+    def on_stopped(self, *args, **kwargs):
+        """
+        """
+        self.wheel.clear()
+
+    def _schedule(self, deadline, func, args, kwargs, interval=None):
+        """
+        Add a timer to the wheel, waking up whatever advances it if it would wake up too late.
+        """
+        timer = self.wheel.schedule(deadline, func, args, kwargs, interval)
+        if deadline < self.wakeup:
+            if self.thread:
+                self.pending.set()
+            elif self.reactor is not None:
+                self.reactor.call_soon(self._drive)
+        return timer
+
+    def _repeat(self, timer, now):
+        """
+        Schedule the next run of the given periodic timer one interval after its last deadline.
+        """
+        deadline = timer.deadline + timer.interval
+        if deadline <= now:
+            missed = int((now - deadline) / timer.interval) + 1
+            self.skipped += missed
+            deadline += missed * timer.interval
+        self.wheel.reschedule(timer, deadline)
+
+    def _drive(self):
+        """
+        Advance the wheel on the reactor thread and schedule the next tick with timers to fire
+        while timers are pending.
+        """
+        driver, self.driver = self.driver, None
+        if driver is not None:
+            driver.cancel()
+        reactor = self.reactor
+        if reactor is None:
+            return
+        self.wakeup = float('inf')
+        self.advance()
+        timeout = self.wheel.timeout()
+        if timeout is not None:
+            self.wakeup = time.time() + timeout
+            self.driver = reactor.call_later(timeout, self._drive)
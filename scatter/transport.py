@@ -0,0 +1,625 @@
+"""
+    scatter.transport
+    ~~~~~~~~~~~~~~~~~
+
+    Implements non-blocking TCP and unix domain socket streams driven by a
+    :class: `~scatter.reactor.Reactor`.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('SocketStream', 'TcpStream', 'UnixStream', 'parse_address', 'connect', 'bind')
+
+
+import collections
+import errno
+import os
+import socket
+import struct
+import threading
+
+from scatter.importer import import_from
+from scatter.reactor import EVENT_READ, EVENT_WRITE
+from scatter.stream import Stream
+
+
+#: Fully qualified stream types keyed by the address scheme they serve.
+STREAM_SCHEMES = {
+    'tcp': 'scatter.transport.TcpStream',
+    'ipc': 'scatter.transport.UnixStream',
+    'unix': 'scatter.transport.UnixStream',
+    'inproc': 'scatter.inproc.InprocStream',
+}
+
+#: Every message is framed on the wire by its length as a 4-byte, big-endian unsigned integer.
+FRAME_HEADER = struct.Struct('!I')
+
+#: Socket errors which mean the operation should be retried once the socket is ready.
+WOULD_BLOCK = (errno.EAGAIN, errno.EWOULDBLOCK, errno.EINTR)
+
+#: Socket errors which mean the peer has gone away.
+DISCONNECTED = (errno.ECONNRESET, errno.ECONNABORTED, errno.EPIPE, errno.ENOTCONN, errno.ESHUTDOWN)
+
+
+def parse_address(address):
+    """
+    Split the given address into its scheme and location, ex: `tcp://127.0.0.1:5555`
+    returns `('tcp', '127.0.0.1:5555')`.
+
+    :param address: Address string in `scheme://location` form.
+    """
+    scheme, sep, location = address.partition('://')
+    if not sep or not location:
+        raise ValueError('Invalid stream address {0}'.format(address))
+    return scheme.lower(), location
+
+
+def stream_class(address):
+    """
+    Return the stream class which serves the scheme of the given address.
+
+    :param address: Address string in `scheme://location` form.
+    """
+    scheme, _ = parse_address(address)
+    try:
+        return import_from(STREAM_SCHEMES[scheme])
+    except KeyError:
+        raise ValueError('No stream registered for scheme {0}'.format(scheme))
+
+
+def connect(address, reactor=None, **kwargs):
+    """
+    Create a stream connected to the given address.
+
+    :param address: Address string in `scheme://location` form, ex: `tcp://127.0.0.1:5555`.
+    :param reactor: (Optional) :class: `~scatter.reactor.Reactor` which drives the stream.
+    """
+    stream = stream_class(address).create(reactor, **kwargs)
+    stream.connect(address)
+    return stream
+
+
+def bind(address, reactor=None, **kwargs):
+    """
+    Create a stream which listens for connections on the given address.
+
+    :param address: Address string in `scheme://location` form, ex: `ipc:///tmp/my.sock`.
+    :param reactor: (Optional) :class: `~scatter.reactor.Reactor` which drives the stream.
+    """
+    stream = stream_class(address).create(reactor, **kwargs)
+    stream.bind(address)
+    return stream
+
+
+class SocketStream(Stream):
+    """
+    Stream of length framed messages over a non-blocking stream socket.
+
+    Sends are buffered and flushed whenever the socket is writable. Received messages are
+    passed to all `on_recv` callbacks or queued for :meth: `~scatter.transport.SocketStream.recv`
+    when none are registered. Listening streams pass newly accepted streams to their `on_accept`
+    callbacks instead.
+    """
+
+    #: Address family of the underlying socket.
+    family = None
+
+    #: Address scheme of this stream type.
+    scheme = None
+
+    #: Number of pending connections a listening stream will queue.
+    backlog = 128
+
+    #: Maximum number of bytes read from the socket at once.
+    read_size = 65536
+
+    #: Maximum number of bytes of a received message. Streams whose peer announces a larger
+    #: message are closed rather than buffering it.
+    max_frame_size = 64 * 1024 * 1024
+
+    #: Number of received messages queued for `recv` at which the stream stops reading
+    #: from the socket, and the number at which it starts reading again.
+    high_water = 1024
+    low_water = 256
+
+    #: Number of buffered outbound bytes at which the stream is no longer writable, and the
+    #: number at which `on_drain` callbacks are raised once it is writable again.
+    write_high_water = 4 * 1024 * 1024
+    write_low_water = 1024 * 1024
+
+    #: Number of seconds a sent message may wait for more to be written along with it. Defaults
+    #: to `None` which writes every message as soon as the socket allows. Set this to a small
+    #: delay, ex: `0.0002`, to coalesce bursts of small messages into fewer, larger writes.
+    coalesce_delay = None
+
+    #: Maximum number of bytes and messages written by a single send. Coalescing streams also
+    #: write as soon as either is reached instead of waiting for `coalesce_delay`.
+    coalesce_bytes = 65536
+    coalesce_count = 64
+
+    #: Codec used to encode/decode messages of this stream. Defaults to `None` which
+    #: uses the codec of the protocol handling the stream.
+    codec = None
+
+    def __init__(self, sock, reactor=None, address=None, **options):
+        super(SocketStream, self).__init__(sock)
+        sock.setblocking(False)
+        for name, value in options.iteritems():
+            if not hasattr(type(self), name):
+                raise TypeError('Unknown stream option {0}'.format(name))
+            setattr(self, name, value)
+        self.options = options
+        self.reactor = reactor
+        self.address = address
+        self.listening = False
+        self.connected = False
+        self.closed = False
+        self.reading = True
+        self.framing = False
+        self.registered = False
+        self.events = 0
+        self.inbox = collections.deque()
+        self.outbox = collections.deque()
+        self.outbox_bytes = 0
+        self.outbox_full = False
+        self.outbox_lock = threading.Lock()
+        self.batch = None
+        self.batch_offset = 0
+        self.flush_timer = None
+        self.flushing = False
+        self.batches = 0
+        self.batched_messages = 0
+        self.batched_bytes = 0
+        self.max_batch = 0
+        self.read_buffer = bytearray()
+        self.accept_callbacks = []
+        self.recv_callbacks = []
+        self.send_callbacks = []
+        self.close_callbacks = []
+        self.drain_callbacks = []
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.address)
+
+    @classmethod
+    def create(cls, reactor=None, **options):
+        """
+        Create a new, unconnected stream.
+
+        :param reactor: (Optional) :class: `~scatter.reactor.Reactor` which drives the stream.
+        :param options: (Optional) Values which override class attributes, ex: `coalesce_delay`.
+            Streams accepted by a listening stream inherit its options.
+        """
+        return cls(socket.socket(cls.family, socket.SOCK_STREAM), reactor, **options)
+
+    @property
+    def socket_type(self):
+        return self.scheme
+
+    def fileno(self):
+        return self._socket.fileno()
+
+    def to_location(self, address):
+        """
+        Return the socket address for the given address string.
+        """
+        raise NotImplementedError('Abstract method must be implemented in derived class.')
+
+    def from_location(self, location):
+        """
+        Return the address string for the given socket address.
+        """
+        raise NotImplementedError('Abstract method must be implemented in derived class.')
+
+    def on_accept(self, func):
+        self.accept_callbacks.append(func)
+
+    def on_send(self, func):
+        self.send_callbacks.append(func)
+
+    def on_recv(self, func):
+        self.recv_callbacks.append(func)
+
+    def on_close(self, func):
+        self.close_callbacks.append(func)
+
+    def on_drain(self, func):
+        self.drain_callbacks.append(func)
+
+    def writable(self):
+        """
+        Returns `False` while buffered outbound bytes are above the `write_high_water` mark.
+        """
+        return not self.outbox_full
+
+    def pause_reading(self):
+        """
+        Stop reading from the socket, leaving the peer to block once socket buffers fill up.
+        """
+        if self.reading:
+            self.reading = False
+            self._watch(self._interest(bool(self.outbox)))
+
+    def resume_reading(self):
+        """
+        Start reading from the socket again after :meth: `~scatter.transport.SocketStream.pause_reading`.
+        """
+        if not self.reading:
+            self.reading = True
+            self._watch(self._interest(bool(self.outbox)))
+            # Complete messages may have been left in the read buffer when reading paused.
+            if self.reactor is None or self.reactor.in_reactor():
+                self.handle_frames()
+            else:
+                self.reactor.call_soon(self.handle_frames)
+
+    def occupancy(self):
+        """
+        Dict of the number of messages and bytes currently buffered by this stream.
+        """
+        return dict(inbox=len(self.inbox), outbox=len(self.outbox), outbox_bytes=self.outbox_bytes,
+                    read_buffer=len(self.read_buffer), reading=self.reading, writable=self.writable())
+
+    def write_stats(self):
+        """
+        Dict of the number of writes made and the messages and bytes they carried.
+        """
+        batches = self.batches
+        return dict(batches=batches, messages=self.batched_messages, bytes=self.batched_bytes,
+                    max_batch=self.max_batch, mean_batch=float(self.batched_messages) / batches if batches else 0.0)
+
+    def connect(self, address):
+        """
+        Start connecting to the given address. Sends made before the connection completes
+        are buffered until it does.
+
+        :param address: Address string in `scheme://location` form.
+        """
+        self.address = address
+        err = self._socket.connect_ex(self.to_location(address))
+        if err not in (0, errno.EINPROGRESS, errno.EAGAIN, errno.EWOULDBLOCK):
+            raise socket.error(err, os.strerror(err))
+        self.connected = err == 0
+        self._watch(self._interest(True))
+
+    def bind(self, address):
+        """
+        Start listening for connections on the given address.
+
+        :param address: Address string in `scheme://location` form.
+        """
+        self._socket.bind(self.to_location(address))
+        self._socket.listen(self.backlog)
+        self.address = self.from_location(self._socket.getsockname())
+        self.listening = True
+        self._watch(EVENT_READ)
+
+    def send(self, msg):
+        """
+        Queue the given message to be written to the stream. This is safe to call from any thread.
+
+        :param msg: Bytes of a single message.
+        """
+        if self.closed:
+            raise socket.error(errno.EPIPE, 'Stream is closed')
+
+        with self.outbox_lock:
+            frame = FRAME_HEADER.pack(len(msg)) + msg
+            self.outbox.append((frame, msg))
+            self.outbox_bytes += len(frame)
+            if self.outbox_bytes >= self.write_high_water:
+                self.outbox_full = True
+            queued = len(self.outbox)
+
+            if self.reactor is None:
+                # Nothing waits on writability without a reactor, so every send retries writes
+                # left behind when the socket was full.
+                flush = True
+            elif self.coalesce_delay is None:
+                # Writes already in flight will flush this message once the socket is writable.
+                flush = queued == 1 and self.batch is None
+            elif self.flushing or self.events & EVENT_WRITE:
+                flush = False
+            else:
+                flush = queued >= self.coalesce_count or self.outbox_bytes >= self.coalesce_bytes
+                if not flush and self.flush_timer is None:
+                    self.flush_timer = self.reactor.call_later(self.coalesce_delay, self.flush)
+
+        if flush:
+            self.flush()
+
+    def flush(self):
+        """
+        Write buffered messages now instead of waiting for more to coalesce with. Call this
+        after sending latency sensitive messages. This is safe to call from any thread.
+        """
+        with self.outbox_lock:
+            timer, self.flush_timer = self.flush_timer, None
+            self.flushing = True
+        if timer is not None:
+            timer.cancel()
+
+        if self.reactor is None or self.reactor.in_reactor():
+            self.handle_write()
+        else:
+            self.reactor.call_soon(self.handle_write)
+
+    def recv(self):
+        """
+        Return the next received message which was not consumed by `on_recv` callbacks,
+        or `None` if there are none.
+        """
+        try:
+            msg = self.inbox.popleft()
+        except IndexError:
+            return None
+        if not self.reading and len(self.inbox) <= self.low_water:
+            self.resume_reading()
+        return msg
+
+    def close(self):
+        """
+        Close the stream and notify all `on_close` callbacks.
+        """
+        if self.closed:
+            return
+        self.closed = True
+        if self.reactor is None or self.reactor.in_reactor():
+            self._release()
+        else:
+            self.reactor.call_soon(self._release)
+        for callback in self.close_callbacks:
+            callback(self)
+
+    def handle_events(self, events):
+        """
+        Handle readiness events dispatched by the reactor.
+
+        :param events: Mask of ready events.
+        """
+        if events & EVENT_READ:
+            if self.listening:
+                self.handle_accept()
+            else:
+                self.handle_read()
+        if events & EVENT_WRITE and not self.closed:
+            self.handle_write()
+
+    def handle_accept(self):
+        """
+        Accept all pending connections of a listening stream.
+        """
+        while True:
+            try:
+                sock, _ = self._socket.accept()
+            except socket.error as e:
+                if e.args[0] in WOULD_BLOCK:
+                    return
+                raise
+
+            stream = type(self)(sock, self.reactor, self.address, **self.options)
+            stream.connected = True
+            stream._watch(stream._interest())
+            for callback in self.accept_callbacks:
+                callback(self, stream)
+
+    def handle_read(self):
+        """
+        Read available bytes from the socket and dispatch every complete message.
+        """
+        try:
+            data = self._socket.recv(self.read_size)
+        except socket.error as e:
+            if e.args[0] in WOULD_BLOCK:
+                return
+            if e.args[0] in DISCONNECTED:
+                return self.close()
+            raise
+
+        if not data:
+            return self.close()
+
+        self.connected = True
+        self.read_buffer.extend(data)
+        self.handle_frames()
+
+    def handle_frames(self):
+        """
+        Dispatch every complete message in the read buffer until reading is paused.
+        """
+        # Reading resumed from within a callback continues in the outermost call.
+        if self.framing:
+            return
+
+        buf = self.read_buffer
+        offset, size = 0, len(buf)
+        self.framing = True
+        try:
+            while self.reading and size - offset >= FRAME_HEADER.size:
+                length, = FRAME_HEADER.unpack_from(buf, offset)
+                if length > self.max_frame_size:
+                    offset = size
+                    return self.close()
+                end = offset + FRAME_HEADER.size + length
+                if end > size:
+                    break
+                self.dispatch(str(buf[offset + FRAME_HEADER.size:end]))
+                offset = end
+        finally:
+            self.framing = False
+            if offset:
+                del buf[:offset]
+
+    def handle_write(self):
+        """
+        Write as much of the buffered messages as the socket accepts and stop waiting
+        on writability once everything is flushed.
+        """
+        with self.outbox_lock:
+            self.flushing = False
+            idle = self.closed or (not self.outbox and self.batch is None)
+        if idle:
+            return self._watch(self._interest())
+
+        sent, disconnected, drained = [], False, False
+        with self.outbox_lock:
+            while self.batch is not None or self.outbox:
+                if self.batch is None:
+                    self.batch, self.batch_offset = self._next_batch(), 0
+                data, msgs = self.batch
+                try:
+                    written = self._socket.send(buffer(data, self.batch_offset))
+                except socket.error as e:
+                    if e.args[0] in WOULD_BLOCK or e.args[0] == errno.ENOTCONN:
+                        break
+                    if e.args[0] not in DISCONNECTED:
+                        raise
+                    self.outbox.clear()
+                    self.batch = None
+                    disconnected = True
+                    break
+
+                self.connected = True
+                self.batch_offset += written
+                if self.batch_offset < len(data):
+                    break
+                self.batch = None
+                self.outbox_bytes -= len(data)
+                sent.extend(msgs)
+            pending = self.batch is not None or bool(self.outbox)
+            if self.outbox_full and self.outbox_bytes <= self.write_low_water:
+                self.outbox_full, drained = False, True
+
+        for msg in sent:
+            for callback in self.send_callbacks:
+                callback(self, msg)
+        if drained:
+            for callback in self.drain_callbacks:
+                callback(self)
+
+        if disconnected:
+            return self.close()
+        self._watch(self._interest(pending))
+
+    def dispatch(self, msg):
+        """
+        Pass a received message to all `on_recv` callbacks or queue it for `recv`.
+
+        :param msg: Bytes of a single message.
+        """
+        if not self.recv_callbacks:
+            self.inbox.append(msg)
+            if len(self.inbox) >= self.high_water:
+                self.pause_reading()
+            return
+        for callback in self.recv_callbacks:
+            callback(self, msg)
+
+    def _next_batch(self):
+        """
+        Remove as many queued frames as a single write may carry from the outbox and return
+        their joined bytes along with their messages. Must be called holding the outbox lock.
+        """
+        frame, msg = self.outbox.popleft()
+        frames, msgs, size = [frame], [msg], len(frame)
+        while self.outbox and len(frames) < self.coalesce_count:
+            frame, msg = self.outbox[0]
+            if size + len(frame) > self.coalesce_bytes:
+                break
+            self.outbox.popleft()
+            frames.append(frame)
+            msgs.append(msg)
+            size += len(frame)
+
+        self.batches += 1
+        self.batched_messages += len(msgs)
+        self.batched_bytes += size
+        self.max_batch = max(self.max_batch, len(msgs))
+        return (frames[0] if len(frames) == 1 else ''.join(frames)), msgs
+
+    def _release(self):
+        """
+        Stop watching the stream for events and close its socket.
+        """
+        if self.flush_timer is not None:
+            self.flush_timer.cancel()
+            self.flush_timer = None
+        if self.registered:
+            self.reactor.unregister(self)
+            self.registered = False
+            self.events = 0
+        self._socket.close()
+
+    def _watch(self, events):
+        """
+        Update the readiness events the reactor waits on for this stream.
+        """
+        if self.reactor is None or self.closed or events == self.events:
+            return
+        if not self.reactor.in_reactor():
+            return self.reactor.call_soon(self._watch, events)
+        if self.registered:
+            self.reactor.modify(self, events)
+        else:
+            self.reactor.register(self, events)
+            self.registered = True
+        self.events = events
+
+    def _interest(self, write=False):
+        """
+        Return the readiness events to wait for given whether buffered writes are pending.
+        """
+        events = EVENT_READ if self.reading or self.listening else 0
+        return events | EVENT_WRITE if write else events
+
+
+class TcpStream(SocketStream):
+    """
+    Stream over a TCP socket, addressed as `tcp://host:port`.
+    """
+
+    family = socket.AF_INET
+    scheme = 'tcp'
+
+    def connect(self, address):
+        self._socket.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        super(TcpStream, self).connect(address)
+
+    def bind(self, address):
+        self._socket.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        super(TcpStream, self).bind(address)
+
+    def to_location(self, address):
+        _, location = parse_address(address)
+        host, _, port = location.rpartition(':')
+        return host or '0.0.0.0', int(port)
+
+    def from_location(self, location):
+        return 'tcp://{0}:{1}'.format(*location[:2])
+
+
+class UnixStream(SocketStream):
+    """
+    Stream over a unix domain socket, addressed as `ipc:///path/to/socket`.
+    """
+
+    family = socket.AF_UNIX
+    scheme = 'ipc'
+
+    def bind(self, address):
+        path = self.to_location(address)
+        if os.path.exists(path):
+            os.remove(path)
+        super(UnixStream, self).bind(address)
+
+    def close(self):
+        if self.listening and not self.closed and os.path.exists(self.to_location(self.address)):
+            os.remove(self.to_location(self.address))
+        super(UnixStream, self).close()
+
+    def to_location(self, address):
+        _, location = parse_address(address)
+        return location
+
+    def from_location(self, location):
+        return 'ipc://{0}'.format(location)
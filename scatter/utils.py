@@ -7,11 +7,12 @@
     :copyright: (c) 2014 Andrew Hawker.
     :license: ?, See LICENSE file.
 """
-__all__ = ('iterable', 'get_import_path')
+__all__ = ('iterable', 'get_import_path', 'get_memory_usage', 'Deadline')
 
 
 import os
 import sys
+import time
 import collections
 
 
@@ -45,3 +46,59 @@ def get_import_path(import_name):
     # Attempt to import the module and return path to it.
     import_path = loader.get_filename(import_name)
     return os.path.dirname(os.path.abspath(import_path))
+
+
+def get_memory_usage(pid='self'):
+    """
+    Get the shared and private memory usage, in bytes, of the given process as reported
+    by `/proc/<pid>/smaps_rollup`. Returns `None` on platforms which do not expose it.
+
+    :param pid: (Optional) Process id to query. Defaults to the calling process.
+    """
+    path = '/proc/{0}/smaps_rollup'.format(pid)
+    try:
+        with open(path, 'rt') as f:
+            lines = f.readlines()
+    except (IOError, OSError):
+        return None
+
+    fields = {}
+    for line in lines:
+        parts = line.split()
+        if len(parts) == 3 and parts[2] == 'kB':
+            fields[parts[0].rstrip(':')] = int(parts[1]) * 1024
+
+    shared = fields.get('Shared_Clean', 0) + fields.get('Shared_Dirty', 0)
+    private = fields.get('Private_Clean', 0) + fields.get('Private_Dirty', 0)
+    return dict(rss=fields.get('Rss', 0), pss=fields.get('Pss', 0), shared=shared, private=private)
+
+
+class Deadline(object):
+    """
+    Point in time by which something must happen, for callers which wait in several steps
+    on the same timeout.
+
+    :param timeout: (Optional) Number of seconds from now. Defaults to `None` which never expires.
+    """
+
+    __slots__ = ('expires',)
+
+    def __init__(self, timeout=None):
+        self.expires = None if timeout is None else time.time() + timeout
+
+    def __repr__(self):
+        return '<{0}: {1}>'.format(self.__class__.__name__, self.remaining())
+
+    def remaining(self):
+        """
+        Return the number of seconds left, never less than zero, or `None` if the deadline never expires.
+        """
+        if self.expires is None:
+            return None
+        return max(self.expires - time.time(), 0.0)
+
+    def expired(self):
+        """
+        Returns `True` if the deadline has passed.
+        """
+        return self.expires is not None and time.time() >= self.expires
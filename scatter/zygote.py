@@ -0,0 +1,257 @@
+"""
+    scatter.zygote
+    ~~~~~~~~~~~~~~
+
+    Implementation of a long-lived, fully warmed process which forks new worker
+    processes on request.
+
+    :copyright: (c) 2014 Andrew Hawker.
+    :license: ?, See LICENSE file.
+"""
+__all__ = ('Zygote', 'ZygoteError', 'spawn')
+
+
+import errno
+import json
+import os
+import select
+import signal
+import socket
+
+from scatter.config import ConfigAttribute
+from scatter.exceptions import ScatterException
+from scatter.importer import import_from
+from scatter.process import Process
+
+
+#: Config keys which describe the zygote itself and are never inherited by its workers.
+ZYGOTE_ONLY_CONFIG = frozenset(('SERVICE_ID', 'SERVICE_NAME', 'CONFIG_FILE', 'CONTROL_SOCKET', 'GC_FREEZE'))
+
+
+class ZygoteError(ScatterException):
+    """
+    """
+
+
+class Zygote(Process):
+    """
+    Process which imports, configures and freezes itself once and then forks new worker
+    processes on request over a local control socket. Workers skip interpreter start-up,
+    package imports, extension discovery and config file execution, so they are ready in
+    milliseconds.
+
+    ..Requests::
+        Each request is a single line of JSON sent over the control socket:
+        `{"services": ["my.package.MyService"], "config": {"KEY": "value"}, "name": "worker"}`.
+        The zygote answers with a single line of JSON once the worker is running:
+        `{"pid": 1234, "id": "urn:uuid:..."}` or `{"error": "..."}` on failure.
+    """
+
+    #: Set the file path of the unix domain control socket used to request workers.
+    #: Defaults to `~/.{name}.zygote`.
+    control_socket = ConfigAttribute()
+
+    #: Set the number of pending spawn requests the control socket will queue. Defaults to `128`.
+    control_backlog = ConfigAttribute(128)
+
+    #: The class used to create new worker processes.
+    #: Defaults to :class: `~scatter.process.Process`.
+    worker_class = ConfigAttribute('scatter.process.Process')
+
+    #: Set the number of seconds to block waiting on requests before checking the service
+    #: state and reaping exited workers. Defaults to `0.5` seconds.
+    poll_interval = ConfigAttribute(0.5)
+
+    #: Set the maximum number of seconds to wait on a client to send its spawn request, so a
+    #: stalled client doesn't hold up every other request. Defaults to `5` seconds.
+    request_timeout = ConfigAttribute(5.0)
+
+    #: Freeze all warmed objects ahead of forking workers. Defaults to `True`.
+    gc_freeze = ConfigAttribute(True)
+
+    #: Listening socket which accepts spawn requests.
+    listener = None
+
+    def on_initializing(self, *args, **kwargs):
+        """
+        """
+        super(Zygote, self).on_initializing(*args, **kwargs)
+        if self.control_socket is None:
+            self.control_socket = os.path.expanduser('~/.{0}.zygote'.format(self.name))
+
+    def on_started(self, *args, **kwargs):
+        """
+        """
+        if os.path.exists(self.control_socket):
+            os.remove(self.control_socket)
+
+        # Processes clear their umask, so bind under one which leaves the socket to this user only,
+        # as anyone able to connect may have workers import and run code.
+        self.listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        umask = os.umask(0177)
+        try:
+            self.listener.bind(self.control_socket)
+        finally:
+            os.umask(umask)
+        self.listener.listen(self.control_backlog)
+        self.log.info('Zygote listening on {0}'.format(self.control_socket))
+
+    def on_stopping(self, *args, **kwargs):
+        """
+        """
+        if self.listener is not None:
+            self.listener.close()
+            self.listener = None
+        if os.path.exists(self.control_socket):
+            os.remove(self.control_socket)
+
+    def serve_forever(self):
+        """
+        Block the caller accepting and serving spawn requests until the zygote is stopped.
+        """
+        while self.running() and self.listener is not None:
+            try:
+                readable, _, _ = select.select([self.listener], [], [], self.poll_interval)
+            except select.error as e:
+                if e.args[0] != errno.EINTR:
+                    raise
+                readable = ()
+
+            if readable:
+                try:
+                    conn, _ = self.listener.accept()
+                except socket.error as e:
+                    if e.args[0] not in (errno.EAGAIN, errno.EINTR):
+                        raise
+                else:
+                    self.handle(conn)
+
+            for pid, status in self.reap():
+                self.log.info('Worker {0} exited with status {1}'.format(pid, status))
+
+    def handle(self, conn):
+        """
+        Read a single spawn request from the given connection and fork a worker to serve it.
+        The worker owns the connection from then on and replies once it is running.
+
+        :param conn: Connected socket a request is read from.
+        """
+        try:
+            conn.settimeout(self.request_timeout)
+            request = json.loads(_readline(conn))
+            conn.settimeout(None)
+            self.fork(lambda zygote: zygote.spawned(conn, request))
+        except (ValueError, OSError, socket.error) as e:
+            self.log.error('Unable to serve spawn request. {0}'.format(e))
+            _reply(conn, error=str(e))
+        finally:
+            conn.close()
+
+    def spawned(self, conn, request):
+        """
+        Create, start and run a worker process to completion as described by the given request.
+        This is called within the newly forked process.
+
+        :param conn: Connected socket of the client that requested this worker.
+        :param request: Dict describing the services, config overrides and name of the worker.
+        """
+        # Nothing from the zygote control loop belongs to the worker.
+        self.listener.close()
+        self.listener = None
+
+        try:
+            worker = self.create_worker(request)
+            worker.start()
+        except Exception as e:
+            _reply(conn, error=str(e))
+            raise
+
+        signal.signal(signal.SIGTERM, lambda signum, frame: worker.stop())
+        signal.signal(signal.SIGHUP, lambda signum, frame: worker.reload())
+
+        _reply(conn, pid=os.getpid(), id=worker.id)
+        conn.close()
+
+        while not worker.join(self.poll_interval):
+            pass
+
+    def create_worker(self, request):
+        """
+        Create and initialize a worker process for the given spawn request. Workers inherit the
+        zygote configuration, already executed from its config file, updated with any overrides.
+
+        :param request: Dict describing the services, config overrides and name of the worker.
+        """
+        config = dict((k, v) for k, v in self.config.iteritems() if k not in ZYGOTE_ONLY_CONFIG)
+        config.update(request.get('config') or {})
+
+        worker = import_from(request.get('process') or self.worker_class)()
+
+        # Reuse the extension packages discovered by the zygote instead of scanning them again.
+        worker.package_importer = self.package_importer
+        worker.init(name=request.get('name'), config=config)
+
+        for service in request.get('services') or ():
+            worker.child(import_from(service))
+        return worker
+
+    @classmethod
+    def run(cls, *args, **kwargs):
+        """
+        """
+        with cls.new(*args, **kwargs) as zygote:
+            zygote.serve_forever()
+
+
+def spawn(path, services=(), config=None, name=None, process=None, timeout=None):
+    """
+    Request a new worker from the zygote listening on the given control socket path. Blocks
+    until the worker is running and returns a dict containing its `pid` and service `id`.
+
+    :param path: File path of the zygote control socket.
+    :param services: (Optional) Fully qualified type strings of services to run within the worker.
+    :param config: (Optional) Dict of config values which override those of the zygote.
+    :param name: (Optional) Service name of the worker process.
+    :param process: (Optional) Fully qualified type string of the worker process class.
+    :param timeout: (Optional) Number of seconds to wait for the worker. Defaults to `None`.
+    """
+    request = dict(services=list(services), config=config or {}, name=name, process=process)
+
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.settimeout(timeout)
+    try:
+        conn.connect(path)
+        conn.sendall(json.dumps(request) + '\n')
+        reply = json.loads(_readline(conn))
+    finally:
+        conn.close()
+
+    error = reply.get('error')
+    if error is not None:
+        raise ZygoteError('Zygote failed to spawn worker. {0}'.format(error))
+    return reply
+
+
+def _readline(conn):
+    """
+    Read a single newline terminated message from the given socket.
+    """
+    chunks = []
+    while True:
+        chunk = conn.recv(4096)
+        if not chunk:
+            break
+        chunks.append(chunk)
+        if chunk.endswith('\n'):
+            break
+    return ''.join(chunks)
+
+
+def _reply(conn, **reply):
+    """
+    Write a single newline terminated reply to the given socket, ignoring clients which have gone away.
+    """
+    try:
+        conn.sendall(json.dumps(reply) + '\n')
+    except socket.error:
+        pass
@@ -0,0 +1,199 @@
+"""
+    tests.test_bus
+    ~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.bus` module.
+"""
+
+import pytest
+import threading
+
+from scatter import events
+from scatter.bus import EventBus
+from scatter.events import Event, ServiceEvent, ServiceInitialized, ServiceStarted, ServiceStopped
+from scatter.service import Service
+
+
+class Db(Service):
+    """
+    Service whose lifecycle events are subscribed to by type.
+    """
+
+
+class Deployed(Event):
+    """
+    Application event published by tests.
+    """
+
+
+@pytest.fixture(scope='function')
+def app(request):
+    app = Service.new(name='app', config=dict(TESTING=True))
+    request.addfinalizer(app.stop)
+    return app
+
+
+@pytest.fixture(scope='function')
+def bus(request, app):
+    bus = app.child(EventBus, config=dict(TESTING=True, THREADED=False))
+    request.addfinalizer(bus.stop)
+    return bus
+
+
+def test_publish_by_type_and_source(app, bus):
+    """
+    Test that subscribers receive events of their type, its subclasses and their source.
+    """
+    received = []
+    bus.subscribe(Event, lambda e: received.append(('any', e)))
+    bus.subscribe(Deployed, lambda e: received.append(('deployed', e)))
+    bus.subscribe(Deployed, lambda e: received.append(('app', e)), source=app)
+    bus.subscribe(Deployed, lambda e: received.append(('db', e)), source=Db)
+
+    first, second = Deployed(app, version=1), Deployed(bus, version=2)
+    bus.publish(first)
+    bus.publish(second)
+    assert sorted(name for name, e in received if e is first) == ['any', 'app', 'deployed']
+    assert sorted(name for name, e in received if e is second) == ['any', 'deployed']
+    assert first.version == 1
+
+
+def test_unsubscribe(bus):
+    """
+    Test that unsubscribed callbacks no longer receive events.
+    """
+    received = []
+    bus.subscribe(Deployed, received.append)
+    bus.publish(Deployed())
+    bus.unsubscribe(Deployed, received.append)
+    bus.publish(Deployed())
+    assert len(received) == 1
+    with pytest.raises(ValueError):
+        bus.unsubscribe(Deployed, received.append)
+
+
+def test_post_delivers_in_batches(bus):
+    """
+    Test that posted events are queued until flushed and delivered in order.
+    """
+    received = []
+    bus.config['BATCH_SIZE'] = 3
+    bus.subscribe(Deployed, lambda e: received.append(e.version))
+    for i in range(10):
+        bus.post(Deployed(version=i))
+    assert received == []
+    assert bus.flush() == 10
+    assert received == range(10)
+
+
+def test_post_drops_oldest_events_once_full(bus):
+    """
+    Test that the queue holds at most `queue_size` events and drops the oldest beyond that.
+    """
+    received = []
+    bus.config['QUEUE_SIZE'] = 3
+    bus.subscribe(Deployed, lambda e: received.append(e.version))
+    for i in range(5):
+        bus.post(Deployed(version=i))
+    assert bus.flush() == 3
+    assert received == [2, 3, 4]
+    assert bus.dropped == 2
+
+
+def test_subscriber_cache_is_shared_by_sources_of_a_class(bus):
+    """
+    Test that events about many sources of one class share a cache entry, unless their id is
+    subscribed to.
+    """
+    received = []
+    db = Db.new(config=dict(TESTING=True))
+    bus.subscribe(Deployed, lambda e: received.append('any'))
+    bus.subscribe(Deployed, lambda e: received.append('db'), source=db.id)
+    for _ in range(10):
+        bus.publish(Deployed(Db.new(config=dict(TESTING=True))))
+    assert len(bus.subscriptions[1]) == 1
+
+    bus.publish(Deployed(db))
+    assert len(bus.subscriptions[1]) == 2
+    assert received == ['any'] * 11 + ['db']
+
+
+def test_subscriber_exceptions_are_logged(bus):
+    """
+    Test that an exception raised by one subscriber doesn't stop delivery to the rest.
+    """
+    received = []
+    bus.subscribe(Deployed, lambda e: 1 / 0)
+    bus.subscribe(Deployed, received.append)
+    bus.publish(Deployed())
+    assert len(received) == 1
+
+
+def test_lifecycle_events_of_children_by_type(app, bus):
+    """
+    Test that subscribers to lifecycle events receive them for services in the tree of the bus.
+    """
+    received = []
+    bus.subscribe(ServiceStarted, received.append, source=Db)
+    bus.subscribe(ServiceInitialized, received.append, source=Db)
+    db = app.child(Db)
+    app.child(Service)
+    app.start()
+    bus.flush()
+
+    assert [type(e) for e in received] == [ServiceInitialized, ServiceStarted]
+    assert all(e.source is db for e in received)
+
+    # Services outside the tree of the bus are ignored.
+    Db.new(config=dict(TESTING=True)).start()
+    assert bus.flush() == 0
+
+
+def test_lifecycle_events_cost_nothing_unsubscribed(monkeypatch, app, bus):
+    """
+    Test that lifecycle events are only created while something subscribes to them.
+    """
+    created = []
+    monkeypatch.setattr(ServiceEvent, '__init__', lambda self, source=None: created.append(source))
+
+    bus.subscribe(Deployed, lambda e: None)
+    assert not events.LIFECYCLE_BUSES
+    app.child(Db).start()
+    assert created == []
+
+    func = lambda e: None
+    bus.subscribe(ServiceStopped, func)
+    assert events.LIFECYCLE_BUSES
+    bus.unsubscribe(ServiceStopped, func)
+    assert not events.LIFECYCLE_BUSES
+
+
+def test_stopped_bus_does_not_watch_lifecycle_events(app, bus):
+    """
+    Test that subscriptions made after the bus stopped don't watch lifecycle events until it
+    is started again.
+    """
+    bus.start()
+    bus.stop()
+    bus.subscribe(ServiceStarted, lambda e: None)
+    assert not events.LIFECYCLE_BUSES
+    app.child(Db).start()
+    assert not bus.queue
+
+    bus.start()
+    assert events.LIFECYCLE_BUSES
+
+
+def test_threaded_delivery(app):
+    """
+    Test that the bus thread delivers posted events.
+    """
+    bus = app.child(EventBus, config=dict(TESTING=True, POLL_TIMEOUT=0.05))
+    done = threading.Event()
+    bus.subscribe(Deployed, lambda e: done.set())
+    bus.start()
+    bus.post(Deployed())
+    assert done.wait(5)
+    assert bus.thread is not threading.current_thread()
+    bus.stop()
+    assert not events.LIFECYCLE_BUSES
@@ -0,0 +1,162 @@
+"""
+    tests.test_descriptors
+    ~~~~~~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.descriptors` module.
+"""
+
+import threading
+import time
+
+from scatter.config import Config
+from scatter.descriptors import cached, invalidate
+from scatter.protocol import Protocol
+
+
+class Configured(object):
+    """
+    Object with config and cached attributes which count how many times they are computed.
+    """
+
+    def __init__(self):
+        self.config = Config(CODEC='json', LEVEL=1)
+        self.calls = []
+
+    @cached
+    def plain(self):
+        self.calls.append('plain')
+        time.sleep(0.01)
+        return object()
+
+    @cached(depends=('codec',))
+    def codec(self):
+        self.calls.append('codec')
+        return self.config['CODEC']
+
+    @cached(ttl=0.05)
+    def expiring(self):
+        self.calls.append('expiring')
+        return len(self.calls)
+
+
+def test_cached_computes_once_across_threads():
+    """
+    Test that threads racing on first access share the result of a single call.
+    """
+    obj = Configured()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(obj.plain)) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert obj.calls == ['plain']
+    assert all(result is results[0] for result in results)
+
+
+class Linked(object):
+    """
+    Object whose cached attributes read those of another object, once both are being computed.
+    """
+
+    def __init__(self, barrier):
+        self.barrier = barrier
+        self.other = None
+
+    @cached
+    def outer(self):
+        self.barrier.wait(1)
+        return self.other.inner
+
+    @cached
+    def inner(self):
+        return 'inner'
+
+
+def test_cached_across_objects_does_not_deadlock():
+    """
+    Test that cached attributes of two objects which read each other's attributes from other
+    threads at once don't wait on each other.
+    """
+    barrier = threading.Event()
+    first, second = Linked(barrier), Linked(barrier)
+    first.other, second.other = second, first
+
+    results = []
+    threads = [threading.Thread(target=lambda obj=obj: results.append(obj.outer)) for obj in (first, second)]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    time.sleep(0.05)
+    barrier.set()
+    for thread in threads:
+        thread.join(5)
+    assert results == ['inner', 'inner']
+    assert '__cached_lock_outer__' not in vars(first)
+
+
+def test_cached_invalidate():
+    """
+    Test that invalidated attributes are computed again on next access.
+    """
+    obj = Configured()
+    first = obj.plain
+    obj.codec
+    invalidate(obj, 'plain', 'codec')
+    assert obj.plain is not first
+    obj.codec
+    assert obj.calls == ['plain', 'codec', 'plain', 'codec']
+
+
+def test_cached_depends_on_config_keys():
+    """
+    Test that only changes to the config keys an attribute depends on invalidate it.
+    """
+    obj = Configured()
+    assert obj.codec == 'json'
+    obj.config['LEVEL'] = 2
+    obj.config['CODEC'] = 'json'
+    assert obj.codec == 'json'
+    assert obj.calls == ['codec']
+
+    obj.config['CODEC'] = 'msgpack'
+    assert obj.codec == 'msgpack'
+    assert obj.calls == ['codec', 'codec']
+
+
+def test_cached_ttl():
+    """
+    Test that attributes with a ttl are computed again once it has passed.
+    """
+    obj = Configured()
+    assert obj.expiring == obj.expiring == 1
+    time.sleep(0.06)
+    assert obj.expiring == 2
+
+
+def test_config_revision():
+    """
+    Test that config revisions only change along with values.
+    """
+    config = Config(CODEC='json')
+    assert config.revision('codec') == 1
+    config.from_object(dict(CODEC='json'))
+    assert config.revision('CODEC') == 1
+    config['codec'] = 'msgpack'
+    del config['CODEC']
+    assert config.revision('CODEC') == 3
+    assert config.revision('MISSING') == 0
+
+
+def test_protocol_codec_follows_config():
+    """
+    Test that the protocol codec is replaced once its codec class is reconfigured.
+    """
+    protocol = Protocol.new(config=dict(TESTING=True))
+    codec = protocol.codec
+    assert protocol.codec is codec
+    protocol.codec_class = 'scatter.codec.JsonCodec'
+    assert protocol.codec is codec
+    protocol.config['CODEC_CLASS'] = 'scatter.codec.PickleCodec'
+    assert protocol.codec is not codec
@@ -9,10 +9,13 @@
 """
 
 import inspect
+import logging
+import os
 import pytest
 import sys
 
-from scatter.importer import import_from, _is_module_in_traceback
+from scatter import importer
+from scatter.importer import PackageImporter, import_from, invalidate_imports, _is_module_in_traceback
 
 
 @pytest.fixture(scope='module', params=['Foo', 'Bar'])
@@ -120,6 +123,98 @@ def test_import_from_invalid_func_silent(func):
     assert import_from(func, silent=True) is None
 
 
+def test_import_from_caches_resolved_objects(monkeypatch):
+    """
+    Test that `import_from` resolves each name once until it is invalidated.
+    """
+    calls = []
+    resolve = importer._import
+    monkeypatch.setattr(importer, '_import', lambda obj: calls.append(obj) or resolve(obj))
+    invalidate_imports('collections')
+
+    assert import_from('collections.OrderedDict') is import_from('collections.OrderedDict')
+    assert calls == ['collections.OrderedDict']
+
+    invalidate_imports('collections')
+    import_from('collections.OrderedDict')
+    assert calls == ['collections.OrderedDict'] * 2
+
+
+def test_import_from_caches_silent_misses(monkeypatch):
+    """
+    Test that silent misses are cached, but imports which aren't silent still raise.
+    """
+    calls = []
+    resolve = importer._import
+    monkeypatch.setattr(importer, '_import', lambda obj: calls.append(obj) or resolve(obj))
+    invalidate_imports('os.NotCached')
+
+    assert import_from('os.NotCached', silent=True) is None
+    assert import_from('os.NotCached', silent=True) is None
+    assert calls == ['os.NotCached']
+    with pytest.raises(ImportError):
+        import_from('os.NotCached')
+
+
+class Host(object):
+    """
+    Stand-in for the service which owns a package importer.
+    """
+
+    log = logging.getLogger('tests.test_importer')
+
+
+@pytest.fixture(scope='function')
+def site_fixture(tmpdir, monkeypatch):
+    """
+    Directory on `sys.path` with an installed `scatter-foo` extension distribution.
+    """
+    site = tmpdir.mkdir('site')
+    dist = site.mkdir('scatter_foo-1.0.dist-info')
+    dist.join('METADATA').write('Metadata-Version: 2.1\nName: scatter-foo\nVersion: 1.0\n')
+    dist.join('entry_points.txt').write('[scatter]\next = scatter_foo\n')
+    site.mkdir('scatter_foo').join('__init__.py').write('ENABLED = True\n')
+    monkeypatch.setattr(sys, 'path', [str(site)] + sys.path)
+    yield site
+    sys.modules.pop('scatter_foo', None)
+    invalidate_imports('scatter_foo')
+
+
+def test_package_importer_loads_extensions_lazily(site_fixture):
+    """
+    Test that extension packages are discovered without being imported until first used.
+    """
+    importer = PackageImporter(Host(), index_path=str(site_fixture.dirpath('index.json')))
+    importer.load()
+    assert [p.project_name for p in importer.entry_points] == ['scatter-foo']
+    assert not importer.entry_points[0].loaded
+    assert 'scatter_foo' not in sys.modules
+
+    assert importer.extension('scatter-foo') is sys.modules['scatter_foo']
+    assert importer.entry_points[0].loaded
+    assert importer.extension('scatter-bar') is None
+
+
+def test_package_importer_index(site_fixture, monkeypatch):
+    """
+    Test that a saved index is used until a discovered distribution changes.
+    """
+    index_path = str(site_fixture.dirpath('index.json'))
+    PackageImporter(Host(), index_path=index_path).entry_points
+    assert os.path.exists(index_path)
+
+    scans = []
+    scan = PackageImporter.scan
+    monkeypatch.setattr(PackageImporter, 'scan', lambda self: scans.append(self) or scan(self))
+    assert [p.value for p in PackageImporter(Host(), index_path=index_path).entry_points] == ['scatter_foo']
+    assert not scans
+
+    dist = str(site_fixture.join('scatter_foo-1.0.dist-info'))
+    os.utime(dist, (os.stat(dist).st_atime, os.stat(dist).st_mtime + 10))
+    assert [p.value for p in PackageImporter(Host(), index_path=index_path).entry_points] == ['scatter_foo']
+    assert len(scans) == 1
+
+
 @pytest.mark.parametrize('module', ['tests.test_importer', pytest.mark.xfail('tests'), pytest.mark.xfail('tests.foo')])
 def test_module_found_in_traceback(module):
     """
@@ -0,0 +1,79 @@
+"""
+    tests.test_index
+    ~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.index` module.
+"""
+
+import pytest
+
+from scatter.service import Service
+
+
+@pytest.fixture(scope='function')
+def tree(request):
+    process = Service.new(name='process', config=dict(TESTING=True))
+    app = process.child(Service, name='app')
+    app.child(Service, name='db')
+    app.child(Service, name='cache')
+    process.child(Service, name='web').child(Service, name='db')
+    return process
+
+
+def test_index_by_id_and_path(tree):
+    """
+    Test that every attached service is indexed by its id and path.
+    """
+    index = tree.service_index
+    app = tree.services.by_attr('name', 'app').first()
+    db = app.services.by_attr('name', 'db').first()
+
+    assert len(index) == 6
+    assert index.get(db.id) is db
+    assert index.lookup('/process/app/db') is db
+    assert index.path(db) == '/process/app/db'
+    assert db.service_index is index
+    assert index.get('missing') is None
+    assert index.lookup('/process/missing') is None
+
+
+def test_index_glob(tree):
+    """
+    Test that glob patterns match paths segment by segment.
+    """
+    index = tree.service_index
+    assert [index.path(s) for s in index.glob('/process/*/db')] == ['/process/app/db', '/process/web/db']
+    assert [index.path(s) for s in index.glob('/process/app/*')] == ['/process/app/cache', '/process/app/db']
+    assert [index.path(s) for s in index.glob('/**/db')] == ['/process/app/db', '/process/web/db']
+    assert len(index.glob('/process/**')) == 6
+    assert index.glob('/process/app') == [index.lookup('/process/app')]
+
+
+def test_index_follows_attach_and_detach(tree):
+    """
+    Test that attached subtrees are indexed and detached ones are dropped along with their children.
+    """
+    index = tree.service_index
+    app = index.lookup('/process/app')
+    tree.detach(app)
+    assert index.lookup('/process/app') is None
+    assert index.lookup('/process/app/db') is None
+    assert len(index) == 3
+    assert app.service_index is not index
+    assert app.service_index.lookup('/app/db') is not None
+
+    worker = tree.child(Service, name='worker')
+    tree.attach(app)
+    assert index.lookup('/process/worker') is worker
+    assert index.lookup('/process/app/db') is not None
+    assert app.service_index is index
+
+
+def test_index_duplicate_names(tree):
+    """
+    Test that siblings which share a name are given distinct paths.
+    """
+    first = tree.service_index.lookup('/process/app')
+    second = tree.child(Service, name='app')
+    assert tree.service_index.lookup('/process/app') is first
+    assert tree.service_index.lookup('/process/app~2') is second
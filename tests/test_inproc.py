@@ -0,0 +1,181 @@
+"""
+    tests.test_inproc
+    ~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.inproc` module.
+"""
+
+import pytest
+import socket
+import threading
+
+from scatter import transport
+from scatter.protocol import MessageHandler
+from scatter.reactor import Reactor
+from scatter.service import Service
+
+
+@pytest.fixture(scope='module')
+def reactor(request):
+    r = Reactor.new(config=dict(TESTING=True, POLL_TIMEOUT=0.05))
+    r.start()
+    request.addfinalizer(r.stop)
+    return r
+
+
+def test_connect_without_bind_raises():
+    """
+    Test that connecting to a name nothing is bound to raises a `socket.error`.
+    """
+    with pytest.raises(socket.error):
+        transport.connect('inproc://nobody')
+
+
+def test_bind_twice_raises():
+    """
+    Test that binding a name which is already bound raises a `socket.error`.
+    """
+    server = transport.bind('inproc://twice')
+    with pytest.raises(socket.error):
+        transport.bind('inproc://twice')
+    server.close()
+    transport.bind('inproc://twice').close()
+
+
+def test_messages_passed_by_reference():
+    """
+    Test that sent objects are received as-is, in order, without copying.
+    """
+    messages = [dict(n=i) for i in range(3)]
+    received = []
+
+    server = transport.bind('inproc://reference')
+    server.on_accept(lambda listener, stream: stream.on_recv(lambda s, msg: received.append(msg)))
+    client = transport.connect('inproc://reference')
+    for msg in messages:
+        client.send(msg)
+
+    assert len(received) == len(messages)
+    assert all(a is b for a, b in zip(received, messages))
+    server.close()
+    client.close()
+
+
+def test_concurrent_senders_without_reactor():
+    """
+    Test that messages of concurrent senders are all delivered, each sender's in order, when
+    the receiving stream has no reactor.
+    """
+    received = []
+    server = transport.bind('inproc://concurrent')
+    server.on_accept(lambda listener, stream: stream.on_recv(lambda s, msg: received.append(msg)))
+    client = transport.connect('inproc://concurrent')
+
+    def send(sender):
+        for i in range(2000):
+            client.send((sender, i))
+
+    threads = [threading.Thread(target=send, args=(sender,)) for sender in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(received) == 8000
+    for sender in range(4):
+        assert [i for s, i in received if s == sender] == range(2000)
+    server.close()
+    client.close()
+
+
+def test_copy_on_send():
+    """
+    Test that streams created with `copy=True` receive equal but distinct objects.
+    """
+    msg = dict(nested=[1, 2])
+    received = []
+
+    server = transport.bind('inproc://copy', copy=True)
+    server.on_accept(lambda listener, stream: stream.on_recv(lambda s, msg: received.append(msg)))
+    client = transport.connect('inproc://copy', copy=True)
+    client.send(msg)
+
+    assert received == [msg]
+    assert received[0] is not msg
+    assert received[0]['nested'] is not msg['nested']
+    server.close()
+    client.close()
+
+
+def test_delivered_on_reactor_thread(reactor):
+    """
+    Test that messages to a stream driven by a reactor are delivered on the reactor thread.
+    """
+    threads = []
+    done = threading.Event()
+
+    def on_recv(stream, msg):
+        threads.append(threading.current_thread())
+        done.set()
+
+    server = transport.bind('inproc://threaded', reactor)
+    server.on_accept(lambda listener, stream: stream.on_recv(on_recv))
+    client = transport.connect('inproc://threaded')
+    client.send('ping')
+
+    done.wait(5)
+    assert threads == [reactor.thread]
+    server.close()
+    client.close()
+
+
+def test_close_closes_peer():
+    """
+    Test that closing a stream closes its peer and raises its `on_close` callbacks.
+    """
+    closed = []
+    server = transport.bind('inproc://close')
+    server.on_accept(lambda listener, stream: stream.on_close(closed.append))
+    client = transport.connect('inproc://close')
+    client.close()
+
+    assert len(closed) == 1 and closed[0].closed
+    with pytest.raises(socket.error):
+        client.send('ping')
+    server.close()
+
+
+class Node(Service):
+    """
+    Service which records every message received by its message handler.
+    """
+
+    def on_initialized(self, *args, **kwargs):
+        self.received = []
+
+    def on_msg_recv(self, stream, msg):
+        self.received.append(msg)
+
+    def on_msg_send(self, stream, msg):
+        pass
+
+
+def test_message_handler_skips_codec():
+    """
+    Test that a :class: `~scatter.protocol.MessageHandler` hands messages over inproc
+    streams as objects without encoding them.
+    """
+    node = Node.new(config=dict(TESTING=True))
+    handler = node.child(MessageHandler)
+    server = transport.bind('inproc://handler')
+    server.on_accept(lambda listener, stream: handler.register(stream))
+    client = handler.register(transport.connect('inproc://handler'))
+
+    payload = object()
+    handler.send(client, func='ping', args=[payload], kwargs={})
+
+    assert node.received[0].func == 'ping'
+    assert node.received[0].args[0] is payload
+    assert node.received[0].sender_id == handler.id
+    server.close()
+    client.close()
@@ -0,0 +1,69 @@
+"""
+    tests.test_lazy
+    ~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.lazy` module and the lazily loaded `scatter` package.
+"""
+
+import importlib
+import json
+import pytest
+import subprocess
+import sys
+
+import scatter
+
+
+def imported_after(statement):
+    """
+    Return the names of the modules imported by running the given statement in a fresh interpreter.
+    """
+    code = '{0}\nimport json, sys\nprint json.dumps([m for m in sys.modules if sys.modules[m] is not None])'
+    return set(json.loads(subprocess.check_output([sys.executable, '-c', code.format(statement)])))
+
+
+def test_package_import_is_lazy():
+    """
+    Test that importing the package imports none of the submodules which define its public names.
+    """
+    imported = imported_after('import scatter')
+    assert sorted(m for m in imported if m.startswith('scatter')) == ['scatter', 'scatter.__version__', 'scatter.lazy']
+
+
+def test_process_import_defers_optional_dependencies():
+    """
+    Test that importing processes doesn't import daemon or extension discovery dependencies.
+    """
+    imported = imported_after('import scatter.process')
+    assert not imported & set(['daemon', 'gevent', 'pkg_resources', 'importlib_metadata'])
+
+
+def test_main_import_leaves_threading_unpatched():
+    """
+    Test that importing the command line entry point imports no module which creates locks, so
+    gevent can still patch threading before they are created.
+    """
+    imported = imported_after('import scatter.main')
+    assert not imported & set(['threading', 'scatter.descriptors', 'scatter.importer', 'gevent'])
+
+
+def test_package_exports_match_submodules():
+    """
+    Test that the public names of the package are exactly those exported by its submodules.
+    """
+    exported = set()
+    for module in scatter.__lazy_modules__:
+        exported.update(importlib.import_module('scatter.' + module).__all__)
+    assert sorted(exported) == scatter.__all__
+
+
+def test_package_attributes_resolve():
+    """
+    Test that public names and submodules resolve on first use and unknown names raise.
+    """
+    from scatter.service import Service
+    assert scatter.Service is Service
+    assert scatter.service is sys.modules['scatter.service']
+    assert 'StateMachine' in dir(scatter)
+    with pytest.raises(AttributeError):
+        scatter.NotAName
@@ -0,0 +1,126 @@
+"""
+    tests.test_local
+    ~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.local` module.
+"""
+
+import pytest
+import threading
+
+from scatter.context import AppContext, ProcessContext
+from scatter.globals import app, process, process_ctx_stack
+from scatter.local import ContextError, Local, LocalProxy, LocalStack
+
+
+class Target(object):
+    """
+    Object with an attribute, a method and a length to proxy.
+    """
+
+    def __init__(self, name):
+        self.name = name
+
+    def __len__(self):
+        return len(self.name)
+
+    def greet(self, other):
+        return '{0} greets {1}'.format(self.name, other)
+
+
+def run_in_thread(func):
+    result = []
+    thread = threading.Thread(target=lambda: result.append(func()))
+    thread.start()
+    thread.join()
+    return result[0]
+
+
+def test_local_is_separate_per_thread():
+    """
+    Test that attributes of a local set in one thread aren't visible in another.
+    """
+    local = Local()
+    local.value = 1
+    assert run_in_thread(lambda: getattr(local, 'value', None)) is None
+    assert local.value == 1
+    local.release()
+    with pytest.raises(AttributeError):
+        local.value
+
+
+def test_local_stack_push_pop():
+    """
+    Test that stacks are separate per thread and leave nothing behind once emptied.
+    """
+    stack = LocalStack()
+    assert stack.top is None
+    stack.push(1)
+    stack.push(2)
+    assert stack.top == 2 and len(stack) == 2
+    assert run_in_thread(lambda: stack.top) is None
+    assert stack.pop() == 2
+    assert stack.pop() == 1
+    assert stack.pop() is None
+    assert not stack.storage
+
+
+@pytest.mark.parametrize('factory', [
+    lambda stack: stack(),
+    lambda stack: LocalProxy(lambda: stack.top),
+])
+def test_local_proxy_resolves_current_object(factory):
+    """
+    Test that proxies forward attribute reads, method calls and operators to the current object.
+    """
+    stack = LocalStack()
+    proxy = factory(stack)
+    assert not proxy
+
+    stack.push(Target('homer'))
+    assert proxy.name == 'homer'
+    assert proxy.greet('bart') == 'homer greets bart'
+    assert len(proxy) == 5
+    proxy.name = 'marge'
+
+    stack.push(Target('lisa'))
+    assert proxy.name == 'lisa'
+    stack.pop()
+    assert proxy.name == 'marge'
+
+
+def test_local_proxy_outside_context_raises():
+    """
+    Test that using a stack proxy with nothing pushed raises a `ContextError`.
+    """
+    proxy = LocalStack()('name')
+    with pytest.raises(ContextError):
+        proxy.upper()
+    assert repr(proxy) == '<LocalProxy unbound>'
+
+
+def test_app_context_makes_globals_current():
+    """
+    Test that entering an app context makes its service and process current in this thread only.
+    """
+    homer, springfield = Target('homer'), Target('springfield')
+    with AppContext(homer, process=springfield):
+        assert app.name == 'homer'
+        assert process.name == 'springfield'
+        assert run_in_thread(lambda: bool(app)) is False
+        with ProcessContext(Target('shelbyville')):
+            assert process.name == 'shelbyville'
+        assert process.name == 'springfield'
+    assert not app and not process_ctx_stack.storage
+
+
+def test_app_context_keeps_current_process():
+    """
+    Test that an app context only pushes its process if that process isn't current already.
+    """
+    springfield = Target('springfield')
+    with ProcessContext(springfield):
+        with AppContext(Target('homer'), process=springfield):
+            assert len(process_ctx_stack) == 1
+        assert process.name == 'springfield'
+    assert not process_ctx_stack.storage
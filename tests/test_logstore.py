@@ -0,0 +1,245 @@
+"""
+    tests.test_logstore
+    ~~~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.logstore` module.
+"""
+
+import os
+import pickle
+import time
+import pytest
+
+from scatter.logstore import INDEX_FILE, LogStore
+
+
+@pytest.fixture(scope='function')
+def path(tmpdir):
+    return str(tmpdir.join('store'))
+
+
+def test_store_contract(path):
+    """
+    Test that the log store honours the get/put/pop/delete/len contract.
+    """
+    store = LogStore(path)
+    store.put('a', {'value': 1})
+    store.put(('tuple', 'key'), [1, 2, 3])
+    assert store.get('a') == {'value': 1}
+    assert store.get(('tuple', 'key')) == [1, 2, 3]
+    assert store.get('missing', 'default') == 'default'
+    assert len(store) == 2
+
+    assert store.pop('a') == {'value': 1}
+    assert store.pop('a', 'default') == 'default'
+    store.delete(('tuple', 'key'))
+    with pytest.raises(KeyError):
+        store.delete(('tuple', 'key'))
+    assert len(store) == 0
+    store.close()
+
+
+def test_bulk_operations_survive_recovery(path):
+    """
+    Test that bulk writes and deletes are recovered and scans read keys in order.
+    """
+    store = LogStore(path)
+    store.put_many(('key.{0:03d}'.format(i), i) for i in range(100))
+    assert store.delete_many(['key.000', 'key.001', 'missing']) == 2
+    store.close()
+
+    store = LogStore(path)
+    assert len(store) == 98
+    assert store.get_many(['key.000', 'key.002']) == {'key.002': 2}
+    assert [value for _, value in store.scan(start='key.050', end='key.053')] == [50, 51, 52]
+    assert sorted(store.items()) == [('key.{0:03d}'.format(i), i) for i in range(2, 100)]
+    store.close()
+
+
+def test_get_buffer_reads_serialized_value(path):
+    """
+    Test that `get_buffer` returns the serialized value straight from the segment.
+    """
+    store = LogStore(path, dumps=str, loads=str)
+    store.put('a', 'value')
+    assert str(store.get_buffer('a')) == 'value'
+    store.close()
+
+
+@pytest.mark.parametrize('save_index', [True, False])
+def test_recovery(path, save_index):
+    """
+    Test that reopening the store recovers the latest value of every key, with or without a
+    saved index, including writes made after the index was saved.
+    """
+    store = LogStore(path, segment_size=256, fsync='always')
+    for i in range(50):
+        store.put(i % 10, i)
+    store.delete(0)
+    if save_index:
+        store.close()
+        store = LogStore(path, segment_size=256, fsync='always')
+        store.put(1, 'after')
+        store.delete(2)
+    for segment in store.segments.values():
+        segment.sync()
+
+    recovered = LogStore(path, segment_size=256)
+    expected = dict((i, 40 + i) for i in range(1, 10))
+    if save_index:
+        expected[1] = 'after'
+        del expected[2]
+    assert dict((i, recovered.get(i)) for i in range(10) if i in recovered) == expected
+    recovered.close()
+
+
+def test_recovery_truncates_torn_record(path):
+    """
+    Test that a record torn by a crash is dropped and later writes are kept.
+    """
+    store = LogStore(path, fsync='always')
+    store.put('a', 1)
+    store.put('b', 2)
+    segment = store.active
+    with open(segment.path, 'r+b') as f:
+        f.truncate(segment.size - 3)
+
+    recovered = LogStore(path)
+    assert recovered.get('a') == 1
+    assert 'b' not in recovered
+    recovered.put('c', 3)
+    recovered.close()
+
+    assert LogStore(path).get('c') == 3
+
+
+def test_compaction(path):
+    """
+    Test that compaction reclaims superseded records and keeps every live value.
+    """
+    store = LogStore(path, segment_size=512)
+    for i in range(200):
+        store.put(i % 5, i)
+    before = store.stats()
+
+    assert store.compact() > 0
+    after = store.stats()
+    assert after['bytes'] < before['bytes']
+    assert after['segments'] < before['segments']
+    assert dict((i, store.get(i)) for i in range(5)) == dict((i, 195 + i) for i in range(5))
+    store.close()
+
+    recovered = LogStore(path, segment_size=512)
+    assert dict((i, recovered.get(i)) for i in range(5)) == dict((i, 195 + i) for i in range(5))
+    recovered.close()
+
+
+def test_compaction_across_restarts_keeps_deletes(path):
+    """
+    Test that compacting after a restart doesn't bring back keys deleted after an earlier compaction
+    once the segments are scanned.
+    """
+    store = LogStore(path, segment_size=512)
+    store.put(0, 'a')
+    store.put(1, 'b')
+    for i in range(100):
+        store.put(2 + i % 3, i)
+    store.compact()
+    store.delete(0)
+    store.delete(1)
+    store.close()
+
+    store = LogStore(path, segment_size=512)
+    store.compact()
+    store.close()
+    os.remove(os.path.join(path, INDEX_FILE))
+
+    recovered = LogStore(path, segment_size=512)
+    assert 0 not in recovered and 1 not in recovered
+    assert dict((i, recovered.get(i)) for i in range(2, 5)) == {2: 99, 3: 97, 4: 98}
+    recovered.close()
+
+
+def test_compaction_interrupted_while_removing_segments(path, monkeypatch):
+    """
+    Test that a crash while compaction removes old segments doesn't bring back deleted keys.
+    """
+    store = LogStore(path, segment_size=256)
+    store.put('deleted', 'stale')
+    for i in range(20):
+        store.put(i % 2, i)
+    # The delete record ends up in the newest sealed segment.
+    store.delete('deleted')
+    active = store.active
+    for i in range(20, 40):
+        if store.active is active:
+            store.put(i % 2, i)
+
+    removed = []
+
+    def remove(path):
+        if removed:
+            raise OSError('crashed')
+        removed.append(path)
+        os.unlink(path)
+    monkeypatch.setattr(os, 'remove', remove)
+    with pytest.raises(OSError):
+        store.compact()
+    monkeypatch.undo()
+
+    recovered = LogStore(path, segment_size=256)
+    assert 'deleted' not in recovered
+    assert dict((i, recovered.get(i)) for i in range(2)) == dict((i, store.get(i)) for i in range(2))
+    recovered.close()
+
+
+def test_interval_fsync_syncs_without_later_writes(path):
+    """
+    Test that the interval fsync policy syncs the last write without waiting for another one.
+    """
+    store = LogStore(path, fsync_interval=0.01)
+    store.put('a', 1)
+    store.put('b', 2)
+    assert store.dirty
+    time.sleep(0.1)
+    assert not store.dirty
+    store.close()
+
+
+def test_incomplete_saved_index_is_ignored(path):
+    """
+    Test that a saved index missing some of its fields falls back to scanning the segments.
+    """
+    store = LogStore(path)
+    store.put('a', 1)
+    store.close()
+    with open(os.path.join(path, INDEX_FILE), 'wb') as f:
+        pickle.dump(dict(index={}, seq=0), f)
+
+    recovered = LogStore(path)
+    assert recovered.get('a') == 1
+    recovered.close()
+
+
+def test_unknown_fsync_policy_raises(path):
+    """
+    Test that an unknown fsync policy raises a `ValueError`.
+    """
+    with pytest.raises(ValueError):
+        LogStore(path, fsync='sometimes')
+
+
+def test_background_compaction_during_writes(path):
+    """
+    Test that background compaction running alongside writes never loses a value.
+    """
+    store = LogStore(path, segment_size=1024, compact_threshold=0.1, compact_interval=0.001)
+    for i in range(3000):
+        store.put(i % 20, i)
+        assert store.get(i % 20) == i
+    store.close()
+
+    recovered = LogStore(path, segment_size=1024)
+    assert dict((i, recovered.get(i)) for i in range(20)) == dict((i, 2980 + i) for i in range(20))
+    assert recovered.stats()['segments'] < 3000 * 20 / 1024
+    recovered.close()
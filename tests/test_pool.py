@@ -0,0 +1,132 @@
+"""
+    tests.test_pool
+    ~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.pool` module.
+"""
+
+import pytest
+import threading
+import time
+
+from scatter import transport
+from scatter.exceptions import ScatterTimeout
+from scatter.pool import ConnectionPool, get_pool
+from scatter.service import Service
+
+
+@pytest.fixture(scope='function')
+def server(request):
+    s = transport.bind('inproc://pool-{0}'.format(request.node.name))
+    request.addfinalizer(s.close)
+    return s
+
+
+@pytest.fixture(scope='function')
+def pool(request):
+    p = ConnectionPool.new(config=dict(TESTING=True, MAX_CONNECTIONS=2, LEASE_TIMEOUT=0.1))
+    p.start()
+    request.addfinalizer(p.stop)
+    return p
+
+
+def test_released_streams_are_reused(pool, server):
+    """
+    Test that a released stream is leased again instead of connecting a new one.
+    """
+    stream = pool.lease(server.address)
+    pool.release(stream)
+    assert pool.lease(server.address) is stream
+
+    stats = pool.stats()[server.address]
+    assert stats['misses'] == 1
+    assert stats['hits'] == 1
+    assert stats['created'] == 1
+    assert stats['leased'] == 1
+
+
+def test_lease_waits_at_max_connections(pool, server):
+    """
+    Test that leasing beyond the limit times out unless a stream is released in time.
+    """
+    first, second = pool.lease(server.address), pool.lease(server.address)
+    with pytest.raises(ScatterTimeout):
+        pool.lease(server.address)
+
+    timer = threading.Timer(0.02, pool.release, (first,))
+    timer.start()
+    assert pool.lease(server.address, timeout=5) is first
+    timer.join()
+
+    stats = pool.stats()[server.address]
+    assert stats['waits'] == 2
+    assert stats['wait_time'] > 0
+    assert stats['created'] == 2
+
+
+def test_connection_discards_stream_on_error(pool, server):
+    """
+    Test that streams leased by the `connection` context manager are closed when the block raises.
+    """
+    with pytest.raises(RuntimeError):
+        with pool.connection(server.address) as stream:
+            raise RuntimeError()
+
+    assert stream.closed
+    assert pool.stats()[server.address]['evicted'] == 1
+    assert pool.lease(server.address) is not stream
+
+
+def test_closed_streams_are_not_leased(pool, server):
+    """
+    Test that idle streams which were closed by their peer are discarded.
+    """
+    stream = pool.lease(server.address)
+    pool.release(stream)
+    stream.close()
+    assert pool.lease(server.address) is not stream
+
+
+def test_evict_idle_streams(pool, server):
+    """
+    Test that the health check closes expired streams and reopens up to `min_connections`.
+    """
+    stream = pool.lease(server.address)
+    pool.release(stream)
+    pool.evict(now=time.time() + pool.idle_timeout)
+
+    assert stream.closed
+    assert pool.stats()[server.address]['idle'] == 0
+
+    pool.pool(server.address).min_size = 1
+    pool.evict()
+    assert pool.stats()[server.address]['idle'] == 1
+
+
+class Caller(Service):
+    """
+    Service which shares the pool of its process.
+    """
+
+
+def test_pool_shared_by_tree():
+    """
+    Test that every service of a tree shares the pool attached to the root.
+    """
+    root = Service.new(config=dict(TESTING=True))
+    first, second = root.child(Caller), root.child(Caller)
+
+    pool = get_pool(first)
+    assert get_pool(second) is pool
+    assert pool.parent is root
+
+
+def test_streams_leased_when_closed_are_closed_on_release(pool, server):
+    """
+    Test that streams leased when the pool closes are closed once released instead of reused.
+    """
+    stream = pool.lease(server.address)
+    pool.close()
+    pool.release(stream)
+    assert stream.closed
+    assert pool.lease(server.address) is not stream
@@ -4,3 +4,97 @@
 
     Tests for the `scatter.process` module.
 """
+
+import gc
+import os
+import pytest
+
+from scatter.process import Process
+
+
+@pytest.fixture(scope='function')
+def process_fixture():
+    return Process.new(config=dict(TESTING=True, GC_FREEZE=True, WORKER_GC_THRESHOLD=(1234, 5, 6)))
+
+
+def test_process_freeze_keeps_gc_enabled(process_fixture):
+    """
+    Test that the pre-fork freeze phase leaves the garbage collector enabled within the parent.
+    """
+    process_fixture.freeze()
+    assert gc.isenabled()
+
+
+def test_process_freeze_keeps_gc_disabled(process_fixture):
+    """
+    Test that the pre-fork freeze phase leaves the garbage collector disabled when the caller disabled it.
+    """
+    gc.disable()
+    try:
+        process_fixture.freeze()
+        assert not gc.isenabled()
+    finally:
+        gc.enable()
+
+
+def test_process_entry_point_index_is_opt_in(process_fixture, tmpdir):
+    """
+    Test that the package importer only saves an entry point index once a path is configured.
+    """
+    assert process_fixture.package_importer.index_path is None
+
+    path = str(tmpdir.join('entry_points.json'))
+    process = Process.new(config=dict(TESTING=True, ENTRY_POINT_INDEX=path))
+    process.package_importer.entry_points
+    assert process.package_importer.index_path == path
+    assert os.path.exists(path)
+
+
+def test_process_fork_applies_worker_gc_threshold(process_fixture):
+    """
+    Test that forked workers apply the configured garbage collector thresholds and are reaped
+    once they exit.
+    """
+    def worker(process):
+        if gc.get_threshold() != (1234, 5, 6) or process.pid != os.getpid():
+            raise RuntimeError('Worker not configured')
+
+    pid = process_fixture.fork(worker)
+    assert pid in process_fixture.workers
+
+    _, status = os.waitpid(pid, 0)
+    assert status == 0
+
+
+def test_process_fork_exits_worker_when_forked_hook_raises():
+    """
+    Test that a worker whose forked hook raises exits with a failure status rather than
+    returning into the code of the parent.
+    """
+    class Broken(Process):
+        def on_forked(self):
+            raise RuntimeError('boom')
+
+    pid = Broken.new(config=dict(TESTING=True)).fork(lambda process: None)
+    _, status = os.waitpid(pid, 0)
+    assert os.WIFEXITED(status) and os.WEXITSTATUS(status) == 1
+
+
+def test_process_worker_memory_usage(process_fixture):
+    """
+    Test that memory usage is reported for every forked worker.
+    """
+    read, write = os.pipe()
+    pid = process_fixture.fork(lambda process: os.read(read, 1))
+    try:
+        usage = process_fixture.worker_memory_usage()
+        assert pid in usage
+        if usage[pid] is None:
+            pytest.skip('smaps_rollup not available on this platform')
+        assert set(usage[pid]) == set(['rss', 'pss', 'shared', 'private'])
+        assert usage[pid]['rss'] > 0
+        assert usage[pid]['rss'] >= usage[pid]['private']
+        assert usage[pid]['rss'] >= usage[pid]['pss'] > 0
+    finally:
+        os.write(write, 'x')
+        os.waitpid(pid, 0)
@@ -0,0 +1,116 @@
+"""
+    tests.test_protocol
+    ~~~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.protocol` module.
+"""
+
+import pytest
+
+from scatter import transport
+from scatter.codec import DecodingError
+from scatter.protocol import FlowControlError, MessageHandler, Protocol
+from scatter.service import Service
+
+
+class Peer(Service):
+    """
+    Service which records messages and flow control callbacks of its message handler.
+    """
+
+    def on_initialized(self, *args, **kwargs):
+        self.received = []
+        self.events = []
+
+    def on_msg_recv(self, stream, msg):
+        self.received.append(msg.args[0])
+
+    def on_msg_send(self, stream, msg):
+        pass
+
+    def on_stream_pause(self, stream):
+        self.events.append('pause')
+
+    def on_stream_resume(self, stream):
+        self.events.append('resume')
+
+
+@pytest.fixture(scope='function')
+def peers(request):
+    config = dict(TESTING=True, FLOW_CONTROL=True, CREDIT_WINDOW=4, OUTBOUND_HIGH_WATER=4, OUTBOUND_LOW_WATER=1)
+    sender, receiver = Peer.new(config=config), Peer.new(config=config)
+    sender_handler, receiver_handler = sender.child(MessageHandler, config=config), receiver.child(MessageHandler, config=config)
+
+    server = transport.bind('inproc://{0}'.format(request.node.name))
+    accepted = []
+    server.on_accept(lambda listener, stream: accepted.append(receiver_handler.register(stream)))
+    client = sender_handler.register(transport.connect(server.address))
+    request.addfinalizer(server.close)
+    return sender, sender_handler, client, receiver, receiver_handler, accepted[0]
+
+
+def test_credit_is_granted_as_messages_are_consumed(peers):
+    """
+    Test that a sender which keeps up with its receiver never runs out of credit.
+    """
+    sender, sender_handler, client, receiver, _, _ = peers
+    for i in range(20):
+        sender_handler.send(client, func='f', args=[i])
+
+    assert receiver.received == range(20)
+    assert sender_handler.occupancy(client)['backlog'] == 0
+    assert sender.events == []
+
+
+def test_paused_receiver_holds_back_sender(peers):
+    """
+    Test that a paused receiver stops granting credit, the sender backlog is bounded by its
+    high water mark and everything is delivered in order once the receiver resumes.
+    """
+    sender, sender_handler, client, receiver, receiver_handler, accepted = peers
+    receiver_handler.pause(accepted)
+
+    for i in range(8):
+        sender_handler.send(client, func='f', args=[i])
+    with pytest.raises(FlowControlError):
+        sender_handler.send(client, func='f', args=[8])
+
+    assert receiver.received == []
+    assert receiver_handler.occupancy(accepted)['pending'] == 4
+    assert sender_handler.occupancy(client)['credits'] == 0
+    assert sender_handler.occupancy(client)['backlog'] == 4
+    assert sender.events == ['pause']
+
+    receiver_handler.resume(accepted)
+    assert receiver.received == range(8)
+    assert sender_handler.occupancy(client)['backlog'] == 0
+    assert sender.events == ['pause', 'resume']
+
+
+def test_occupancy_includes_stream(peers):
+    """
+    Test that occupancy reports the buffers of the stream along with those of the handler.
+    """
+    _, sender_handler, client, _, _, _ = peers
+    occupancy = sender_handler.occupancy()
+    assert occupancy.keys() == [client]
+    assert occupancy[client]['stream']['inbox'] == 0
+
+
+def test_compressed_messages_round_trip():
+    """
+    Test that messages of a protocol with compression enabled are compressed once encoded
+    and decoded back to the original message.
+    """
+    plain = Protocol.new(config=dict(TESTING=True))
+    compressed = Protocol.new(config=dict(TESTING=True, USE_COMPRESSION=True))
+    obj = dict(sender_id='peer', topic='test', func='ping', args=['x' * 1024], kwargs={})
+
+    data = compressed.encode(dict(obj))
+    assert len(data) < len(plain.encode(dict(obj)))
+    msg = compressed.decode(data)
+    assert msg.func == 'ping'
+    assert msg.args == ['x' * 1024]
+
+    with pytest.raises(DecodingError):
+        compressed.decode(plain.encode(dict(obj)))
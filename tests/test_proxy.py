@@ -0,0 +1,128 @@
+"""
+    tests.test_proxy
+    ~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.proxy` module.
+"""
+
+import pytest
+
+from scatter.proxy import Proxy, proxy_for, proxy_type
+
+
+class Base(object):
+    """
+    Type with methods of every signature, a property and dynamic attributes.
+    """
+
+    kind = 'base'
+
+    def __init__(self, name):
+        self.name = name
+
+    def greet(self, other, greeting='hello', *args, **kwargs):
+        return (self.name, other, greeting, args, kwargs)
+
+    def overridden(self):
+        return 'base'
+
+    @property
+    def shout(self):
+        return self.name.upper()
+
+    @classmethod
+    def create(cls, name):
+        return cls(name)
+
+
+class Derived(Base):
+    """
+    Subtype which overrides a method and shadows another with a plain value.
+    """
+
+    greet = 'not callable'
+
+    def overridden(self):
+        return 'derived'
+
+
+class Slotted(object):
+    """
+    Type whose instances store their attributes in slots.
+    """
+
+    __slots__ = ('x', 'y')
+
+    def __init__(self, x, y):
+        self.x, self.y = x, y
+
+    def total(self):
+        return self.x + self.y
+
+
+def test_proxy_type_is_cached_per_type():
+    """
+    Test that proxy classes are generated once for every exact type.
+    """
+    assert proxy_type(Base) is proxy_type(Base)
+    assert proxy_type(Derived) is not proxy_type(Base)
+    assert issubclass(proxy_type(Base), Proxy)
+
+
+def test_proxy_forwards_methods_and_properties():
+    """
+    Test that generated methods keep the signature of the methods they forward.
+    """
+    proxy = proxy_for(Base('homer'))
+    assert proxy.greet('bart') == ('homer', 'bart', 'hello', (), {})
+    assert proxy.greet('bart', 'hi', 1, loud=True) == ('homer', 'bart', 'hi', (1,), {'loud': True})
+    with pytest.raises(TypeError):
+        proxy.greet()
+    assert proxy.shout == 'HOMER'
+    assert 'greet' in type(proxy).__dict__
+
+
+def test_proxy_falls_back_for_dynamic_attributes():
+    """
+    Test that instance attributes, class attributes and class methods are forwarded generically
+    and that changes made through the proxy reach the proxied object.
+    """
+    obj = Base('homer')
+    proxy = proxy_for(obj)
+    assert proxy.name == 'homer' and proxy.kind == 'base'
+    assert proxy.create('bart').name == 'bart'
+
+    proxy.name = 'marge'
+    assert obj.name == 'marge' and proxy.shout == 'MARGE'
+
+
+def test_proxy_respects_overrides():
+    """
+    Test that the nearest definition of a name is used, even if it can't be forwarded.
+    """
+    proxy = proxy_for(Derived('lisa'))
+    assert proxy.overridden() == 'derived'
+    assert proxy.greet == 'not callable'
+
+
+def test_proxy_slots():
+    """
+    Test that slots are read and written through the proxy.
+    """
+    obj = Slotted(1, 2)
+    proxy = proxy_for(obj)
+    assert (proxy.x, proxy.y, proxy.total()) == (1, 2, 3)
+    proxy.x = 10
+    assert obj.x == 10 and proxy.total() == 12
+
+
+def test_proxy_forwards_lambda_attributes():
+    """
+    Test that functions whose name isn't an identifier, ex: lambdas, are forwarded.
+    """
+    class Lambdas(object):
+        double = lambda self, n=2: n * 2
+
+    proxy = proxy_for(Lambdas())
+    assert proxy.double() == 4 and proxy.double(3) == 6
+    assert type(proxy).double.__name__ == '<lambda>'
@@ -0,0 +1,52 @@
+"""
+    tests.test_router
+    ~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.router` module.
+"""
+
+import pytest
+
+from scatter import transport
+from scatter.router import TopicRouter
+
+
+@pytest.fixture(scope='function')
+def router(request):
+    r = TopicRouter.new(config=dict(TESTING=True))
+    r.start()
+    request.addfinalizer(r.stop)
+    return r
+
+
+def test_route_fans_out_same_message(router):
+    """
+    Test that every matching subscriber receives the same message instance.
+    """
+    received = []
+    router.subscribe('service.#', lambda stream, msg: received.append(('prefix', msg)))
+    router.subscribe('service.*.started', lambda stream, msg: received.append(('wildcard', msg)))
+    router.subscribe('other', lambda stream, msg: received.append(('other', msg)))
+
+    server = transport.bind('inproc://router')
+    server.on_accept(lambda listener, stream: router.register(stream))
+    client = router.register(transport.connect('inproc://router'))
+    router.handler.send(client, topic='service.a.started', func='notify')
+
+    assert sorted(name for name, _ in received) == ['prefix', 'wildcard']
+    assert received[0][1] is received[1][1]
+    server.close()
+
+
+def test_unsubscribe_invalidates_cached_routes(router):
+    """
+    Test that subscription changes apply to topics which were already routed.
+    """
+    func = lambda stream, msg: None
+    assert router.subscribers('a.b') == ()
+
+    router.subscribe('a.*', func)
+    assert router.subscribers('a.b') == (func,)
+
+    router.unsubscribe('a.*', func)
+    assert router.subscribers('a.b') == ()
@@ -0,0 +1,301 @@
+"""
+    tests.test_rpc
+    ~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.rpc` module.
+"""
+
+import gc
+import pytest
+import threading
+import weakref
+
+from scatter import transport
+from scatter.exceptions import ScatterTimeout
+from scatter.remote import RemoteProxy
+from scatter.rpc import RpcClient, RpcError, RpcServer, export
+from scatter.service import Service
+
+
+class Counter(Service):
+    """
+    Service whose methods are served over RPC by the server of its parent.
+    """
+
+    def on_initialized(self, *args, **kwargs):
+        self.count = 0
+
+    @export
+    def incr(self, amount=1):
+        self.count += amount
+        return self.count
+
+
+class Calculator(Service):
+    """
+    Service whose methods are served over RPC.
+    """
+
+    def on_initialized(self, *args, **kwargs):
+        self.casts = []
+        self.cast_received = threading.Event()
+        self.release = threading.Event()
+
+    @export
+    def add(self, a, b=0):
+        return a + b
+
+    @export
+    def fail(self):
+        raise ValueError('boom')
+
+    @export
+    def record(self, value):
+        self.casts.append(value)
+        self.cast_received.set()
+
+    @export
+    def slow(self):
+        self.release.wait(5)
+        return 'slow'
+
+    def internal(self):
+        return 'internal'
+
+
+@pytest.fixture(scope='function', params=['inproc://rpc-{0}', 'tcp://127.0.0.1:0', 'ipc://{1}/rpc.sock'])
+def address(request, tmpdir):
+    return request.param.format(request.node.name, tmpdir)
+
+
+@pytest.fixture(scope='function')
+def calculator(request):
+    calculator = Calculator.new(config=dict(TESTING=True))
+    calculator.child(RpcServer)
+    calculator.child(Counter)
+    calculator.start()
+    request.addfinalizer(calculator.stop)
+    return calculator
+
+
+@pytest.fixture(scope='function')
+def client(request):
+    client = RpcClient.new(config=dict(TESTING=True, CALL_TIMEOUT=5))
+    client.start()
+    request.addfinalizer(client.stop)
+    return client
+
+
+@pytest.fixture(scope='function')
+def stream(request, calculator, client, address):
+    listener = calculator.services.by_type(RpcServer).first().bind(address)
+    stream = client.connect(listener.address)
+
+    def close():
+        stream.close()
+        listener.close()
+    request.addfinalizer(close)
+    return stream
+
+
+def test_call_returns_result(client, stream):
+    """
+    Test that calls return the result of the remote method.
+    """
+    assert client.call(stream, 'add', 1, b=2) == 3
+
+
+def test_pipelined_calls(client, stream):
+    """
+    Test that many calls in flight on a single stream are each matched with their reply.
+    """
+    futures = [client.call_async(stream, 'add', (i, i)) for i in range(100)]
+    assert [f.result() for f in futures] == [i + i for i in range(100)]
+    assert not client.pending
+
+
+def test_call_raises_remote_error(client, stream):
+    """
+    Test that exceptions raised by the remote method are raised by the caller.
+    """
+    with pytest.raises(RpcError) as e:
+        client.call(stream, 'fail')
+    assert e.value.args == ('ValueError', 'boom')
+
+
+@pytest.mark.parametrize('func', ['_private', 'stop', 'internal', 'missing'])
+def test_call_unexported_method_raises(client, stream, func):
+    """
+    Test that private, lifecycle, public methods which aren't exported and missing methods
+    cannot be called.
+    """
+    with pytest.raises(RpcError):
+        client.call(stream, func)
+
+
+def test_cast_does_not_reply(calculator, client, stream):
+    """
+    Test that casts call the remote method without leaving a pending reply.
+    """
+    client.cast(stream, 'record', 'x')
+    calculator.cast_received.wait(5)
+    assert calculator.casts == ['x']
+    assert not client.pending
+
+
+def test_call_timeout(calculator, client, stream):
+    """
+    Test that calls which are not answered in time raise a `ScatterTimeout` and drop
+    late replies.
+    """
+    if not stream.encoded:
+        calculator.release.set()
+        pytest.skip('inproc calls complete synchronously')
+
+    future = client.call_async(stream, 'slow', timeout=0.05)
+    with pytest.raises(ScatterTimeout):
+        future.result()
+
+    client.expire()
+    assert not client.pending
+    calculator.release.set()
+    assert client.call(stream, 'add', 1) == 1
+
+
+def test_call_times_out_without_traffic(client, tmpdir):
+    """
+    Test that calls time out and run their callbacks at their deadline even when nothing
+    else is received or sent.
+    """
+    listener = transport.bind('ipc://{0}/silent.sock'.format(tmpdir), client.reactor)
+    stream = client.connect(listener.address)
+    future = client.call_async(stream, 'add', (1,), timeout=0.05)
+    expired = threading.Event()
+    future.add_done_callback(lambda f: expired.set())
+
+    assert expired.wait(5)
+    assert isinstance(future.exception, ScatterTimeout)
+    assert not client.pending
+    listener.close()
+
+
+def test_call_addressed_service(calculator, client, stream):
+    """
+    Test that calls prefixed by the id or fully qualified type of a child of the target are
+    served by that child.
+    """
+    counter = calculator.services.by_type(Counter).first()
+    assert client.call(stream, '{0}:incr'.format(counter.fully_qualified_type), 2) == 2
+    assert client.call(stream, '{0}:incr'.format(counter.id)) == 3
+    with pytest.raises(RpcError):
+        client.call(stream, 'missing.Service:incr')
+
+
+def test_remote_proxy_calls_methods(calculator, client, stream):
+    """
+    Test that remote proxies call methods of the remote service as if it were local.
+    """
+    remote = client.remote(stream, Counter)
+    assert isinstance(remote, RemoteProxy)
+    assert remote.incr() == 1
+    assert remote.incr(amount=2) == 3
+    assert remote.incr.future(1).result() == 4
+    assert client.remote(stream).add(1, 2) == 3
+
+    with pytest.raises(AttributeError):
+        remote.stop
+    with pytest.raises(AttributeError):
+        remote.missing
+    with pytest.raises(RpcError):
+        client.remote(stream, 'missing.Service').id
+
+
+def test_remote_proxy_caches_description(monkeypatch, calculator, client, stream):
+    """
+    Test that remote proxies fetch the attributes of the remote service which never change once.
+    """
+    counter = calculator.services.by_type(Counter).first()
+    calls = []
+    describe = RpcServer.describe
+    monkeypatch.setattr(RpcServer, 'describe', lambda self, ref=None: calls.append(ref) or describe(self, ref))
+
+    remote = client.remote(stream, counter.id)
+    assert remote.id == counter.id
+    assert remote.name == counter.name
+    assert remote.fully_qualified_type == counter.fully_qualified_type
+    assert sorted(remote.exports()) == ['incr']
+    remote.incr()
+    assert calls == [counter.id]
+
+
+def test_remote_pipeline_chains_results(calculator, client, stream):
+    """
+    Test that pipelined calls may pass the futures of earlier calls as arguments.
+    """
+    remote = client.remote(stream)
+    with remote.pipeline() as pipe:
+        first = pipe.add(1, 2)
+        second = pipe.add(first, b=first)
+        third = pipe.add(second, 4)
+    assert third.result() == 10
+    assert pipe.results() == [3, 6, 10]
+    assert not client.pending
+
+
+def test_remote_pipeline_failed_dependency(calculator, client, stream):
+    """
+    Test that pipelined calls which depend on a failed call raise a `RpcError`.
+    """
+    with client.remote(stream).pipeline() as pipe:
+        failed = pipe.fail()
+        dependent = pipe.add(failed, 1)
+    with pytest.raises(RpcError):
+        failed.result()
+    with pytest.raises(RpcError) as e:
+        dependent.result()
+    assert e.value.args[0] == 'RpcError'
+
+
+def test_call_service_by_path(calculator, client, stream):
+    """
+    Test that calls may address a service of the target tree by its path.
+    """
+    counter = calculator.services.by_type(Counter).first()
+    path = calculator.service_index.path(counter)
+    assert client.call(stream, '{0}:incr'.format(path), 5) == 5
+    assert client.remote(stream, path).id == counter.id
+
+
+def test_server_does_not_keep_resolved_services_alive(calculator):
+    """
+    Test that services whose methods were called are not kept alive by the server once detached.
+    """
+    server = calculator.services.by_type(RpcServer).first()
+    server.target = Counter.new(config=dict(TESTING=True))
+    assert server.resolve('incr')() == 1
+
+    counter = weakref.ref(server.target)
+    server.target = None
+    gc.collect()
+    assert counter() is None
+
+
+def test_max_frame_size_applies_to_socket_streams(request, calculator, tmpdir):
+    """
+    Test that the configured maximum frame size bounds the socket streams of clients and servers.
+    """
+    client = RpcClient.new(config=dict(TESTING=True, MAX_FRAME_SIZE=1024))
+    client.start()
+    request.addfinalizer(client.stop)
+    server = calculator.services.by_type(RpcServer).first()
+    server.config['MAX_FRAME_SIZE'] = 2048
+
+    listener = server.bind('ipc://{0}/frames.sock'.format(tmpdir))
+    stream = client.connect(listener.address)
+    try:
+        assert stream.max_frame_size == 1024
+        assert listener.max_frame_size == 2048
+        assert client.call(stream, 'add', 1, 2) == 3
+    finally:
+        stream.close()
+        listener.close()
@@ -5,7 +5,10 @@
     Implements tests for the :class: `~scatter.service.Service` class.
 """
 
+import gc
+import logging
 import pytest
+import weakref
 
 from scatter.meta import resolve_type
 from scatter.service import Service, ServiceState
@@ -41,4 +44,63 @@ def test_service_meta_registers_new_types():
 def test_service_meta_caches_types():
     """
 
-    """
\ No newline at end of file
+    """
+
+def test_service_tree_has_no_reference_cycles(service):
+    """
+    Test that parent links are weak, so a service tree is reclaimed by reference counting alone.
+    """
+    child = service.child(Service, name='child')
+    assert child.parent is service
+    assert service.services.by_name('child') is not None
+
+    gc.collect()
+    gc.disable()
+    try:
+        del child
+        collected = gc.collect()
+    finally:
+        gc.enable()
+    assert collected == 0
+
+
+def test_service_churn_stays_flat(service):
+    """
+    Test that memory and garbage collection stay flat while services are attached and disposed.
+    """
+    def churn(count):
+        for _ in range(count):
+            child = service.child(Service)
+            child.child(Service)
+            service.detach(child, dispose=True)
+
+    churn(50)
+    gc.collect()
+    gc.disable()
+    try:
+        objects, loggers = len(gc.get_objects()), len(logging.Logger.manager.loggerDict)
+        churn(500)
+        assert len(gc.get_objects()) - objects < 100
+        assert len(logging.Logger.manager.loggerDict) == loggers
+        assert gc.collect() == 0
+    finally:
+        gc.enable()
+    assert len(service) == 0
+    assert len(service.service_index) == 1
+
+
+def test_service_dispose_releases_children(service):
+    """
+    Test that disposing of a service detaches and releases its whole subtree.
+    """
+    child = service.child(Service)
+    grandchild = child.child(Service)
+    ref = weakref.ref(grandchild)
+    service.detach(child, dispose=True)
+
+    assert child.parent is None
+    assert len(child) == 0
+    assert grandchild.parent is None
+    assert grandchild.id not in logging.Logger.manager.loggerDict
+    del grandchild
+    assert ref() is None
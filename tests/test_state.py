@@ -6,8 +6,10 @@
 """
 
 import pytest
+import threading
 
-from scatter.state import StateMachine, transition, guard, InvalidTransition
+from scatter.state import StateMachine, transition, guard, state_mask, InvalidTransition
+from scatter.structures import Enum
 
 
 @pytest.fixture(scope='function', params=['off'])
@@ -142,4 +144,60 @@ def test_invalid_state_guard_raises(switch):
     :class: `~scatter.state.InvalidTransition` exception when called when in an invalid state.
     """
     with pytest.raises(InvalidTransition):
-        switch.call_when_on()
\ No newline at end of file
+        switch.call_when_on()
+
+Level = Enum('Level', 'Low Medium High')
+
+
+class DialStateMachine(StateMachine):
+    """
+    State machine for a dial whose states are enum flags.
+    """
+
+    @transition(Level.Low | Level.Medium, Level.High)
+    def turn_up(self):
+        pass
+
+    @transition((Level.Medium, Level.High), Level.Low)
+    def turn_down(self):
+        pass
+
+
+class Dial(object):
+    """
+    Test fixture which guards methods with enum flags.
+    """
+
+    def __init__(self, state_machine):
+        self.state_machine = state_machine
+
+    @guard(Level.Medium | Level.High)
+    def call_when_loud(self):
+        return True
+
+
+def test_state_mask():
+    """
+    Test that enum states, sets of them and iterables of them reduce to a bit mask, and
+    anything else does not.
+    """
+    assert state_mask(Level.Low) == 1
+    assert state_mask(Level.Low | Level.High) == 5
+    assert state_mask((Level.Medium, Level.High)) == 6
+    assert state_mask('off') is None
+    assert state_mask(('on', Level.Low)) is None
+
+
+def test_enum_flag_transitions():
+    """
+    Test that transitions and guards check enum flag states.
+    """
+    dial = Dial(DialStateMachine(Level.Low, threading.Condition))
+    with pytest.raises(InvalidTransition):
+        dial.call_when_loud()
+
+    assert dial.state_machine.turn_down() == Level.Low
+    assert dial.state_machine.turn_up() == Level.High
+    assert dial.call_when_loud()
+    assert dial.state_machine.turn_up() == Level.High
+    assert dial.state_machine.turn_down() == Level.Low
@@ -0,0 +1,305 @@
+"""
+    tests.test_store
+    ~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.store` module.
+"""
+
+import pytest
+import threading
+import time
+
+from scatter import store
+
+
+@pytest.fixture(scope='function', params=[store.DictStore, store.CacheStore, store.ShardedStore,
+                                          lambda: store.ShardedStore(read_mostly=True)])
+def store_fixture(request):
+    return request.param()
+
+
+@pytest.fixture(scope='function', params=[False, True])
+def sharded_store_fixture(request):
+    return store.ShardedStore(shards=4, read_mostly=request.param)
+
+
+def test_store_contract(store_fixture):
+    """
+    Test that every store honours the get/put/pop/delete/len contract.
+    """
+    assert store_fixture.get('missing', 'default') == 'default'
+    store_fixture.put('a', 1)
+    store_fixture.put('b', 2)
+    assert len(store_fixture) == 2
+    assert store_fixture.get('a') == 1
+    assert store_fixture.pop('a') == 1
+    assert store_fixture.pop('a', 'default') == 'default'
+    store_fixture.delete('b')
+    assert len(store_fixture) == 0
+    with pytest.raises(KeyError):
+        store_fixture.delete('b')
+
+
+class MinimalStore(store.Store):
+    """
+    Store which only implements the abstract methods, to exercise the generic fallbacks.
+    """
+
+    def __init__(self):
+        self.data = {}
+
+    def __len__(self):
+        return len(self.data)
+
+    def pop(self, key, default=None):
+        return self.data.pop(key, default)
+
+    def get(self, key, default=None):
+        return self.data.get(key, default)
+
+    def put(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        del self.data[key]
+
+    def keys(self):
+        return self.data.keys()
+
+
+@pytest.fixture(scope='function', params=[MinimalStore, store.DictStore, store.CacheStore, store.ShardedStore,
+                                          lambda: store.ShardedStore(read_mostly=True)])
+def bulk_store_fixture(request):
+    return request.param()
+
+
+def test_store_bulk_operations(bulk_store_fixture):
+    """
+    Test that `get_many`, `put_many` and `delete_many` only touch the given keys which exist.
+    """
+    bulk_store_fixture.put_many({'a': 1, 'b': 2})
+    bulk_store_fixture.put_many([('c', 3), ('a', 4)])
+    assert len(bulk_store_fixture) == 3
+    assert bulk_store_fixture.get_many(['a', 'c', 'missing']) == {'a': 4, 'c': 3}
+    assert bulk_store_fixture.delete_many(['a', 'b', 'missing']) == 2
+    assert sorted(bulk_store_fixture.items()) == [('c', 3)]
+
+
+def test_store_scan(bulk_store_fixture):
+    """
+    Test that `scan` returns keys in order limited by prefix and range, across batches.
+    """
+    bulk_store_fixture.put_many(('user.{0:02d}'.format(i), i) for i in range(20))
+    bulk_store_fixture.put_many([('group.a', 'a'), (('tuple', 1), 't'), (7, 'int')])
+
+    users = list(bulk_store_fixture.scan(prefix='user.', batch_size=3))
+    assert users == [('user.{0:02d}'.format(i), i) for i in range(20)]
+    assert [key for key, _ in bulk_store_fixture.scan(start='user.05', end='user.08')] == \
+        ['user.05', 'user.06', 'user.07']
+    assert list(bulk_store_fixture.scan(prefix=('tuple',))) == [(('tuple', 1), 't')]
+    assert len(list(bulk_store_fixture.scan())) == 23
+
+
+def test_store_without_keys_does_not_scan():
+    """
+    Test that stores which can't list their keys raise `NotImplementedError` when iterated.
+    """
+    class Unlisted(MinimalStore):
+        keys = store.Store.keys
+
+    unlisted = Unlisted()
+    unlisted.put('a', 1)
+    assert unlisted.get_many(['a']) == {'a': 1}
+    with pytest.raises(NotImplementedError):
+        unlisted.items()
+    with pytest.raises(NotImplementedError):
+        list(unlisted.scan())
+
+
+def test_cache_store_scan_does_not_use_keys():
+    """
+    Test that scanning a cache neither counts hits nor changes which key is evicted next.
+    """
+    cache = store.CacheStore(max_entries=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert list(cache.scan()) == [('a', 1), ('b', 2)]
+    assert cache.stats()['hits'] == 0
+
+    cache.put('c', 3)
+    assert 'a' not in cache and 'b' in cache
+
+
+def test_cache_store_bulk_evicts_and_skips_expired():
+    """
+    Test that bulk writes are bounded like single ones and bulk reads skip expired keys.
+    """
+    evicted = []
+    cache = store.CacheStore(max_entries=2, on_evict=lambda *args: evicted.append(args))
+    cache.put_many([('a', 1), ('b', 2), ('c', 3)])
+    assert evicted == [('a', 1, 'capacity')]
+
+    cache.put('d', 4, ttl=0)
+    assert cache.get_many(['b', 'c', 'd']) == {'c': 3}
+    assert sorted(cache.items()) == [('c', 3)]
+
+
+def test_cache_store_lru_eviction():
+    """
+    Test that the least recently used key is evicted once `max_entries` is exceeded.
+    """
+    evicted = []
+    cache = store.CacheStore(max_entries=2, on_evict=lambda *args: evicted.append(args))
+    cache.put('a', 1)
+    cache.put('b', 2)
+    cache.get('a')
+    cache.put('c', 3)
+
+    assert evicted == [('b', 2, 'capacity')]
+    assert cache.get('a') == 1 and cache.get('c') == 3
+    assert cache.stats()['evictions'] == 1
+
+
+def test_cache_store_lfu_eviction():
+    """
+    Test that the least frequently used key is evicted once `max_entries` is exceeded.
+    """
+    cache = store.CacheStore(max_entries=2, policy='lfu')
+    cache.put('a', 1)
+    cache.put('b', 2)
+    for _ in range(3):
+        cache.get('a')
+    cache.get('b')
+    cache.put('c', 3)
+    cache.put('d', 4)
+
+    assert cache.get('a') == 1
+    assert cache.get('b') is None
+    assert len(cache) == 2
+
+
+def test_cache_store_lfu_eviction_keeps_new_key_count():
+    """
+    Test that keeping the key just stored while evicting doesn't count as a use of it.
+    """
+    cache = store.CacheStore(max_entries=1, policy='lfu')
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.policy.counts == {'b': 1}
+
+
+def test_cache_store_max_bytes():
+    """
+    Test that keys are evicted to keep the approximate size within `max_bytes`.
+    """
+    cache = store.CacheStore(max_bytes=100, sizeof=lambda key, value: len(value))
+    cache.put('a', 'x' * 60)
+    cache.put('b', 'x' * 60)
+
+    assert 'a' not in cache
+    assert cache.stats()['bytes'] == 60
+
+    cache.put('c', 'x' * 200)
+    assert 'c' in cache and len(cache) == 1
+
+
+def test_cache_store_ttl():
+    """
+    Test that keys expire lazily on read and through `expire`.
+    """
+    evicted = []
+    cache = store.CacheStore(ttl=60, on_evict=lambda *args: evicted.append(args))
+    cache.put('a', 1, ttl=0)
+    cache.put('b', 2, ttl=0)
+    cache.put('c', 3)
+
+    assert cache.get('a') is None
+    assert cache.expire() == 1
+    assert cache.expire(now=time.time() + 120) == 1
+    assert sorted(evicted) == [('a', 1, 'expired'), ('b', 2, 'expired'), ('c', 3, 'expired')]
+    assert len(cache) == 0
+
+
+def test_cache_store_ttl_deadlines_are_bounded():
+    """
+    Test that putting the same key over and over doesn't grow the queue of expiry deadlines,
+    and that expired keys aren't counted.
+    """
+    cache = store.CacheStore(ttl=3600)
+    for i in range(1000):
+        cache.put('hot', i)
+    assert len(cache.deadlines) <= 2
+    assert cache.get('hot') == 999
+
+    cache.put('cold', 1, ttl=0)
+    assert len(cache) == 1
+
+
+def test_cache_store_background_expiry():
+    """
+    Test that the background thread removes expired keys which are never read.
+    """
+    cache = store.CacheStore(ttl=0.01, expiry_interval=0.01)
+    cache.put('a', 1)
+    for _ in range(500):
+        if not cache.stats()['entries']:
+            break
+        time.sleep(0.01)
+    cache.close()
+    assert cache.stats()['entries'] == 0
+    assert cache.stats()['expirations'] == 1
+
+
+def test_cache_store_counters():
+    """
+    Test that hits and misses are counted.
+    """
+    cache = store.CacheStore()
+    cache.put('a', 1)
+    cache.get('a')
+    cache.get('b')
+    stats = cache.stats()
+    assert (stats['hits'], stats['misses']) == (1, 1)
+
+
+def test_sharded_store_get_or_put(sharded_store_fixture):
+    """
+    Test that `get_or_put` stores a value only if the key doesn't exist.
+    """
+    assert sharded_store_fixture.get_or_put('a', 1) == 1
+    assert sharded_store_fixture.get_or_put('a', 2) == 1
+    assert sharded_store_fixture.get('a') == 1
+
+
+def test_sharded_store_compare_and_swap(sharded_store_fixture):
+    """
+    Test that `compare_and_swap` only replaces values which equal the expected one.
+    """
+    assert not sharded_store_fixture.compare_and_swap('a', 1, 2)
+    assert sharded_store_fixture.compare_and_swap('a', store.MISSING, 1)
+    assert not sharded_store_fixture.compare_and_swap('a', store.MISSING, 1)
+    assert sharded_store_fixture.compare_and_swap('a', 1, 2)
+    assert sharded_store_fixture.get('a') == 2
+    assert sharded_store_fixture.compare_and_swap('a', 2, store.MISSING)
+    assert 'a' not in sharded_store_fixture
+
+
+def test_sharded_store_concurrent_increments(sharded_store_fixture):
+    """
+    Test that increments made through `compare_and_swap` from many threads are never lost.
+    """
+    def increment():
+        for _ in range(500):
+            for key in ('a', 'b', 'c'):
+                while True:
+                    current = sharded_store_fixture.get(key, 0)
+                    if sharded_store_fixture.compare_and_swap(key, current or store.MISSING, current + 1):
+                        break
+
+    threads = [threading.Thread(target=increment) for _ in range(4)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert [sharded_store_fixture.get(key) for key in ('a', 'b', 'c')] == [2000] * 3
@@ -263,4 +263,115 @@ def test_enum_raises_on_invalid_input(values):
     on creation for all non-splittable types.
     """
     with pytest.raises(AttributeError):
-        structures.Enum('Enum', values)
\ No newline at end of file
+        structures.Enum('Enum', values)
+
+@pytest.fixture(scope='module')
+def topic_trie_fixture():
+    trie = structures.TopicTrie()
+    for pattern in ('a.b.c', 'a.*.c', 'a.#', '#', 'a.*', 'x.#.z'):
+        trie = trie.add(pattern, pattern)
+    return trie
+
+
+@pytest.mark.parametrize(('topic', 'patterns'), [
+    ('a.b.c', {'a.b.c', 'a.*.c', 'a.#', '#'}),
+    ('a.b', {'a.#', '#', 'a.*'}),
+    ('a', {'a.#', '#'}),
+    ('', {'#'}),
+    ('x.z', {'x.#.z', '#'}),
+    ('x.y.y.z', {'x.#.z', '#'}),
+    ('b.c', {'#'}),
+])
+def test_topic_trie_match(topic_trie_fixture, topic, patterns):
+    """
+    Test that topics match exact, single word and multi word wildcard patterns.
+    """
+    matches = topic_trie_fixture.match(topic)
+    assert len(matches) == len(patterns)
+    assert set(matches) == patterns
+
+
+def test_topic_trie_is_copy_on_write(topic_trie_fixture):
+    """
+    Test that adding and removing patterns leaves the original trie untouched.
+    """
+    removed = topic_trie_fixture.remove('a.b.c', 'a.b.c')
+    assert 'a.b.c' not in removed.match('a.b.c')
+    assert 'a.b.c' in topic_trie_fixture.match('a.b.c')
+    assert len(removed) == len(topic_trie_fixture) - 1
+
+    with pytest.raises(KeyError):
+        removed.remove('a.b.c', 'a.b.c')
+    assert sorted(removed.add('a.b.c', 'a.b.c')) == sorted(topic_trie_fixture)
+
+
+def test_topic_trie_match_unique_bound_methods():
+    """
+    Test that a bound method subscribed to several matching patterns is matched once.
+    """
+    received = []
+    trie = structures.TopicTrie().add('a.*', received.append).add('a.#', received.append)
+    trie = trie.add('a.b', [])
+    matches = trie.match('a.b')
+    assert len(matches) == 2
+    assert received.append in matches
+
+
+def test_acyclic_ordered_dict_keeps_insertion_order():
+    """
+    Test that keys are iterated in insertion order across deletes, reinserts and compaction.
+    """
+    mapping = structures.AcyclicOrderedDict()
+    for i in range(100):
+        mapping[i] = i
+    for i in range(100):
+        if i % 4:
+            del mapping[i]
+    mapping[1] = 'again'
+    mapping[4] = 'updated'
+    assert list(mapping) == range(0, 100, 4) + [1]
+    assert mapping[4] == 'updated'
+    assert len(mapping.order) < 100
+
+
+def test_weak_value_ordered_dict_drops_collected_values():
+    """
+    Test that entries are dropped once their value is collected.
+    """
+    class Value(object):
+        pass
+
+    values = [Value() for _ in range(3)]
+    mapping = structures.WeakValueOrderedDict(zip('abc', values))
+    assert list(mapping) == ['a', 'b', 'c']
+    del values[1]
+    assert list(mapping) == ['a', 'c']
+    assert len(mapping) == 2
+    with pytest.raises(KeyError):
+        mapping['b']
+
+
+def test_enum_member_flags(enum_fixture):
+    """
+    Test that :class: `~scatter.structures.EnumMember` instances compose with `|` and check
+    membership with `in`.
+    """
+    flags = enum_fixture.One | enum_fixture.Three
+    assert flags == 5
+    assert enum_fixture.One in flags
+    assert enum_fixture.Two not in flags
+    assert (enum_fixture.One | enum_fixture.Three) in flags
+    assert (enum_fixture.One | enum_fixture.Two) not in flags
+    assert flags & enum_fixture.Three == 4
+    assert str(flags) == 'Fixture.One|Three'
+    assert list(enum_fixture) == [enum_fixture.One, enum_fixture.Two, enum_fixture.Three]
+
+
+def test_enum_member_hashable(enum_fixture):
+    """
+    Test that :class: `~scatter.structures.EnumMember` instances hash by value.
+    """
+    lookup = {enum_fixture.One: 'one', enum_fixture.Two | enum_fixture.Three: 'loud'}
+    assert lookup[enum_fixture.One] == 'one'
+    assert lookup[enum_fixture.Three | enum_fixture.Two] == 'loud'
+    assert lookup[1] == 'one'
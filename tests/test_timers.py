@@ -0,0 +1,261 @@
+"""
+    tests.test_timers
+    ~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.timers` module.
+"""
+
+import pytest
+import random
+import threading
+import time
+
+from scatter.reactor import Reactor
+from scatter.timers import TimerService, TimerWheel
+
+
+@pytest.fixture(scope='function')
+def wheel():
+    return TimerWheel(tick=1.0, slots=4, levels=2, now=0)
+
+
+@pytest.fixture(scope='function')
+def timers(request):
+    service = TimerService.new(name='timers', config=dict(TESTING=True, THREADED=False))
+    request.addfinalizer(service.stop)
+    return service
+
+
+def test_wheel_slots_must_be_power_of_two():
+    """
+    Test that a wheel can't be created with a number of slots which isn't a power of two.
+    """
+    with pytest.raises(ValueError):
+        TimerWheel(slots=100)
+
+
+def test_wheel_fires_in_deadline_order(wheel):
+    """
+    Test that timers on every level and in overflow fire on the first tick at or after their
+    deadline, ordered by deadline.
+    """
+    deadlines = [0.5, 3, 2.5, 7, 15.5, 16, 40, 3.2]
+    timers = [wheel.schedule(deadline, None) for deadline in deadlines]
+    assert len(wheel) == len(deadlines)
+
+    fired = {}
+    for now in xrange(1, 41):
+        for timer in wheel.advance(now):
+            assert timer.deadline <= now < timer.deadline + 1
+            assert not timer.pending
+            fired[timer.deadline] = now
+    assert sorted(fired) == sorted(deadlines)
+    assert fired == dict((timer.deadline, int(-(-timer.deadline // 1))) for timer in timers)
+    assert len(wheel) == 0
+
+
+def test_wheel_advance_many_ticks(wheel):
+    """
+    Test that advancing past many ticks at once returns every timer due in between.
+    """
+    for deadline in xrange(1, 30):
+        wheel.schedule(deadline, None)
+    due = wheel.advance(20)
+    assert [timer.deadline for timer in due] == range(1, 21)
+    assert len(wheel) == 9
+
+
+def test_wheel_advance_skips_idle_ticks(wheel):
+    """
+    Test that advancing in jumps of random size fires every timer on the first advance past
+    its tick, on every level and in overflow.
+    """
+    rand = random.Random(7)
+    deadlines = [rand.uniform(0, 200) for _ in xrange(200)]
+    for deadline in deadlines:
+        wheel.schedule(deadline, None)
+
+    before = 0
+    while len(wheel):
+        now = before + rand.randint(1, 20)
+        for timer in wheel.advance(now):
+            assert before < -(-timer.deadline // 1) <= now
+        before = now
+
+
+def test_wheel_timeout_until_next_tick_with_timers():
+    """
+    Test that the wheel waits until the next tick with timers to fire or cascade, rather than
+    every tick, and advances over a long gap at once.
+    """
+    wheel = TimerWheel(tick=0.01, now=0)
+    assert wheel.timeout(0) is None
+    timer = wheel.schedule(3600, None)
+    assert wheel.timeout(0) > 1
+
+    started = time.time()
+    assert wheel.advance(3600) == [timer]
+    assert time.time() - started < 0.1
+
+
+def test_wheel_cancel_and_reschedule(wheel):
+    """
+    Test that cancelled timers never fire and rescheduled timers fire at their new deadline.
+    """
+    cancelled = wheel.schedule(2, None)
+    moved = wheel.schedule(2, None)
+    assert cancelled.cancel()
+    assert not cancelled.cancel()
+    assert wheel.reschedule(moved, 9)
+    assert not wheel.reschedule(cancelled, 9)
+    assert len(wheel) == 1
+
+    assert wheel.advance(8) == []
+    assert wheel.advance(9) == [moved]
+
+
+def test_wheel_schedule_in_past(wheel):
+    """
+    Test that timers whose deadline already passed fire on the next tick.
+    """
+    wheel.advance(5)
+    timer = wheel.schedule(1, None)
+    assert wheel.advance(6) == [timer]
+
+
+def test_call_later(timers):
+    """
+    Test that timers run their callable with its arguments once advanced past their deadline.
+    """
+    calls = []
+    now = time.time()
+    timers.call_later(0.05, calls.append, 'later')
+    timers.call_at(now + 0.2, calls.append, 'at')
+    cancelled = timers.call_later(0.05, calls.append, 'cancelled')
+    assert 0 < timers.timeout() <= 0.05 + timers.tick
+    assert timers.cancel(cancelled)
+
+    assert timers.advance(now + 0.1) == 1
+    assert calls == ['later']
+    timers.advance(now + 0.3)
+    assert calls == ['later', 'at']
+    assert timers.timeout() is None
+
+
+def test_call_every_corrects_drift(timers):
+    """
+    Test that periodic timers are scheduled from their previous deadline rather than when
+    they ran, skipping runs missed while the wheel was behind.
+    """
+    calls = []
+    timer = timers.call_every(1.0, calls.append, 'tick')
+    first = timer.deadline
+
+    timers.advance(first + 0.3)
+    assert timer.deadline == first + 1.0
+    timers.advance(first + 3.5)
+    assert timer.deadline == first + 4.0
+    assert calls == ['tick', 'tick']
+
+    stats = timers.stats()
+    assert stats['timers'] == 1
+    assert stats['fired'] == 2
+    assert stats['skipped'] == 2
+    assert stats['late_max'] == pytest.approx(2.5)
+    assert stats['late_mean'] == pytest.approx(1.4)
+
+    timer.cancel()
+    timers.advance(first + 10)
+    assert len(calls) == 2
+    with pytest.raises(ValueError):
+        timers.call_every(0, calls.append)
+
+
+def test_lateness_measured_when_timers_run(timers):
+    """
+    Test that how late a timer runs includes the time taken by timers which ran before it.
+    """
+    now = time.time()
+    timers.call_at(now - 0.1, time.sleep, 0.05)
+    timers.call_at(now - 0.09, lambda: None)
+    time.sleep(2 * timers.tick)
+    assert timers.advance() == 2
+    assert timers.stats()['late_max'] >= 0.09 + 0.05
+
+
+def test_cancel_from_callback(timers):
+    """
+    Test that a periodic timer cancelled by its own callable isn't scheduled again.
+    """
+    timer = timers.call_every(0.5, lambda: timer.cancel())
+    timers.advance(timer.deadline + 0.1)
+    assert not timer.pending
+    assert timers.stats()['timers'] == 0
+
+
+def test_threaded(request):
+    """
+    Test that a threaded service runs timers on its own thread.
+    """
+    service = TimerService.new(name='timers', config=dict(TESTING=True))
+    request.addfinalizer(service.stop)
+    service.start()
+
+    fired = threading.Event()
+    threads = []
+    service.call_later(0.02, lambda: threads.append(threading.current_thread()) or fired.set())
+    assert fired.wait(5)
+    assert threads == [service.thread]
+
+
+def test_restart(request, timers):
+    """
+    Test that services, threaded or not, can be started again after being stopped.
+    """
+    timers.start()
+    timers.stop()
+    timers.start()
+    timers.stop()
+    assert not timers.thread
+
+    service = TimerService.new(name='timers', config=dict(TESTING=True))
+    request.addfinalizer(service.stop)
+    service.start()
+    service.stop()
+    service.start()
+
+    fired = threading.Event()
+    service.call_later(0.02, fired.set)
+    assert fired.wait(5)
+
+
+def test_driven_by_reactor(request, timers):
+    """
+    Test that timers of a service driven by a reactor run on the reactor thread.
+    """
+    reactor = Reactor.new(config=dict(TESTING=True, POLL_TIMEOUT=0.05))
+    request.addfinalizer(reactor.stop)
+    reactor.start()
+    timers.start()
+    timers.drive(reactor)
+
+    fired = threading.Event()
+    threads = []
+    timers.call_later(0.02, lambda: threads.append(threading.current_thread()) or fired.set())
+    assert fired.wait(5)
+    assert threads == [reactor.thread]
+
+
+def test_threaded_wakes_up_for_earlier_timers(request):
+    """
+    Test that the timer thread, waiting on a distant timer, wakes up for one due sooner.
+    """
+    service = TimerService.new(name='timers', config=dict(TESTING=True, POLL_TIMEOUT=30))
+    request.addfinalizer(service.stop)
+    service.start()
+
+    service.call_later(60, lambda: None)
+    time.sleep(0.05)
+    fired = threading.Event()
+    service.call_later(0.02, fired.set)
+    assert fired.wait(5)
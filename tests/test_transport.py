@@ -0,0 +1,324 @@
+"""
+    tests.test_transport
+    ~~~~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.transport` module.
+"""
+
+import pytest
+import socket
+import threading
+import time
+
+from scatter import transport
+from scatter.protocol import MessageHandler
+from scatter.reactor import Reactor
+from scatter.service import Service
+
+
+@pytest.fixture(scope='module')
+def reactor(request):
+    r = Reactor.new(config=dict(TESTING=True, POLL_TIMEOUT=0.05))
+    r.start()
+    request.addfinalizer(r.stop)
+    return r
+
+
+@pytest.fixture(scope='function', params=['tcp://127.0.0.1:0', 'ipc://{0}/scatter.sock'])
+def address(request, tmpdir):
+    return request.param.format(tmpdir)
+
+
+def echo_server(reactor, address):
+    server = transport.bind(address, reactor)
+    server.on_accept(lambda listener, stream: stream.on_recv(lambda s, msg: s.send(msg)))
+    return server
+
+
+def test_parse_address():
+    """
+    Test that addresses are split into their scheme and location.
+    """
+    assert transport.parse_address('tcp://127.0.0.1:80') == ('tcp', '127.0.0.1:80')
+    assert transport.parse_address('ipc:///tmp/a.sock') == ('ipc', '/tmp/a.sock')
+    with pytest.raises(ValueError):
+        transport.parse_address('127.0.0.1:80')
+
+
+def test_unknown_scheme_raises():
+    """
+    Test that connecting to an address with an unregistered scheme raises a `ValueError`.
+    """
+    with pytest.raises(ValueError):
+        transport.connect('carrier-pigeon://coop')
+
+
+def test_stream_echo_preserves_message_boundaries(reactor, address):
+    """
+    Test that every message sent is received whole, in order, including ones which
+    require many partial writes.
+    """
+    messages = ['a', '', 'b' * 1024 * 1024, 'c']
+    received = []
+    done = threading.Event()
+
+    def on_recv(stream, msg):
+        received.append(msg)
+        if len(received) == len(messages):
+            done.set()
+
+    server = echo_server(reactor, address)
+    client = transport.connect(server.address, reactor)
+    client.on_recv(on_recv)
+    for msg in messages:
+        client.send(msg)
+
+    done.wait(5)
+    assert received == messages
+
+    client.close()
+    server.close()
+
+
+def test_stream_close_callback(reactor, address):
+    """
+    Test that `on_close` callbacks are raised when the peer goes away.
+    """
+    closed = threading.Event()
+    server = transport.bind(address, reactor)
+    server.on_accept(lambda listener, stream: stream.close())
+
+    client = transport.stream_class(server.address).create(reactor)
+    client.on_close(lambda stream: closed.set())
+    client.connect(server.address)
+
+    closed.wait(5)
+    assert closed.is_set()
+    assert client.closed
+    server.close()
+
+
+class Node(Service):
+    """
+    Service which records every message received by its message handler.
+    """
+
+    def on_initialized(self, *args, **kwargs):
+        self.received = []
+        self.done = threading.Event()
+
+    def on_msg_recv(self, stream, msg):
+        self.received.append(msg)
+        self.done.set()
+
+    def on_msg_send(self, stream, msg):
+        pass
+
+
+def test_message_handler_receives_decoded_messages(reactor, address):
+    """
+    Test that streams registered with a :class: `~scatter.protocol.MessageHandler` pass
+    decoded messages to the `on_msg_recv` callback of its parent.
+    """
+    node = Node.new(config=dict(TESTING=True))
+    handler = node.child(MessageHandler)
+    server = transport.bind(address, reactor)
+    server.on_accept(lambda listener, stream: handler.register(stream))
+    client = handler.register(transport.connect(server.address, reactor))
+    handler.send(client, func='ping', topic='test', args=[1, 2], kwargs={})
+
+    node.done.wait(5)
+    assert node.received[0].func == 'ping'
+    assert node.received[0].args == [1, 2]
+    assert node.received[0].sender_id == handler.id
+
+    client.close()
+    server.close()
+
+
+def test_stream_pauses_reading_at_high_water(reactor, address):
+    """
+    Test that a stream stops reading once its unconsumed messages reach the high water mark
+    and starts again once `recv` drains them below the low water mark.
+    """
+    accepted = []
+    server = transport.bind(address, reactor)
+    server.on_accept(lambda listener, stream: accepted.append(stream))
+    client = transport.connect(server.address, reactor)
+
+    client.send('first')
+    for _ in range(500):
+        if accepted and accepted[0].inbox:
+            break
+        time.sleep(0.01)
+    stream = accepted[0]
+    stream.high_water, stream.low_water = 2, 0
+
+    for i in range(10):
+        client.send(str(i))
+    for _ in range(500):
+        if not stream.reading:
+            break
+        time.sleep(0.01)
+    assert not stream.reading
+    assert stream.occupancy()['inbox'] == 2
+
+    received = []
+    for _ in range(500):
+        msg = stream.recv()
+        if msg is not None:
+            received.append(msg)
+        if len(received) == 11:
+            break
+        time.sleep(0.001)
+    assert received == ['first'] + [str(i) for i in range(10)]
+    assert stream.reading
+
+    client.close()
+    server.close()
+
+
+def test_reactor_call_later(reactor):
+    """
+    Test that timers run on the reactor thread after their delay unless cancelled.
+    """
+    ran, done = [], threading.Event()
+    cancelled = reactor.call_later(0.01, ran.append, 'cancelled')
+    reactor.call_later(0.02, lambda: (ran.append(threading.current_thread()), done.set()))
+    cancelled.cancel()
+
+    done.wait(5)
+    assert ran == [reactor.thread]
+
+
+@pytest.mark.parametrize(('options', 'batches'), [
+    (dict(coalesce_delay=0.05), 1),
+    (dict(coalesce_delay=5, coalesce_count=5), 2),
+])
+def test_stream_coalesces_writes(reactor, address, options, batches):
+    """
+    Test that coalescing streams write bursts of messages with a single send once the flush
+    deadline passes or a threshold is reached.
+    """
+    messages = [str(i) for i in range(10)]
+    received, done = [], threading.Event()
+
+    def on_recv(stream, msg):
+        received.append(msg)
+        if len(received) == len(messages):
+            done.set()
+
+    server = echo_server(reactor, address)
+    client = transport.stream_class(server.address).create(reactor, **options)
+    client.on_recv(on_recv)
+    client.connect(server.address)
+    for msg in messages:
+        client.send(msg)
+
+    done.wait(5)
+    assert received == messages
+    stats = client.write_stats()
+    assert stats['batches'] == batches
+    assert stats['messages'] == len(messages)
+    assert stats['mean_batch'] == float(len(messages)) / batches
+
+    client.close()
+    server.close()
+
+
+def test_stream_flush_skips_deadline(reactor, address):
+    """
+    Test that `flush` writes coalesced messages without waiting for the deadline.
+    """
+    done = threading.Event()
+    server = echo_server(reactor, address)
+    client = transport.stream_class(server.address).create(reactor, coalesce_delay=5)
+    client.on_recv(lambda stream, msg: done.set())
+    client.connect(server.address)
+    client.send('ping')
+    client.flush()
+
+    assert done.wait(1)
+    client.close()
+    server.close()
+
+
+def test_stream_unknown_option_raises():
+    """
+    Test that creating a stream with an unknown option raises a `TypeError`.
+    """
+    with pytest.raises(TypeError):
+        transport.TcpStream.create(coalesce_sometimes=True)
+
+
+def test_stream_without_reactor_flushes_on_send():
+    """
+    Test that writes a stream without a reactor left behind when the socket was full are
+    retried by the next send.
+    """
+    sock, peer = socket.socketpair()
+    stream = transport.UnixStream(sock, address='ipc://pair')
+    stream.connected = True
+    big = 'x' * (1024 * 1024)
+    stream.send(big)
+    assert stream.batch is not None
+
+    received, done = [], threading.Event()
+    expected = transport.FRAME_HEADER.size + len(big)
+
+    def read():
+        while sum(len(chunk) for chunk in received) < expected:
+            received.append(peer.recv(65536))
+        done.set()
+
+    reader = threading.Thread(target=read)
+    reader.daemon = True
+    reader.start()
+    try:
+        # The reader empties the socket, but only further sends write what is left.
+        for _ in range(500):
+            if done.wait(0.01):
+                break
+            stream.send('y')
+        assert done.is_set()
+        assert ''.join(received)[transport.FRAME_HEADER.size:expected] == big
+    finally:
+        stream.close()
+        peer.close()
+
+
+def test_stream_closes_on_oversized_frame():
+    """
+    Test that a stream is closed, rather than buffering, when its peer announces a message
+    larger than `max_frame_size`.
+    """
+    sock, peer = socket.socketpair()
+    stream = transport.UnixStream(sock, address='ipc://pair', max_frame_size=16)
+    received = []
+    stream.on_recv(lambda _, msg: received.append(msg))
+    try:
+        peer.sendall(transport.FRAME_HEADER.pack(5) + 'small' + transport.FRAME_HEADER.pack(1 << 30) + 'x')
+        time.sleep(0.01)
+        stream.handle_read()
+        assert received == ['small']
+        assert stream.closed
+        assert not stream.read_buffer
+    finally:
+        stream.close()
+        peer.close()
+
+
+def test_reactor_restart():
+    """
+    Test that a stopped reactor runs timers again once restarted.
+    """
+    reactor = Reactor.new(config=dict(TESTING=True, POLL_TIMEOUT=0.05))
+    reactor.start()
+    reactor.stop()
+    reactor.start()
+    try:
+        done = threading.Event()
+        reactor.call_later(0.01, done.set)
+        assert done.wait(5)
+    finally:
+        reactor.stop()
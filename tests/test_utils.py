@@ -8,7 +8,7 @@
 import collections
 import pytest
 
-from scatter.utils import iterable, get_import_path
+from scatter.utils import iterable, get_import_path, get_memory_usage, Deadline
 
 
 @pytest.fixture(scope='module')
@@ -120,3 +120,38 @@ def test_iterable_unicode_to_tuple(unicode_fixture):
     i = iterable(unicode_fixture)
     assert unicode_fixture is not i
     assert isinstance(i, collections.Iterable)
+
+
+def test_get_memory_usage_current_process():
+    """
+    Test that `get_memory_usage` reports shared and private memory for the current process
+    on platforms which expose `/proc/self/smaps_rollup`.
+    """
+    usage = get_memory_usage()
+    if usage is None:
+        pytest.skip('smaps_rollup not available on this platform')
+    assert usage['private'] > 0
+    assert usage['rss'] >= usage['private']
+
+
+def test_get_memory_usage_unknown_process():
+    """
+    Test that `get_memory_usage` returns `None` for a process which doesn't exist.
+    """
+    assert get_memory_usage(-1) is None
+
+
+def test_deadline_remaining():
+    """
+    Test that a deadline counts down to zero and expires, and that one without a timeout never does.
+    """
+    deadline = Deadline(0.05)
+    assert 0 < deadline.remaining() <= 0.05
+    assert not deadline.expired()
+    deadline.expires -= 1
+    assert deadline.remaining() == 0.0
+    assert deadline.expired()
+
+    forever = Deadline()
+    assert forever.remaining() is None
+    assert not forever.expired()
@@ -0,0 +1,98 @@
+"""
+    tests.test_zygote
+    ~~~~~~~~~~~~~~~~~
+
+    Implements tests for the :module: `~scatter.zygote` module.
+"""
+
+import os
+import pytest
+import signal
+import socket
+import stat
+import time
+
+from scatter.zygote import Zygote, ZygoteError, spawn
+
+
+@pytest.fixture(scope='module')
+def zygote_fixture(request, tmpdir_factory):
+    path = str(tmpdir_factory.mktemp('zygote').join('test.zygote'))
+
+    pid = os.fork()
+    if pid == 0:
+        try:
+            Zygote.run(config=dict(CONTROL_SOCKET=path, POLL_INTERVAL=0.05, REQUEST_TIMEOUT=0.2, TESTING=True))
+        finally:
+            os._exit(0)
+
+    def teardown():
+        os.kill(pid, signal.SIGKILL)
+        os.waitpid(pid, 0)
+
+    request.addfinalizer(teardown)
+
+    # The socket file exists before it listens, so wait until it accepts connections.
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(path)
+            break
+        except socket.error:
+            time.sleep(0.01)
+        finally:
+            probe.close()
+    return path
+
+
+def test_zygote_spawns_running_worker(zygote_fixture):
+    """
+    Test that a spawn request returns the pid and service id of a running worker.
+    """
+    worker = spawn(zygote_fixture, services=['scatter.service.Service'], timeout=10)
+    assert worker['id']
+
+    os.kill(worker['pid'], signal.SIGTERM)
+
+
+def test_zygote_control_socket_is_private(zygote_fixture):
+    """
+    Test that only the user running the zygote may connect to its control socket.
+    """
+    assert stat.S_IMODE(os.stat(zygote_fixture).st_mode) == 0600
+
+
+def test_zygote_spawn_invalid_service_raises(zygote_fixture):
+    """
+    Test that a spawn request for a service which cannot be imported raises a `ZygoteError`.
+    """
+    with pytest.raises(ZygoteError):
+        spawn(zygote_fixture, services=['scatter.nonexistent.Service'], timeout=10)
+
+
+def test_zygote_stalled_client_times_out(zygote_fixture):
+    """
+    Test that a client which never sends its request doesn't hold up requests of other clients.
+    """
+    stalled = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    stalled.connect(zygote_fixture)
+    try:
+        worker = spawn(zygote_fixture, services=['scatter.service.Service'], timeout=10)
+        assert worker['id']
+        os.kill(worker['pid'], signal.SIGTERM)
+
+        stalled.settimeout(10)
+        assert 'error' in stalled.recv(4096)
+    finally:
+        stalled.close()
+
+
+def test_zygote_workers_reuse_package_importer(tmpdir):
+    """
+    Test that workers keep the package importer of the zygote once initialized.
+    """
+    zygote = Zygote()
+    zygote.init(config=dict(CONTROL_SOCKET=str(tmpdir.join('test.zygote')), TESTING=True))
+    worker = zygote.create_worker(dict())
+    assert worker.package_importer is zygote.package_importer